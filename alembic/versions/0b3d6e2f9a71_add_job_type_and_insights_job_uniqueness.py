@@ -0,0 +1,42 @@
+"""Add job_type and insights job uniqueness
+
+Revision ID: 0b3d6e2f9a71
+Revises: f2a7c41d8e93
+Create Date: 2026-10-19 17:05:41.218904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b3d6e2f9a71'
+down_revision: Union[str, Sequence[str], None] = 'f2a7c41d8e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('job_type', sa.String(length=20), server_default='process', nullable=False))
+    op.add_column('jobs_archive', sa.Column('job_type', sa.String(length=20), server_default='process', nullable=False))
+    op.create_index('uq_jobs_insights_pending', 'jobs', ['video_id'], unique=True,
+                    postgresql_where=sa.text("job_type = 'insights' AND status = 'pending'"),
+                    sqlite_where=sa.text("job_type = 'insights' AND status = 'pending'"))
+    op.create_index('uq_jobs_insights_processing', 'jobs', ['video_id'], unique=True,
+                    postgresql_where=sa.text("job_type = 'insights' AND status = 'processing'"),
+                    sqlite_where=sa.text("job_type = 'insights' AND status = 'processing'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_jobs_insights_processing', table_name='jobs',
+                  postgresql_where=sa.text("job_type = 'insights' AND status = 'processing'"),
+                  sqlite_where=sa.text("job_type = 'insights' AND status = 'processing'"))
+    op.drop_index('uq_jobs_insights_pending', table_name='jobs',
+                  postgresql_where=sa.text("job_type = 'insights' AND status = 'pending'"),
+                  sqlite_where=sa.text("job_type = 'insights' AND status = 'pending'"))
+    op.drop_column('jobs_archive', 'job_type')
+    op.drop_column('jobs', 'job_type')
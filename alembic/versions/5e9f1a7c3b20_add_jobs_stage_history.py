@@ -0,0 +1,30 @@
+"""Add jobs stage_history
+
+Revision ID: 5e9f1a7c3b20
+Revises: c3c570613634
+Create Date: 2026-10-19 19:31:52.114027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9f1a7c3b20'
+down_revision: Union[str, Sequence[str], None] = 'c3c570613634'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('stage_history', sa.JSON(), nullable=True))
+    op.add_column('jobs_archive', sa.Column('stage_history', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs_archive', 'stage_history')
+    op.drop_column('jobs', 'stage_history')
@@ -0,0 +1,47 @@
+"""Add jobs_archive table and transcript_path field
+
+Revision ID: 7c1e4a9b2d60
+Revises: 571e3c813ac6
+Create Date: 2026-10-19 09:12:31.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4a9b2d60'
+down_revision: Union[str, Sequence[str], None] = '571e3c813ac6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs_archive',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('video_id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('worker_id', sa.String(length=255), nullable=True),
+    sa.Column('error_message', sa.String(length=1000), nullable=True),
+    sa.Column('progress', sa.JSON(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_archive_video_id', 'jobs_archive', ['video_id'], unique=False)
+    op.create_index('ix_jobs_status_completed_at', 'jobs', ['status', 'completed_at'], unique=False)
+    op.add_column('videos', sa.Column('transcript_path', sa.String(length=1024), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('videos', 'transcript_path')
+    op.drop_index('ix_jobs_status_completed_at', table_name='jobs')
+    op.drop_index('ix_jobs_archive_video_id', table_name='jobs_archive')
+    op.drop_table('jobs_archive')
@@ -0,0 +1,28 @@
+"""Add jobs status/created_at index
+
+Revision ID: 8a4c2d9e6f13
+Revises: 5e9f1a7c3b20
+Create Date: 2026-10-19 20:44:09.582310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4c2d9e6f13'
+down_revision: Union[str, Sequence[str], None] = '5e9f1a7c3b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_jobs_status_created_at', 'jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_status_created_at', table_name='jobs')
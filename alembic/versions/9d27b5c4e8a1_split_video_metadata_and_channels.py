@@ -0,0 +1,129 @@
+"""Split video metadata and channels out of videos
+
+Revision ID: 9d27b5c4e8a1
+Revises: 8a4c2d9e6f13
+Create Date: 2026-10-20 09:12:44.730155
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d27b5c4e8a1'
+down_revision: Union[str, Sequence[str], None] = '8a4c2d9e6f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+METADATA_COLUMNS = [  # (name, type) of columns moved to video_metadata
+    ('uploader', sa.String(length=255)),
+    ('uploader_id', sa.String(length=255)),
+    ('like_count', sa.Integer()),
+    ('comment_count', sa.Integer()),
+    ('timestamp', sa.Integer()),
+    ('release_timestamp', sa.Integer()),
+    ('description', sa.Text()),
+    ('tags', sa.JSON()),
+    ('categories', sa.JSON()),
+    ('webpage_url', sa.String(length=2048)),
+    ('original_url', sa.String(length=2048)),
+    ('extractor_key', sa.String(length=100)),
+    ('resolution', sa.String(length=50)),
+    ('width', sa.Integer()),
+    ('height', sa.Integer()),
+    ('fps', sa.Integer()),
+    ('vcodec', sa.String(length=100)),
+    ('acodec', sa.String(length=100)),
+    ('filesize', sa.Integer()),
+    ('filesize_approx', sa.Integer()),
+    ('language', sa.String(length=10)),
+    ('subtitles', sa.JSON()),
+    ('automatic_captions', sa.JSON()),
+    ('age_limit', sa.Integer()),
+    ('availability', sa.String(length=50)),
+    ('live_status', sa.String(length=50)),
+    ('was_live', sa.Boolean()),
+    ('playable_in_embed', sa.Boolean()),
+    ('thumbnails', sa.JSON()),
+    ('playlist', sa.String(length=255)),
+    ('playlist_id', sa.String(length=255)),
+    ('playlist_title', sa.String(length=500)),
+    ('playlist_index', sa.Integer()),
+    ('playlist_count', sa.Integer()),
+    ('average_rating', sa.Float()),
+    ('abr', sa.Float()),
+    ('vbr', sa.Float()),
+    ('tbr', sa.Float()),
+    ('chapters', sa.JSON()),
+]
+
+CHANNEL_COLUMNS = {'channel_follower_count': 'follower_count', 'subscriber_count': 'subscriber_count'}
+
+
+def _metadata_names():
+    return [name for name, _ in METADATA_COLUMNS]
+
+
+def _metadata_columns():
+    return [sa.Column(name, type_, nullable=True) for name, type_ in METADATA_COLUMNS]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('channels',
+    sa.Column('channel_id', sa.String(length=255), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('follower_count', sa.Integer(), nullable=True),
+    sa.Column('subscriber_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('channel_id')
+    )
+    op.create_table('video_metadata',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    *_metadata_columns(),
+    sa.ForeignKeyConstraint(['id'], ['videos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Set-based copies, so large tables move without loading rows into Python
+    op.execute(
+        "INSERT INTO channels (channel_id, name, follower_count, subscriber_count, created_at) "
+        "SELECT channel_id, MAX(channel), MAX(channel_follower_count), MAX(subscriber_count), MIN(created_at) "
+        "FROM videos WHERE channel_id IS NOT NULL GROUP BY channel_id"
+    )
+    columns = ", ".join(_metadata_names())
+    op.execute(f"INSERT INTO video_metadata (id, {columns}) SELECT id, {columns} FROM videos")
+
+    with op.batch_alter_table('videos') as batch_op:
+        for name in _metadata_names() + list(CHANNEL_COLUMNS):
+            batch_op.drop_column(name)
+        batch_op.create_index('ix_videos_channel_id', ['channel_id'], unique=False)
+        batch_op.create_foreign_key('fk_videos_channel_id_channels', 'channels', ['channel_id'], ['channel_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('videos') as batch_op:
+        batch_op.drop_constraint('fk_videos_channel_id_channels', type_='foreignkey')
+        batch_op.drop_index('ix_videos_channel_id')
+        for column in _metadata_columns():
+            batch_op.add_column(column)
+        batch_op.add_column(sa.Column('subscriber_count', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('channel_follower_count', sa.Integer(), nullable=True))
+
+    assignments = ", ".join(
+        f"{name} = (SELECT m.{name} FROM video_metadata m WHERE m.id = videos.id)" for name in _metadata_names()
+    )
+    op.execute(f"UPDATE videos SET {assignments}")
+    channel_assignments = ", ".join(
+        f"{video_column} = (SELECT c.{channel_column} FROM channels c WHERE c.channel_id = videos.channel_id)"
+        for video_column, channel_column in CHANNEL_COLUMNS.items()
+    )
+    op.execute(f"UPDATE videos SET {channel_assignments}")
+
+    op.drop_table('video_metadata')
+    op.drop_table('channels')
@@ -0,0 +1,54 @@
+"""Add channel rollups
+
+Revision ID: a6f3e0b8d254
+Revises: 9d27b5c4e8a1
+Create Date: 2026-10-20 10:37:26.048512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f3e0b8d254'
+down_revision: Union[str, Sequence[str], None] = '9d27b5c4e8a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('channels', sa.Column('video_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('channels', sa.Column('total_duration', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('channels', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('channels', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('channels', sa.Column('latest_upload_date', sa.String(length=50), nullable=True))
+    op.create_index(op.f('ix_channels_video_count'), 'channels', ['video_count'], unique=False)
+    op.create_index(op.f('ix_channels_latest_upload_date'), 'channels', ['latest_upload_date'], unique=False)
+    op.drop_index('ix_videos_channel_id', table_name='videos')
+    op.create_index('ix_videos_channel_id_upload_date', 'videos', ['channel_id', 'upload_date'], unique=False)
+
+    # Backfill the rollups once; they are maintained incrementally afterwards
+    op.execute(
+        "UPDATE channels SET "
+        "video_count = (SELECT COUNT(*) FROM videos v WHERE v.channel_id = channels.channel_id), "
+        "total_duration = (SELECT COALESCE(SUM(v.duration), 0) FROM videos v WHERE v.channel_id = channels.channel_id), "
+        "rating_sum = (SELECT COALESCE(SUM(v.rating), 0) FROM videos v WHERE v.channel_id = channels.channel_id), "
+        "rating_count = (SELECT COUNT(v.rating) FROM videos v WHERE v.channel_id = channels.channel_id), "
+        "latest_upload_date = (SELECT MAX(v.upload_date) FROM videos v WHERE v.channel_id = channels.channel_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_videos_channel_id_upload_date', table_name='videos')
+    op.create_index('ix_videos_channel_id', 'videos', ['channel_id'], unique=False)
+    op.drop_index(op.f('ix_channels_latest_upload_date'), table_name='channels')
+    op.drop_index(op.f('ix_channels_video_count'), table_name='channels')
+    op.drop_column('channels', 'latest_upload_date')
+    op.drop_column('channels', 'rating_count')
+    op.drop_column('channels', 'rating_sum')
+    op.drop_column('channels', 'total_duration')
+    op.drop_column('channels', 'video_count')
@@ -0,0 +1,62 @@
+"""Add video_ratings and rating aggregates
+
+Revision ID: b2e8d4f61c97
+Revises: a6f3e0b8d254
+Create Date: 2026-10-20 12:05:51.390846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e8d4f61c97'
+down_revision: Union[str, Sequence[str], None] = 'a6f3e0b8d254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('video_ratings',
+    sa.Column('video_id', sa.String(length=36), nullable=False),
+    sa.Column('rater_id', sa.String(length=255), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('video_id', 'rater_id')
+    )
+    op.add_column('videos', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('videos', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('videos', sa.Column('rating_bayes', sa.Float(), nullable=True))
+    op.create_index('ix_videos_rating_bayes_id', 'videos', ['rating_bayes', 'id'], unique=False)
+    op.create_index('ix_videos_view_count_id', 'videos', ['view_count', 'id'], unique=False)
+    op.create_index('ix_videos_created_at_id', 'videos', ['created_at', 'id'], unique=False)
+
+    # Existing single ratings become one anonymous vote each
+    op.execute(
+        "INSERT INTO video_ratings (video_id, rater_id, rating, created_at) "
+        "SELECT id, 'anonymous', rating, COALESCE(updated_at, created_at) FROM videos WHERE rating IS NOT NULL"
+    )
+    op.execute(
+        sa.text(
+            "UPDATE videos SET rating_sum = rating, rating_count = 1, "
+            "rating_bayes = (:weight * :mean + rating) / (:weight + 1) WHERE rating IS NOT NULL"
+        ).bindparams(weight=settings.rating_prior_weight, mean=settings.rating_prior_mean)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_videos_created_at_id', table_name='videos')
+    op.drop_index('ix_videos_view_count_id', table_name='videos')
+    op.drop_index('ix_videos_rating_bayes_id', table_name='videos')
+    op.drop_column('videos', 'rating_bayes')
+    op.drop_column('videos', 'rating_count')
+    op.drop_column('videos', 'rating_sum')
+    op.drop_table('video_ratings')
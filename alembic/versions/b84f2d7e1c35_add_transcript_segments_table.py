@@ -0,0 +1,43 @@
+"""Add transcript_segments table
+
+Revision ID: b84f2d7e1c35
+Revises: 7c1e4a9b2d60
+Create Date: 2026-10-19 11:40:07.581302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84f2d7e1c35'
+down_revision: Union[str, Sequence[str], None] = '7c1e4a9b2d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transcript_segments',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('video_id', sa.String(length=36), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.Float(), nullable=False),
+    sa.Column('end_time', sa.Float(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transcript_segments_video_position', 'transcript_segments', ['video_id', 'position'], unique=True)
+    op.create_index('ix_transcript_segments_video_start', 'transcript_segments', ['video_id', 'start_time'], unique=False)
+    op.create_index('ix_transcript_segments_video_end', 'transcript_segments', ['video_id', 'end_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transcript_segments_video_end', table_name='transcript_segments')
+    op.drop_index('ix_transcript_segments_video_start', table_name='transcript_segments')
+    op.drop_index('ix_transcript_segments_video_position', table_name='transcript_segments')
+    op.drop_table('transcript_segments')
@@ -0,0 +1,41 @@
+"""Add insight cache and transcript hash
+
+Revision ID: c3c570613634
+Revises: 0b3d6e2f9a71
+Create Date: 2026-10-19 18:12:07.505401
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3c570613634'
+down_revision: Union[str, Sequence[str], None] = '0b3d6e2f9a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('insight_cache',
+    sa.Column('transcript_hash', sa.String(length=64), nullable=False),
+    sa.Column('prompt_version', sa.String(length=50), nullable=False),
+    sa.Column('insights', sa.JSON(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('transcript_hash', 'prompt_version')
+    )
+    op.create_index(op.f('ix_insight_cache_last_used_at'), 'insight_cache', ['last_used_at'], unique=False)
+    op.add_column('videos', sa.Column('transcript_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('videos', 'transcript_hash')
+    op.drop_index(op.f('ix_insight_cache_last_used_at'), table_name='insight_cache')
+    op.drop_table('insight_cache')
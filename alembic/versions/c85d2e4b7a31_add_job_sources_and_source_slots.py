@@ -0,0 +1,53 @@
+"""Add job sources and source slots
+
+Revision ID: c85d2e4b7a31
+Revises: e7a3c1f05b92
+Create Date: 2026-10-21 15:02:47.318560
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c85d2e4b7a31'
+down_revision: Union[str, Sequence[str], None] = 'e7a3c1f05b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('source_slots',
+    sa.Column('source', sa.String(length=100), nullable=False),
+    sa.Column('in_flight', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('source')
+    )
+    op.add_column('jobs', sa.Column('source', sa.String(length=100), nullable=True))
+    op.add_column('jobs_archive', sa.Column('source', sa.String(length=100), nullable=True))
+    op.add_column('parked_submissions', sa.Column('source', sa.String(length=100), nullable=True))
+
+    # Unfinished jobs of YouTube videos, by far the most common source; other jobs stay unlimited
+    op.execute(
+        "UPDATE jobs SET source = 'youtube' "
+        "WHERE job_type = 'process' AND status IN ('pending', 'processing') AND video_id IN ("
+        "SELECT id FROM videos WHERE url LIKE '%youtube.com/%' OR url LIKE '%youtu.be/%')"
+    )
+    op.execute(
+        "UPDATE parked_submissions SET source = 'youtube' WHERE video_id IN ("
+        "SELECT id FROM videos WHERE url LIKE '%youtube.com/%' OR url LIKE '%youtu.be/%')"
+    )
+    op.execute(
+        "INSERT INTO source_slots (source, in_flight) "
+        "SELECT source, COUNT(*) FROM jobs WHERE status = 'processing' AND source IS NOT NULL GROUP BY source"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('parked_submissions', 'source')
+    op.drop_column('jobs_archive', 'source')
+    op.drop_column('jobs', 'source')
+    op.drop_table('source_slots')
@@ -0,0 +1,55 @@
+"""Add queue counters, parked submissions and job tenants
+
+Revision ID: d41f7a2c9e58
+Revises: b2e8d4f61c97
+Create Date: 2026-10-20 15:42:07.218534
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f7a2c9e58'
+down_revision: Union[str, Sequence[str], None] = 'b2e8d4f61c97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('queue_counters',
+    sa.Column('scope', sa.String(length=300), nullable=False),
+    sa.Column('pending', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+    op.create_table('parked_submissions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('video_id', sa.String(length=36), nullable=False),
+    sa.Column('tenant_id', sa.String(length=255), nullable=True),
+    sa.Column('priority', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('video_id')
+    )
+    op.create_index(op.f('ix_parked_submissions_created_at'), 'parked_submissions', ['created_at'], unique=False)
+    op.add_column('jobs', sa.Column('tenant_id', sa.String(length=255), nullable=True))
+    op.add_column('jobs_archive', sa.Column('tenant_id', sa.String(length=255), nullable=True))
+
+    # Existing jobs have no tenant, so only the global counter starts non-zero
+    op.execute(
+        "INSERT INTO queue_counters (scope, pending) "
+        "SELECT 'global', COUNT(*) FROM jobs WHERE status = 'pending' AND job_type = 'process'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs_archive', 'tenant_id')
+    op.drop_column('jobs', 'tenant_id')
+    op.drop_index(op.f('ix_parked_submissions_created_at'), table_name='parked_submissions')
+    op.drop_table('parked_submissions')
+    op.drop_table('queue_counters')
@@ -0,0 +1,28 @@
+"""Add jobs video_id/status index
+
+Revision ID: e6c08b5a9f14
+Revises: d19a6f03b7e2
+Create Date: 2026-10-19 14:22:18.907631
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c08b5a9f14'
+down_revision: Union[str, Sequence[str], None] = 'd19a6f03b7e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_jobs_video_id_status', 'jobs', ['video_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_video_id_status', table_name='jobs')
@@ -0,0 +1,42 @@
+"""Add job run_after and attempts
+
+Revision ID: e7a3c1f05b92
+Revises: d41f7a2c9e58
+Create Date: 2026-10-21 09:26:13.804117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c1f05b92'
+down_revision: Union[str, Sequence[str], None] = 'd41f7a2c9e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('run_after', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_jobs_status_run_after', 'jobs', ['status', 'run_after'], unique=False)
+    op.add_column('jobs_archive', sa.Column('run_after', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('jobs_archive', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('parked_submissions', sa.Column('run_after', sa.DateTime(timezone=True), nullable=True))
+
+    # Existing jobs are due right away; claimed ones have run once
+    op.execute("UPDATE jobs SET run_after = COALESCE(created_at, CURRENT_TIMESTAMP)")
+    op.execute("UPDATE jobs SET attempts = 1 WHERE status != 'pending'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('parked_submissions', 'run_after')
+    op.drop_column('jobs_archive', 'attempts')
+    op.drop_column('jobs_archive', 'run_after')
+    op.drop_index('ix_jobs_status_run_after', table_name='jobs')
+    op.drop_column('jobs', 'attempts')
+    op.drop_column('jobs', 'run_after')
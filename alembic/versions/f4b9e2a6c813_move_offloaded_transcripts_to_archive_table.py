@@ -0,0 +1,105 @@
+"""Move offloaded transcripts from file storage to the transcript_archive table
+
+Revision ID: f4b9e2a6c813
+Revises: c85d2e4b7a31
+Create Date: 2026-10-22 10:41:06.583114
+
+"""
+from typing import Sequence, Union
+import gzip
+import json
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b9e2a6c813'
+down_revision: Union[str, Sequence[str], None] = 'c85d2e4b7a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic")
+
+videos = sa.table('videos',
+    sa.column('id', sa.String),
+    sa.column('transcript', sa.Text),
+    sa.column('transcript_path', sa.String),
+    sa.column('transcript_offloaded', sa.Boolean),
+)
+transcript_archive = sa.table('transcript_archive',
+    sa.column('video_id', sa.String),
+    sa.column('transcript', sa.LargeBinary),
+    sa.column('segments', sa.LargeBinary),
+)
+transcript_segments = sa.table('transcript_segments',
+    sa.column('video_id', sa.String),
+    sa.column('position', sa.Integer),
+    sa.column('start_time', sa.Float),
+    sa.column('end_time', sa.Float),
+    sa.column('text', sa.Text),
+)
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transcript_archive',
+    sa.Column('video_id', sa.String(length=36), nullable=False),
+    sa.Column('transcript', sa.LargeBinary(), nullable=False),
+    sa.Column('segments', sa.LargeBinary(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['video_id'], ['videos.id'], ),
+    sa.PrimaryKeyConstraint('video_id')
+    )
+    op.add_column('videos', sa.Column('transcript_offloaded', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    # Files are already gzip, so they are copied as-is; ones lost with an old container cannot be recovered
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(videos.c.id, videos.c.transcript_path).where(videos.c.transcript_path.is_not(None))
+    ).all()
+    for video_id, path in rows:
+        transcript = _read(path)
+        if transcript is None:
+            logger.warning("Offloaded transcript of video %s is missing at %s", video_id, path)
+            continue
+        segments = _read(path[:-len('.txt.gz')] + '.segments.json.gz')
+        bind.execute(transcript_archive.insert().values(video_id=video_id, transcript=transcript, segments=segments))
+        bind.execute(videos.update().where(videos.c.id == video_id).values(transcript_offloaded=True))
+
+    with op.batch_alter_table('videos') as batch_op:
+        batch_op.drop_column('transcript_path')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('videos', sa.Column('transcript_path', sa.String(length=1024), nullable=True))
+
+    # There is no file storage to go back to, so archived transcripts return to their rows
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(transcript_archive.c.video_id, transcript_archive.c.transcript, transcript_archive.c.segments)
+    ).all()
+    for video_id, transcript, segments in rows:
+        bind.execute(
+            videos.update().where(videos.c.id == video_id).values(transcript=gzip.decompress(transcript).decode('utf-8'))
+        )
+        if segments is not None:
+            bind.execute(transcript_segments.insert(), [
+                {'video_id': video_id, 'position': segment['index'], 'start_time': segment['start'],
+                 'end_time': segment['end'], 'text': segment['text']}
+                for segment in json.loads(gzip.decompress(segments))
+            ])
+
+    with op.batch_alter_table('videos') as batch_op:
+        batch_op.drop_column('transcript_offloaded')
+    op.drop_table('transcript_archive')
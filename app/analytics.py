@@ -0,0 +1,50 @@
+"""Processing-time statistics derived from job stage histories"""
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+# Upper bounds in seconds of video duration buckets
+DURATION_BUCKETS = ((300, "<5m"), (1200, "5-20m"), (3600, "20-60m"), (None, "60m+"))
+
+
+def duration_bucket(duration: Optional[float]) -> str:
+    """Label of the duration bucket a video falls into"""
+    if duration is None:
+        return "unknown"
+    for upper, label in DURATION_BUCKETS:
+        if upper is None or duration < upper:
+            return label
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+def summarize(values: Iterable[float]) -> dict:
+    """Count, mean, p50 and p95 of durations in seconds"""
+    values = sorted(values)
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p95": None}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 0.5), 3),
+        "p95": round(percentile(values, 0.95), 3),
+    }
+
+
+def stage_durations(created_at, started_at, completed_at, stage_history) -> Dict[str, float]:
+    """Seconds spent queued, in each reported stage and in total for one job"""
+    durations = defaultdict(float)
+    if created_at and started_at:
+        durations["queued"] = max(0.0, (started_at - created_at).total_seconds())
+    if started_at and completed_at:
+        durations["total"] = max(0.0, (completed_at - started_at).total_seconds())
+    for stage, started, ended in stage_history or []:
+        if ended is not None:
+            durations[stage] += max(0.0, ended - started)
+    return dict(durations)
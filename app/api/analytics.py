@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Literal
+
+from ..database import get_read_db
+from ..models import Video, Job
+from ..analytics import duration_bucket, stage_durations, summarize
+
+router = APIRouter()
+
+MAX_ANALYTICS_JOBS = 20000
+
+@router.get("/stages")
+async def get_stage_analytics(
+    group_by: Literal["duration", "extractor", "worker"] = "duration",
+    days: int = Query(7, ge=1, le=365, description="Look at jobs completed in the last N days"),
+    job_type: str = Query("process", description="process or insights"),
+    limit: int = Query(5000, ge=1, le=MAX_ANALYTICS_JOBS, description="Most recent jobs to include"),
+    db: Session = Depends(get_read_db)
+):
+    """Aggregate queue and per-stage processing times of recently completed jobs"""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = db.query(
+        Job.created_at,
+        Job.started_at,
+        Job.completed_at,
+        Job.stage_history,
+        Job.worker_id,
+        Video.duration,
+        Video.extractor,
+    ).join(Video, Video.id == Job.video_id).filter(
+        Job.status == "completed",
+        Job.job_type == job_type,
+        Job.completed_at >= since
+    ).order_by(desc(Job.completed_at)).limit(limit).all()
+
+    groups = defaultdict(lambda: defaultdict(list))
+    for row in rows:
+        if group_by == "duration":
+            group = duration_bucket(row.duration)
+        elif group_by == "extractor":
+            group = row.extractor or "unknown"
+        else:
+            group = row.worker_id or "unknown"
+
+        for stage, seconds in stage_durations(row.created_at, row.started_at, row.completed_at, row.stage_history).items():
+            groups[group][stage].append(seconds)
+
+    result = []
+    for group, stages in sorted(groups.items()):
+        summaries = {stage: summarize(values) for stage, values in stages.items()}
+        worked = {stage: s for stage, s in summaries.items() if stage not in ("queued", "total")}
+        result.append({
+            "group": group,
+            "jobs": max(s["count"] for s in summaries.values()),
+            "stages": summaries,
+            # Stage with the largest share of processing time in this group
+            "bottleneck": max(worked, key=lambda stage: worked[stage]["mean"] * worked[stage]["count"]) if worked else None,
+        })
+
+    return {
+        "group_by": group_by,
+        "since": since.isoformat(),
+        "jobs": len(rows),
+        "groups": result
+    }
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+import time
+
+from ..database import get_db
+from ..models import ChangeLogEntry
+from ..schemas import ChangeFeedResponse
+from ..changes import change_notifier
+from ..config import settings
+
+router = APIRouter()
+
+@router.get("", response_model=ChangeFeedResponse)
+async def get_changes(
+    after: int = Query(0, ge=0, description="Return changes with seq greater than this"),
+    limit: int = Query(100, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=30, description="Seconds to long-poll when no changes are available"),
+    db: Session = Depends(get_db)
+):
+    """Get video and job changes after a sequence number"""
+    deadline = time.monotonic() + wait
+    
+    while True:
+        entries = db.query(ChangeLogEntry).filter(
+            ChangeLogEntry.seq > after
+        ).order_by(ChangeLogEntry.seq).limit(limit).all()
+        
+        remaining = deadline - time.monotonic()
+        if entries or remaining <= 0:
+            break
+        
+        # Release the connection while waiting; other processes' commits are picked up by polling
+        db.rollback()
+        await change_notifier.wait(min(remaining, settings.change_feed_poll_seconds))
+    
+    return {
+        "changes": [entry.to_dict() for entry in entries],
+        "next_after": entries[-1].seq if entries else after
+    }
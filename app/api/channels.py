@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import desc
+from typing import List, Literal
+
+from ..database import get_read_db
+from ..models import Video, Channel
+from ..schemas import ChannelResponse, VideoResponse
+
+router = APIRouter()
+
+MAX_CHANNELS_PER_PAGE = 200
+
+CHANNEL_ORDERINGS = {
+    "videos": (desc(Channel.video_count), Channel.channel_id),
+    "latest": (desc(Channel.latest_upload_date), Channel.channel_id),
+    "name": (Channel.name, Channel.channel_id),
+}
+
+@router.get("", response_model=List[ChannelResponse])
+async def get_channels(
+    sort: Literal["videos", "latest", "name"] = "videos",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_CHANNELS_PER_PAGE),
+    db: Session = Depends(get_read_db)
+):
+    """List channels with their rollup statistics"""
+    channels = db.query(Channel).filter(
+        Channel.video_count > 0
+    ).order_by(*CHANNEL_ORDERINGS[sort]).offset(offset).limit(limit).all()
+    return [ChannelResponse.model_validate(channel.to_dict()) for channel in channels]
+
+@router.get("/{channel_id}", response_model=ChannelResponse)
+async def get_channel(channel_id: str, db: Session = Depends(get_read_db)):
+    """Get statistics of one channel"""
+    channel = db.get(Channel, channel_id)
+    if not channel:
+        raise HTTPException(status_code=404, detail="Channel not found")
+    return ChannelResponse.model_validate(channel.to_dict())
+
+@router.get("/{channel_id}/videos", response_model=List[VideoResponse])
+async def get_channel_videos(
+    channel_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_CHANNELS_PER_PAGE),
+    db: Session = Depends(get_read_db)
+):
+    """List a channel's videos, newest upload first, without extended metadata"""
+    if not db.get(Channel, channel_id):
+        raise HTTPException(status_code=404, detail="Channel not found")
+    
+    videos = db.query(Video).filter(
+        Video.channel_id == channel_id
+    ).order_by(desc(Video.upload_date), desc(Video.created_at)).offset(offset).limit(limit).all()
+    return [VideoResponse.model_validate(video.to_dict(include_metadata=False)) for video in videos]
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Literal
+
+from ..config import settings
+from ..profiling import profiler
+from .worker import verify_worker_token
+
+router = APIRouter()
+
+def _require_profiling():
+    if not settings.db_profiling_enabled:
+        raise HTTPException(status_code=404, detail="Query profiling disabled")
+
+@router.get("/queries")
+async def get_query_profile(
+    limit: int = Query(20, ge=1, le=500),
+    sort: Literal["total", "count", "p95", "max"] = "total",
+    worker_verified: bool = Depends(verify_worker_token)
+):
+    """Top SQL statements of this process and suspected N+1 patterns per route"""
+    _require_profiling()
+    return profiler.snapshot(limit, sort)
+
+@router.delete("/queries")
+async def reset_query_profile(worker_verified: bool = Depends(verify_worker_token)):
+    """Start collecting query statistics afresh"""
+    _require_profiling()
+    profiler.reset()
+    return {"success": True}
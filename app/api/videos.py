@@ -1,83 +1,422 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
-from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, defer, selectinload
+from sqlalchemy import desc, select, and_, or_, func, tuple_
+from sqlalchemy.exc import IntegrityError
+from typing import List, Literal, Optional
+from datetime import datetime, timedelta, timezone
+import base64
+import json
 
-from ..database import get_db
-from ..models import Video, Job
-from ..schemas import VideoResponse, VideoCreateRequest, VideoRatingRequest
+from ..database import get_db, get_read_db, read_only_request
+from ..config import settings
+from .. import insight_cache
+from ..eta import eta_model
+from ..channels import adjust_channel_ratings
+from .. import ratings
+from .. import backpressure
+from .. import sources
+from ..export import iter_export
+from ..transcript_store import load_segments
+from ..models import Video, VideoMetadata, Job, TranscriptSegment
+from ..schemas import (
+    VideoResponse,
+    VideoCreateRequest,
+    VideoRatingRequest,
+    TranscriptSegmentsResponse,
+    TopVideosResponse,
+    BulkStatusRequest,
+    BulkStatusResponse,
+)
 
 router = APIRouter()
 
+MAX_SEGMENTS_PER_PAGE = 1000
+
+MAX_TOP_PER_PAGE = 100
+
+# Sort column of each top feed; ties are broken by id, matching the (column, id) indexes
+TOP_FEED_COLUMNS = {
+    "rating": Video.rating_bayes,
+    "views": Video.view_count,
+    "recent": Video.created_at,
+}
+
+ACTIVE_JOB_STATUSES = ("pending", "processing")
+
+def _as_utc(dt: datetime) -> datetime:
+    """Treat naive datetimes as UTC and convert aware ones to UTC"""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def _segments_in_range(db: Session, video_id: str, start: float, end: Optional[float], limit: int):
+    """Fetch segments overlapping [start, end) with indexed lookups on both bounds"""
+    # Results store segments with non-decreasing starts and ends, so the range maps to a contiguous span of positions
+    first = select(TranscriptSegment.position).where(
+        TranscriptSegment.video_id == video_id,
+        TranscriptSegment.end_time > start,
+    ).order_by(TranscriptSegment.end_time, TranscriptSegment.position).limit(1).scalar_subquery()
+
+    query = db.query(TranscriptSegment).filter(
+        TranscriptSegment.video_id == video_id,
+        TranscriptSegment.position >= first,
+    )
+
+    if end is not None:
+        last = select(TranscriptSegment.position).where(
+            TranscriptSegment.video_id == video_id,
+            TranscriptSegment.start_time < end,
+        ).order_by(desc(TranscriptSegment.start_time), desc(TranscriptSegment.position)).limit(1).scalar_subquery()
+        query = query.filter(TranscriptSegment.position <= last)
+
+    return query.order_by(TranscriptSegment.position).limit(limit).all()
+
+def _offloaded_segments_in_range(segments: List[dict], start: float, end: Optional[float], limit: int) -> List[dict]:
+    """Segments overlapping [start, end) out of those offloaded with a transcript"""
+    return [
+        segment for segment in segments
+        if segment["end"] > start and (end is None or segment["start"] < end)
+    ][:limit]
+
+def _active_insights_job(db: Session, video_id: str) -> Optional[Job]:
+    """Queued insights job of a video, else the running one"""
+    return db.query(Job).filter(
+        Job.video_id == video_id,
+        Job.job_type == "insights",
+        Job.status.in_(ACTIVE_JOB_STATUSES)
+    ).order_by(Job.status).first()  # "pending" sorts before "processing"
+
+def _cached_insights(db: Session, video: Video) -> Optional[dict]:
+    """Look up insights for the video's transcript in the insight cache"""
+    if video.transcript_hash is None:
+        transcript = video.load_transcript()
+        if transcript is None:
+            return None
+        video.transcript_hash = insight_cache.transcript_hash(transcript)
+    return insight_cache.lookup(db, video.transcript_hash)
+
+def _enqueue_insights_job(db: Session, video: Video, use_cache: bool = True):
+    """Queue an insights job, attaching to an active one instead of duplicating it.
+
+    Returns (job, coalesced). The partial unique indexes on jobs make concurrent
+    requests from other processes fail the insert and attach here as well.
+    On an insight cache hit the job is created already completed.
+    """
+    video_id = video.id
+    existing = _active_insights_job(db, video_id)
+    if existing:
+        return existing, True
+    
+    now = datetime.now(timezone.utc)
+    cached = _cached_insights(db, video) if use_cache and settings.insight_cache_enabled else None
+    if cached is not None:
+        video.insights = cached
+        video.updated_at = now
+        job = Job(
+            video_id=video_id,
+            job_type="insights",
+            status="completed",
+            created_at=now,
+            started_at=now,
+            completed_at=now
+        )
+    else:
+        job = Job(
+            video_id=video_id,
+            job_type="insights",
+            status="pending",
+            created_at=now
+        )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = _active_insights_job(db, video_id)
+        if existing is None:
+            raise
+        return existing, True
+    
+    db.refresh(job)
+    return job, False
+
+def _encode_cursor(value, video_id: str) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, video_id]).encode()).decode()
+
+def _decode_cursor(cursor: str, by: str):
+    try:
+        value, video_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if by == "recent":
+            value = datetime.fromisoformat(value)
+        return value, str(video_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _insights_job_response(video_id: str, job: Job, coalesced: bool, message: str) -> dict:
+    return {
+        "message": message,
+        "video_id": video_id,
+        "job_id": job.id,
+        "coalesced": coalesced,
+        "cached": job.status == "completed"
+    }
+
 @router.get("/", response_model=List[VideoResponse])
-async def get_videos(db: Session = Depends(get_db)):
-    """Get all videos sorted by creation date"""
-    videos = db.query(Video).order_by(desc(Video.created_at)).all()
-    return [VideoResponse.model_validate(video.to_dict()) for video in videos]
+async def get_videos(
+    include_metadata: bool = Query(True, description="Load the extended yt-dlp metadata of every video"),
+    db: Session = Depends(get_read_db)
+):
+    """Get all videos sorted by creation date, without transcripts (fetch a single video for its transcript)"""
+    query = db.query(Video).options(defer(Video.transcript)).order_by(desc(Video.created_at))
+    if include_metadata:
+        # Two batched queries instead of one lazy load per video
+        query = query.options(selectinload(Video.details), selectinload(Video.channel_ref))
+    return [
+        VideoResponse.model_validate(video.to_dict(include_metadata, include_transcript=False)) for video in query.all()
+    ]
+
+@router.get("/top", response_model=TopVideosResponse)
+async def get_top_videos(
+    by: Literal["rating", "views", "recent"] = "rating",
+    limit: int = Query(20, ge=1, le=MAX_TOP_PER_PAGE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_read_db)
+):
+    """Top-rated, most viewed or most recent videos with keyset pagination"""
+    column = TOP_FEED_COLUMNS[by]
+    # Walks the (column, id) index backwards; no offset scan however deep the page
+    query = db.query(Video).options(defer(Video.transcript)).filter(column.is_not(None))
+    if cursor:
+        value, video_id = _decode_cursor(cursor, by)
+        query = query.filter(tuple_(column, Video.id) < tuple_(value, video_id))
+    videos = query.order_by(desc(column), desc(Video.id)).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(videos) > limit:
+        videos = videos[:limit]
+        last = videos[-1]
+        next_cursor = _encode_cursor(getattr(last, column.key), last.id)
+    
+    return {
+        "videos": [video.to_dict(include_metadata=False, include_transcript=False) for video in videos],
+        "next_cursor": next_cursor
+    }
+
+@router.get("/export")
+async def export_videos(
+    export_format: Literal["jsonl", "srt", "vtt", "txt"] = Query("jsonl", alias="format"),
+    status: Optional[str] = Query("completed", description="Video status to export, empty for all"),
+    channel_id: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="Videos created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Videos created before this time"),
+    db: Session = Depends(get_read_db)
+):
+    """Stream transcripts of the selected videos as JSONL or a zip of SRT/VTT/TXT files"""
+    chunks = iter_export(db, export_format, status=status or None, channel_id=channel_id, since=since, until=until)
+
+    def stream():
+        # The response outlives the endpoint, so the generator owns the session from here
+        try:
+            yield from chunks
+        finally:
+            db.close()
+
+    if export_format == "jsonl":
+        return StreamingResponse(stream(), media_type="application/x-ndjson",
+                                 headers={"Content-Disposition": 'attachment; filename="transcripts.jsonl"'})
+    return StreamingResponse(stream(), media_type="application/zip",
+                             headers={"Content-Disposition": f'attachment; filename="transcripts-{export_format}.zip"'})
 
 @router.get("/{video_id}", response_model=VideoResponse)
-async def get_video(video_id: str, db: Session = Depends(get_db)):
+async def get_video(video_id: str, db: Session = Depends(get_read_db)):
     """Get specific video by ID"""
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = db.query(Video).options(
+        selectinload(Video.details), selectinload(Video.channel_ref)
+    ).filter(Video.id == video_id).first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     return VideoResponse.model_validate(video.to_dict())
 
 @router.post("/", response_model=VideoResponse)
-async def create_video(request: VideoCreateRequest, db: Session = Depends(get_db)):
+async def create_video(
+    request: VideoCreateRequest,
+    http_request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Create a new video and add to processing queue"""
-    # Create video record
+    tenant = backpressure.tenant_id(http_request.headers, http_request.client)
+    parked = settings.queue_park_enabled and request.priority == "low"
+    
+    if not parked:
+        rejection = backpressure.admit(db, tenant)
+        if rejection is not None:
+            if not settings.queue_park_enabled:
+                db.rollback()
+                return backpressure.queue_full_response(rejection)
+            parked = True
+    
+    now = datetime.now(timezone.utc)
+    run_after = _as_utc(request.run_after) if request.run_after else None
+    source = sources.source_for(request.url)
     video = Video(
         url=request.url,
         status="pending",
-        created_at=datetime.now(timezone.utc)
+        created_at=now
     )
-    
     db.add(video)
-    db.commit()
-    db.refresh(video)
+    db.flush()
     
-    # Create job for worker
-    job = Job(
-        video_id=video.id,
-        status="pending",
-        created_at=datetime.now(timezone.utc)
-    )
+    if parked:
+        # Accepted, but kept out of the jobs table until the queue drains
+        backpressure.park(db, video, tenant, request.priority, run_after, source)
+        response.status_code = 202
+    else:
+        db.add(Job(
+            video_id=video.id,
+            status="pending",
+            tenant_id=tenant,
+            source=source,
+            created_at=now,
+            run_after=run_after or now
+        ))
     
-    db.add(job)
     db.commit()
+    db.refresh(video)
     
     return VideoResponse.model_validate(video.to_dict())
 
+@router.post("/status", response_model=BulkStatusResponse, dependencies=[Depends(read_only_request)])
+async def get_videos_status(request: BulkStatusRequest, db: Session = Depends(get_read_db)):
+    """Get status and job progress for many videos in one query"""
+    server_time = datetime.now(timezone.utc)
+    if not request.ids:
+        return {"videos": [], "server_time": server_time.isoformat()}
+    
+    query = db.query(
+        Video.id,
+        Video.status,
+        Video.processing_stage,
+        Video.error,
+        Video.created_at,
+        Video.updated_at,
+        Video.duration,
+        Job.status.label("job_status"),
+        Job.job_type,
+        Job.progress,
+        Job.started_at.label("job_started_at"),
+        Job.run_after.label("job_run_after"),
+    ).outerjoin(
+        Job,
+        and_(Job.video_id == Video.id, Job.status.in_(ACTIVE_JOB_STATUSES))
+    ).filter(Video.id.in_(set(request.ids)))
+    
+    if request.since is not None:
+        # updated_at is stamped before commit, so a row can become visible after a poll that
+        # started later than its timestamp; re-checking an overlap window keeps it from being skipped
+        since = _as_utc(request.since) - timedelta(seconds=settings.status_since_overlap_seconds)
+        query = query.filter(or_(
+            func.coalesce(Video.updated_at, Video.created_at) > since,
+            Job.updated_at > since
+        ))
+    
+    # Rows are ordered by job age, so the newest active job per video wins
+    rows = {}
+    for row in query.order_by(Job.created_at).all():
+        rows[row.id] = row
+    
+    # ETAs and queue positions come from the model's background snapshot, not from this request
+    videos = []
+    for row in rows.values():
+        changed_at = row.updated_at or row.created_at
+        eta = None
+        if row.job_status in ACTIVE_JOB_STATUSES:
+            eta = eta_model.estimate(
+                server_time,
+                row.job_status,
+                duration=row.duration,
+                started_at=_as_utc(row.job_started_at) if row.job_started_at else None,
+                queue_position=eta_model.queue_position(row.job_run_after) if row.job_status == "pending" else None,
+                run_after=_as_utc(row.job_run_after) if row.job_run_after else None,
+                job_type=row.job_type,
+            )
+        videos.append({
+            "id": row.id,
+            "status": row.status,
+            "processing_stage": row.processing_stage,
+            "error": row.error,
+            "updated_at": changed_at.isoformat() if changed_at else None,
+            "job_status": row.job_status,
+            "progress": row.progress,
+            "eta": eta,
+        })
+    
+    return {"videos": videos, "server_time": server_time.isoformat()}
+
 @router.post("/{video_id}/rating")
 async def set_video_rating(
     video_id: str, 
     request: VideoRatingRequest, 
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
-    """Set rating for a video"""
+    """Set the caller's rating for a video"""
     if not (1 <= request.rating <= 5):
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
     
-    video = db.query(Video).filter(Video.id == video_id).first()
+    rater_id = ratings.rater_id(http_request.headers, http_request.client)
+    if rater_id is None:
+        raise HTTPException(status_code=400, detail="Cannot identify the rater")
+    
+    # Lock the row so concurrent votes and results serialize on this video
+    video = db.query(Video).filter(Video.id == video_id).with_for_update().first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    video.rating = request.rating
+    sum_delta, count_delta = ratings.record_vote(db, video.id, rater_id, request.rating)
+    ratings.apply_vote(video, sum_delta, count_delta)
     video.updated_at = datetime.now(timezone.utc)
+    if video.channel_id:
+        adjust_channel_ratings(db, video.channel_id, sum_delta, count_delta)
     
     db.commit()
+    db.refresh(video)
     
-    return {"success": True, "rating": request.rating}
+    return {
+        "success": True,
+        "rating": request.rating,
+        "rater_id": rater_id,
+        "rating_count": video.rating_count,
+        "rating_average": round(video.rating_sum / video.rating_count, 3),
+        "rating_bayes": video.rating_bayes
+    }
 
 @router.get("/{video_id}/status")
-async def get_video_status(video_id: str, db: Session = Depends(get_db)):
+async def get_video_status(video_id: str, db: Session = Depends(get_read_db)):
     """Get video status (for compatibility with frontend polling)"""
     video = db.query(Video).filter(Video.id == video_id).first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
+    job = db.query(Job).filter(
+        Job.video_id == video.id,
+        Job.status.in_(ACTIVE_JOB_STATUSES)
+    ).order_by(desc(Job.created_at)).first()
+    eta = None
+    if job:
+        eta = eta_model.estimate(
+            datetime.now(timezone.utc),
+            job.status,
+            duration=video.duration,
+            started_at=_as_utc(job.started_at) if job.started_at else None,
+            queue_position=eta_model.queue_position(job.run_after) if job.status == "pending" else None,
+            run_after=_as_utc(job.run_after) if job.run_after else None,
+            job_type=job.job_type,
+        )
+    
     return {
         "status": video.status,
         "title": video.title,
@@ -85,9 +424,78 @@ async def get_video_status(video_id: str, db: Session = Depends(get_db)):
         "channel": video.channel,
         "view_count": video.view_count,
         "upload_date": video.upload_date,
-        "transcript": video.transcript,
+        "transcript": video.load_transcript(),
         "insights": video.insights,
-        "error": video.error
+        "error": video.error,
+        "eta": eta
+    }
+
+@router.get("/{video_id}/transcript/segments", response_model=TranscriptSegmentsResponse)
+async def get_transcript_segments(
+    video_id: str,
+    start: Optional[float] = Query(None, ge=0, description="Range start in seconds"),
+    end: Optional[float] = Query(None, ge=0, description="Range end in seconds"),
+    offset: int = Query(0, ge=0, description="First segment index"),
+    limit: int = Query(200, ge=1, le=MAX_SEGMENTS_PER_PAGE),
+    db: Session = Depends(get_read_db)
+):
+    """Get transcript segments by time range or by segment index"""
+    video = db.query(Video.id, Video.transcript_offloaded).filter(Video.id == video_id).first()
+    if not video:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    # Retention moves segments to the transcript archive together with the transcript
+    offloaded = load_segments(db, video_id) if video.transcript_offloaded else None
+    if offloaded is not None:
+        if start is not None or end is not None:
+            segments = _offloaded_segments_in_range(offloaded, start or 0, end, limit)
+        else:
+            segments = offloaded[offset:offset + limit]
+        return {"video_id": video_id, "segments": segments}
+    
+    if start is not None or end is not None:
+        segments = _segments_in_range(db, video_id, start or 0, end, limit)
+    else:
+        segments = db.query(TranscriptSegment).filter(
+            TranscriptSegment.video_id == video_id,
+            TranscriptSegment.position >= offset,
+            TranscriptSegment.position < offset + limit
+        ).order_by(TranscriptSegment.position).all()
+    
+    return {"video_id": video_id, "segments": [segment.to_dict() for segment in segments]}
+
+@router.get("/{video_id}/transcript/chapters/{chapter_index}", response_model=TranscriptSegmentsResponse)
+async def get_chapter_transcript(video_id: str, chapter_index: int, db: Session = Depends(get_read_db)):
+    """Get the transcript segments that fall within a chapter"""
+    row = db.query(Video.id, Video.transcript_offloaded, VideoMetadata.chapters).outerjoin(
+        VideoMetadata, VideoMetadata.id == Video.id
+    ).filter(Video.id == video_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Video not found")
+    
+    chapters = row.chapters or []
+    if not 0 <= chapter_index < len(chapters):
+        raise HTTPException(status_code=404, detail="Chapter not found")
+    
+    chapter = chapters[chapter_index]
+    offloaded = load_segments(db, video_id) if row.transcript_offloaded else None
+    if offloaded is not None:
+        segments = _offloaded_segments_in_range(
+            offloaded, chapter.get("start_time") or 0, chapter.get("end_time"), MAX_SEGMENTS_PER_PAGE
+        )
+    else:
+        segments = [segment.to_dict() for segment in _segments_in_range(
+            db,
+            video_id,
+            chapter.get("start_time") or 0,
+            chapter.get("end_time"),
+            MAX_SEGMENTS_PER_PAGE
+        )]
+    
+    return {
+        "video_id": video_id,
+        "chapter": chapter,
+        "segments": segments
     }
 
 @router.post("/{video_id}/insights")
@@ -97,53 +505,47 @@ async def generate_insights(video_id: str, db: Session = Depends(get_db)):
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
+    # Attach before validating: a claimed insights job marks the video as processing
+    active_job = _active_insights_job(db, video.id)
+    if active_job:
+        return _insights_job_response(video_id, active_job, True, "Insights generation already in progress")
+    
     if video.status != "completed":
         raise HTTPException(status_code=400, detail="Video must be completed first")
     
-    if not video.transcript:
+    if not video.transcript and not video.transcript_offloaded:
         raise HTTPException(status_code=400, detail="No transcript available")
     
-    # Check if there's already a pending insights job for this video
-    existing_job = db.query(Job).filter(
-        Job.video_id == video.id,
-        Job.status == "pending"
-    ).first()
+    job, coalesced = _enqueue_insights_job(db, video)
     
-    if existing_job:
-        raise HTTPException(
-            status_code=409, 
-            detail="Insights generation already in progress"
-        )
-    
-    # Create job for insights generation (allows regeneration)
-    job = Job(
-        video_id=video.id,
-        status="pending",
-        created_at=datetime.now(timezone.utc)
-    )
-    
-    db.add(job)
-    db.commit()
-    db.refresh(job)
-    
-    message = "Insights regeneration started" if video.insights else "Insights generation started"
-    return {
-        "message": message, 
-        "video_id": video_id,
-        "job_id": job.id
-    }
+    if coalesced:
+        message = "Insights generation already in progress"
+    elif job.status == "completed":
+        message = "Insights loaded from cache"
+    else:
+        message = "Insights regeneration started" if video.insights else "Insights generation started"
+    return _insights_job_response(video_id, job, coalesced, message)
 
 @router.post("/{video_id}/insights/regenerate")
-async def regenerate_insights(video_id: str, db: Session = Depends(get_db)):
+async def regenerate_insights(
+    video_id: str,
+    force: bool = Query(False, description="Bypass the insight cache"),
+    db: Session = Depends(get_db)
+):
     """Regenerate insights for a video that already has insights"""
     video = db.query(Video).filter(Video.id == video_id).first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
+    # Attach before validating: a claimed insights job marks the video as processing
+    active_job = _active_insights_job(db, video.id)
+    if active_job:
+        return _insights_job_response(video_id, active_job, True, "Insights regeneration already in progress")
+    
     if video.status != "completed":
         raise HTTPException(status_code=400, detail="Video must be completed first")
     
-    if not video.transcript:
+    if not video.transcript and not video.transcript_offloaded:
         raise HTTPException(status_code=400, detail="No transcript available")
     
     if not video.insights:
@@ -152,31 +554,12 @@ async def regenerate_insights(video_id: str, db: Session = Depends(get_db)):
             detail="No existing insights found. Use /insights endpoint for initial generation"
         )
     
-    # Check if there's already a pending insights job for this video
-    existing_job = db.query(Job).filter(
-        Job.video_id == video.id,
-        Job.status == "pending"
-    ).first()
-    
-    if existing_job:
-        raise HTTPException(
-            status_code=409, 
-            detail="Insights regeneration already in progress"
-        )
-    
-    # Create job for insights regeneration
-    job = Job(
-        video_id=video.id,
-        status="pending",
-        created_at=datetime.now(timezone.utc)
-    )
+    job, coalesced = _enqueue_insights_job(db, video, use_cache=not force)
     
-    db.add(job)
-    db.commit()
-    db.refresh(job)
-    
-    return {
-        "message": "Insights regeneration started", 
-        "video_id": video_id,
-        "job_id": job.id
-    }
\ No newline at end of file
+    if coalesced:
+        message = "Insights regeneration already in progress"
+    elif job.status == "completed":
+        message = "Insights loaded from cache"
+    else:
+        message = "Insights regeneration started"
+    return _insights_job_response(video_id, job, coalesced, message)
\ No newline at end of file
@@ -1,14 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session
+from sqlalchemy import insert, or_
 from typing import List, Optional
 from datetime import datetime, timezone
 
 from ..database import get_db
-from ..models import Video, Job
+from ..models import Video, Job, TranscriptSegment
 from ..schemas import JobResponse, WorkerJobRequest, WorkerJobResult, WorkerClaimRequest, WorkerJobProgress
 from ..config import settings
+from ..compression import DecompressingRoute
+from ..transcript_store import load_segments, delete_transcript
+from .. import idempotency, insight_cache, backpressure, retry, sources
+from ..channels import upsert_channel, rollup_state, apply_rollup_change
 
-router = APIRouter()
+# Workers may upload large results with Content-Encoding: gzip/br/zstd
+router = APIRouter(route_class=DecompressingRoute)
 
 def verify_worker_token(x_worker_token: str = Header(None)):
     """Verify worker authentication token"""
@@ -16,71 +22,202 @@ def verify_worker_token(x_worker_token: str = Header(None)):
         raise HTTPException(status_code=401, detail="Invalid worker token")
     return True
 
+def replace_transcript_segments(db: Session, video_id: str, segments):
+    """Replace all stored transcript segments of a video"""
+    db.query(TranscriptSegment).filter(TranscriptSegment.video_id == video_id).delete(synchronize_session=False)
+    rows = [
+        {
+            "video_id": video_id,
+            "position": position,
+            "start_time": segment.start,
+            "end_time": segment.end,
+            "text": segment.text,
+        }
+        for position, segment in enumerate(segments)
+    ]
+    if rows:
+        db.execute(insert(TranscriptSegment), rows)
+
+def restore_offloaded_segments(db: Session, video_id: str):
+    """Move segments offloaded with a transcript back into the table"""
+    segments = load_segments(db, video_id)
+    if segments:
+        db.execute(insert(TranscriptSegment), [
+            {"video_id": video_id, "position": segment["index"], "start_time": segment["start"],
+             "end_time": segment["end"], "text": segment["text"]}
+            for segment in segments
+        ])
+
 @router.get("/jobs", response_model=List[JobResponse])
 async def get_pending_jobs(
     limit: int = 10,
     worker_verified: bool = Depends(verify_worker_token),
     db: Session = Depends(get_db)
 ):
-    """Get pending jobs for worker to process"""
-    jobs = db.query(Job).filter(
-        Job.status == "pending"
-    ).order_by(Job.created_at).limit(limit).all()
+    """Get pending jobs that are due for worker to process"""
+    # Jobs of sources at their concurrency limit would only be refused at claim time
+    free = sources.free_slots(db)
+    saturated = [source for source, slots in free.items() if slots <= 0]
+    query = db.query(Job).filter(
+        Job.status == "pending",
+        Job.run_after <= datetime.now(timezone.utc)
+    )
+    if saturated:
+        query = query.filter(or_(Job.source.is_(None), Job.source.notin_(saturated)))
+    jobs = query.order_by(Job.run_after).limit(limit * sources.LISTING_OVERFETCH).all()
+    jobs = sources.pick_claimable(jobs, free, limit)
     
     return [JobResponse.model_validate(job.to_dict()) for job in jobs]
 
+@router.get("/insights/cache/stats")
+async def get_insight_cache_stats(
+    worker_verified: bool = Depends(verify_worker_token),
+    db: Session = Depends(get_db)
+):
+    """Insight cache hit rate of this process and overall cache size"""
+    return {**insight_cache.stats.snapshot(), **insight_cache.usage(db)}
+
+@router.get("/insights/cache/{transcript_hash}")
+async def get_cached_insights(
+    transcript_hash: str,
+    prompt_version: Optional[str] = None,
+    worker_verified: bool = Depends(verify_worker_token),
+    db: Session = Depends(get_db)
+):
+    """Look up insights for a transcript hash before generating them"""
+    if not settings.insight_cache_enabled:
+        raise HTTPException(status_code=404, detail="Insight cache disabled")
+    
+    insights = insight_cache.lookup(db, transcript_hash, prompt_version)
+    if insights is None:
+        raise HTTPException(status_code=404, detail="No cached insights")
+    
+    db.commit()
+    return {
+        "transcript_hash": transcript_hash,
+        "prompt_version": prompt_version or settings.insight_prompt_version,
+        "insights": insights
+    }
+
 @router.post("/jobs/{job_id}/claim")
 async def claim_job(
     job_id: str,
     request: WorkerClaimRequest,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER, max_length=200),
     worker_verified: bool = Depends(verify_worker_token),
     db: Session = Depends(get_db)
 ):
     """Claim a job for processing"""
-    job = db.query(Job).filter(Job.id == job_id, Job.status == "pending").first()
+    key = idempotency.scoped_key("claim", job_id, idempotency_key)
+    cached = idempotency.lookup(db, key)
+    if cached is not None:
+        return cached
+    
+    # Lock the row so concurrent claims on PostgreSQL cannot both succeed
+    job = db.query(Job).filter(Job.id == job_id).with_for_update().first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found or already claimed")
     
+    video = db.query(Video).filter(Video.id == job.video_id).first()
+    response = {
+        "success": True,
+        "job_id": job_id,
+        "video_url": video.url if video else None
+    }
+    
+    if job.status == "processing" and job.worker_id == request.worker_id:
+        # Retried claim from the worker that already owns the job
+        db.rollback()
+        return response
+    
+    if job.status != "pending":
+        raise HTTPException(status_code=404, detail="Job not found or already claimed")
+    
+    # SQLite hands back naive datetimes, which are stored as UTC
+    run_after = job.run_after and job.run_after.replace(tzinfo=job.run_after.tzinfo or timezone.utc)
+    if run_after and run_after > datetime.now(timezone.utc):
+        raise HTTPException(status_code=409, detail=f"Job is scheduled to run after {run_after.isoformat()}")
+    
+    if not sources.acquire(db, job):
+        raise HTTPException(status_code=409, detail=f"Source {job.source} is at its concurrency limit, retry later")
+    
     # Update job status
     job.status = "processing"
+    job.attempts = (job.attempts or 0) + 1
+    backpressure.release(db, job)
     job.worker_id = request.worker_id
     job.started_at = datetime.now(timezone.utc)
     job.updated_at = datetime.now(timezone.utc)
     
     # Update video status
-    video = db.query(Video).filter(Video.id == job.video_id).first()
     if video:
         video.status = "processing"
         video.updated_at = datetime.now(timezone.utc)
     
-    db.commit()
-    
-    return {
-        "success": True,
-        "job_id": job_id,
-        "video_url": video.url if video else None
-    }
+    return idempotency.commit_with_key(db, key, response)
 
 @router.post("/jobs/{job_id}/result")
 async def submit_job_result(
     job_id: str,
     result: WorkerJobResult,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER, max_length=200),
     worker_verified: bool = Depends(verify_worker_token),
     db: Session = Depends(get_db)
 ):
     """Submit job result from worker"""
-    job = db.query(Job).filter(Job.id == job_id).first()
+    key = idempotency.scoped_key("result", job_id, idempotency_key)
+    cached = idempotency.lookup(db, key)
+    if cached is not None:
+        return cached
+    
+    job = db.query(Job).filter(Job.id == job_id).with_for_update().first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    if result.worker_id is not None and (job.status != "processing" or job.worker_id != result.worker_id):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is no longer claimed by {result.worker_id}")
+    if job.status == "pending" and (job.attempts or 0) > 0:
+        # Claimed before and taken back (expired claim or retry): a late result from the old run
+        raise HTTPException(status_code=409, detail=f"Job {job_id} was requeued, claim it again")
     
-    video = db.query(Video).filter(Video.id == job.video_id).first()
+    # Locked so concurrent rating updates cannot race the channel rollup deltas
+    video = db.query(Video).filter(Video.id == job.video_id).with_for_update().first()
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
+    rollup_before = rollup_state(video)
     
     # Update job
+    if job.status == "pending":
+        # Finished without a claim, so it never gave back its queue slot
+        backpressure.release(db, job)
+    elif job.status == "processing":
+        sources.release(db, job)
+    now = datetime.now(timezone.utc)
+    if (result.status == "failed" and job.job_type == "process"
+            and retry.should_retry(job.attempts or 0, result.error, result.retryable)):
+        # Transient failure: back to the queue after a backoff, other jobs are claimed meanwhile
+        job.close_stage(now)
+        job.status = "pending"
+        job.worker_id = None
+        job.error_message = result.error
+        job.run_after = retry.next_run_after(now, max(1, job.attempts or 0))
+        job.updated_at = now
+        backpressure.requeue(db, job)
+        video.status = "pending"
+        video.processing_stage = None
+        video.updated_at = now
+        
+        response = {
+            "success": True,
+            "message": f"Job {job_id} scheduled for retry",
+            "attempts": job.attempts,
+            "run_after": job.run_after.isoformat()
+        }
+        return idempotency.commit_with_key(db, key, response)
+    
     job.status = result.status
-    job.completed_at = datetime.now(timezone.utc)
-    job.updated_at = datetime.now(timezone.utc)
+    job.completed_at = now
+    job.updated_at = now
+    job.close_stage(job.completed_at)
     
     if result.status == "failed":
         job.error_message = result.error
@@ -91,20 +228,36 @@ async def submit_job_result(
     
     if result.status == "completed":
         video.transcript = result.transcript
+        if result.segments is not None:
+            replace_transcript_segments(db, video.id, result.segments)
+            if result.transcript is None:
+                video.transcript = " ".join(segment.text.strip() for segment in result.segments)
+        if video.transcript is not None:
+            if video.transcript_offloaded:
+                # The archived copy is replaced; its segments stay unless the result brings new ones
+                if result.segments is None:
+                    restore_offloaded_segments(db, video.id)
+                delete_transcript(db, video.id)
+            video.transcript_offloaded = False
+            video.transcript_hash = insight_cache.transcript_hash(video.transcript)
+        elif not video.transcript_offloaded:
+            video.transcript_hash = None
         video.insights = result.insights
+        if result.insights and video.transcript_hash and settings.insight_cache_enabled:
+            insight_cache.store(db, video.transcript_hash, result.insights, result.prompt_version)
         
         # Update metadata if provided
         if result.metadata:
-            for key, value in result.metadata.items():
-                if hasattr(video, key):
-                    setattr(video, key, value)
+            channel_fields = video.apply_metadata(result.metadata)
+            if video.channel_id:
+                upsert_channel(db, video.channel_id, video.channel, **channel_fields)
+            apply_rollup_change(db, video, rollup_before)
     
     elif result.status == "failed":
         video.error = result.error
     
-    db.commit()
-    
-    return {"success": True, "message": f"Job {job_id} updated successfully"}
+    response = {"success": True, "message": f"Job {job_id} updated successfully"}
+    return idempotency.commit_with_key(db, key, response)
 
 @router.post("/jobs/{job_id}/progress")
 async def update_job_progress(
@@ -141,13 +294,16 @@ async def update_job_stage(
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
+    now = datetime.now(timezone.utc)
+    
     # Update video processing stage
     video.processing_stage = progress.processing_stage
-    video.updated_at = datetime.now(timezone.utc)
+    video.updated_at = now
     
-    # Also update job progress
+    # Also update job progress and keep the stage timeline for analytics
     job.progress = {"stage": progress.processing_stage}
-    job.updated_at = datetime.now(timezone.utc)
+    job.enter_stage(progress.processing_stage, now)
+    job.updated_at = now
     
     db.commit()
     
@@ -0,0 +1,220 @@
+"""Queue-length limits for new submissions.
+
+Pending process jobs are counted in queue_counters, globally and per
+tenant, and adjusted by one on every enqueue, claim and promotion, so
+admission never runs COUNT(*) over the jobs table. A slot is taken with a
+single conditional upsert that only increments while the counter is below
+its cap. The retention pass reconciles the counters with the jobs table to
+undo any drift.
+
+Submissions over a cap are rejected with 429 and an estimated wait, or,
+with QUEUE_PARK_ENABLED, accepted into parked_submissions together with
+low-priority submissions and queued by a background task once the queue
+has drained below QUEUE_PARK_PROMOTE_BELOW.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from .changes import log_changes
+from .config import settings
+from .database import SessionLocal, increment_below
+from .eta import eta_model
+from .models import Video, Job, QueueCounter, ParkedSubmission
+from .ratelimit import client_key
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = "global"
+PARKED_STAGE = "parked"  # processing_stage of a video waiting in parked_submissions
+
+
+def tenant_id(headers: Headers, client: Optional[Tuple[str, int]]) -> str:
+    """Tenant of a submission: the API key or the client address, as used for rate limiting"""
+    key = client_key(headers, client)
+    if key.startswith("key:"):
+        # API keys are credentials; jobs only keep a digest
+        return "key:" + hashlib.sha256(key[4:].encode()).hexdigest()[:16]
+    return key[:255]
+
+
+def _tenant_scope(tenant: str) -> str:
+    return f"tenant:{tenant}"
+
+
+def _increment(db: Session, scope: str, limit: int) -> bool:
+    """Add one pending job to a counter unless it has reached limit (0 = no limit)"""
+    return increment_below(db, QueueCounter, {"scope": scope}, "pending", limit)
+
+
+def _decrement(db: Session, scopes):
+    db.execute(
+        update(QueueCounter).where(QueueCounter.scope.in_(scopes), QueueCounter.pending > 0)
+        .values(pending=QueueCounter.pending - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def pending(db: Session, scope: str = GLOBAL_SCOPE) -> int:
+    """Counted pending process jobs of a scope"""
+    return db.query(QueueCounter.pending).filter(QueueCounter.scope == scope).scalar() or 0
+
+
+def admit(db: Session, tenant: Optional[str], global_limit: Optional[int] = None) -> Optional[dict]:
+    """Take a queue slot for a new process job; returns None, or the exceeded cap without taking a slot"""
+    global_limit = settings.queue_max_pending_global if global_limit is None else global_limit
+    # The global row is always locked first so concurrent admissions cannot deadlock
+    if not _increment(db, GLOBAL_SCOPE, global_limit):
+        return {"queue": "global", "limit": global_limit, "pending": pending(db)}
+    if tenant and not _increment(db, _tenant_scope(tenant), settings.queue_max_pending_per_tenant):
+        _decrement(db, [GLOBAL_SCOPE])
+        scope = _tenant_scope(tenant)
+        return {"queue": "tenant", "limit": settings.queue_max_pending_per_tenant, "pending": pending(db, scope)}
+    return None
+
+
+def release(db: Session, job: Job):
+    """Return the slot of a process job that left the pending state"""
+    if job.job_type != "process":
+        return
+    scopes = [GLOBAL_SCOPE]
+    if job.tenant_id:
+        scopes.append(_tenant_scope(job.tenant_id))
+    _decrement(db, scopes)
+
+
+def requeue(db: Session, job: Job):
+    """Count a process job that went back to pending; retries are never refused"""
+    if job.job_type != "process":
+        return
+    _increment(db, GLOBAL_SCOPE, 0)
+    if job.tenant_id:
+        _increment(db, _tenant_scope(job.tenant_id), 0)
+
+
+def queue_full_response(rejection: dict) -> JSONResponse:
+    """429 telling the client which cap was hit and roughly when a slot frees up"""
+    # The queue has to drain below the cap before the next submission fits
+    excess = max(1, rejection["pending"] - rejection["limit"] + 1)
+    wait = math.ceil(eta_model.drain_seconds(excess))
+    return JSONResponse(
+        {
+            "detail": "Processing queue is full, retry later",
+            **rejection,
+            "estimated_wait_seconds": wait,
+        },
+        status_code=429,
+        headers={"Retry-After": str(max(1, wait))},
+    )
+
+
+def park(
+    db: Session,
+    video: Video,
+    tenant: Optional[str],
+    priority: str,
+    run_after: Optional[datetime] = None,
+    source: Optional[str] = None,
+):
+    """Accept a submission without queueing a job for it yet"""
+    video.processing_stage = PARKED_STAGE
+    db.add(ParkedSubmission(video_id=video.id, tenant_id=tenant, priority=priority, run_after=run_after, source=source))
+
+
+def promote_parked(db: Session, batch_size: Optional[int] = None) -> int:
+    """Queue parked submissions, normal priority and oldest first, while the queue is below the promotion mark"""
+    threshold = settings.queue_park_promote_below
+    room = threshold - pending(db)
+    if room <= 0:
+        return 0
+
+    stmt = select(ParkedSubmission).order_by(
+        case((ParkedSubmission.priority == "low", 1), else_=0), ParkedSubmission.created_at
+    ).limit(min(room, batch_size or settings.queue_park_batch_size))
+    if db.get_bind().dialect.name == "postgresql":
+        # Concurrent promoters in other processes pick disjoint rows
+        stmt = stmt.with_for_update(skip_locked=True)
+
+    promoted = 0
+    now = datetime.now(timezone.utc)
+    for parked in db.scalars(stmt).all():
+        # Tenants at their cap stay parked; the others are not held up by them
+        if admit(db, parked.tenant_id, global_limit=threshold) is not None:
+            continue
+        db.add(Job(
+            video_id=parked.video_id,
+            status="pending",
+            tenant_id=parked.tenant_id,
+            source=parked.source,
+            created_at=now,
+            run_after=max(now, parked.run_after.replace(tzinfo=parked.run_after.tzinfo or timezone.utc))
+            if parked.run_after else now,
+        ))
+        unparked = db.execute(
+            update(Video).where(Video.id == parked.video_id, Video.processing_stage == PARKED_STAGE)
+            .values(processing_stage=None, updated_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if unparked:
+            log_changes(db, "video", [(parked.video_id, parked.video_id)], "update", ["processing_stage", "updated_at"])
+        db.delete(parked)
+        promoted += 1
+    db.commit()
+    return promoted
+
+
+def reconcile_counters(db: Session) -> int:
+    """Reset the counters to the actual pending jobs; returns the number of corrected scopes"""
+    counts = dict(
+        db.query(Job.tenant_id, func.count(Job.id))
+        .filter(Job.status == "pending", Job.job_type == "process")
+        .group_by(Job.tenant_id).all()
+    )
+    expected = {GLOBAL_SCOPE: sum(counts.values())}
+    expected.update({_tenant_scope(tenant): count for tenant, count in counts.items() if tenant})
+    stored = dict(db.query(QueueCounter.scope, QueueCounter.pending).all())
+
+    corrected = 0
+    for scope in set(expected) | set(stored):
+        actual = expected.get(scope, 0)
+        if stored.get(scope) == actual:
+            continue
+        if scope not in stored:
+            db.add(QueueCounter(scope=scope, pending=actual))
+        else:
+            db.execute(update(QueueCounter).where(QueueCounter.scope == scope).values(pending=actual))
+        corrected += 1
+
+    # Idle tenants need no row; the next admission recreates it
+    db.execute(delete(QueueCounter).where(QueueCounter.scope != GLOBAL_SCOPE, QueueCounter.pending == 0))
+    db.commit()
+    return corrected
+
+
+def run_promotion() -> int:
+    db = SessionLocal()
+    try:
+        return promote_parked(db)
+    finally:
+        db.close()
+
+
+async def park_promotion_loop(interval_seconds: int):
+    """Periodically move parked submissions into the queue"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            promoted = await run_in_threadpool(run_promotion)
+            if promoted:
+                logger.info(f"Queued {promoted} parked submissions")
+        except Exception:
+            logger.exception("Parked submission promotion failed")
@@ -0,0 +1,135 @@
+"""Change log for incremental sync of videos and jobs.
+
+Every ORM flush that inserts, updates or deletes a Video or Job queues
+change_log rows on its session; Core statements on those tables (bulk
+upserts, batch updates and deletes) queue theirs with log_changes. The rows
+are inserted on the same connection right before COMMIT, so entries commit
+atomically with the change they describe. On PostgreSQL that last step
+takes an advisory lock, held only from the insert to the commit, so seq
+order matches commit order without serializing the rest of each transaction.
+"""
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import event, insert, inspect, text
+from sqlalchemy.orm import Session
+
+from .models import Video, Job, ChangeLogEntry
+
+# Arbitrary application-wide key for the PostgreSQL advisory lock
+CHANGE_LOG_LOCK_ID = 7_340_034
+
+TRACKED_ENTITIES = {Video: "video", Job: "job"}
+
+
+class ChangeNotifier:
+    """Wakes long-polling feed requests in this process when changes commit"""
+
+    def __init__(self):
+        self._waiters = set()
+        self._lock = threading.Lock()
+
+    def notify(self):
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
+
+    async def wait(self, timeout: float):
+        """Wait until notified or the timeout expires"""
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(entry)
+        try:
+            await asyncio.wait_for(entry[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.discard(entry)
+
+
+change_notifier = ChangeNotifier()
+
+
+PENDING_CHANGES_KEY = "pending_changes"
+
+
+def _row(entity_type, entity_id, video_id, operation, changed_fields=None):
+    return {
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "video_id": video_id,
+        "operation": operation,
+        "changed_fields": changed_fields,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def _change_row(obj, operation, changed_fields=None):
+    entity_type = TRACKED_ENTITIES[type(obj)]
+    video_id = obj.id if entity_type == "video" else obj.video_id
+    return _row(entity_type, obj.id, video_id, operation, changed_fields)
+
+
+def _changed_fields(obj):
+    state = inspect(obj)
+    return sorted(attr.key for attr in state.mapper.column_attrs if state.attrs[attr.key].history.has_changes())
+
+
+def log_changes(session: Session, entity_type: str, entities, operation: str, changed_fields=None):
+    """Queue change_log rows for a Core statement; entities are (entity_id, video_id) pairs"""
+    rows = [_row(entity_type, entity_id, video_id, operation, changed_fields) for entity_id, video_id in entities]
+    session.info.setdefault(PENDING_CHANGES_KEY, []).extend(rows)
+
+
+def record_changes(session, flush_context):
+    """Queue change_log rows for tracked entities touched by this flush"""
+    rows = [_change_row(obj, "insert") for obj in session.new if type(obj) in TRACKED_ENTITIES]
+
+    for obj in session.dirty:
+        if type(obj) in TRACKED_ENTITIES:
+            fields = _changed_fields(obj)
+            if fields:
+                rows.append(_change_row(obj, "update", fields))
+
+    rows.extend(_change_row(obj, "delete") for obj in session.deleted if type(obj) in TRACKED_ENTITIES)
+
+    if rows:
+        session.info.setdefault(PENDING_CHANGES_KEY, []).extend(rows)
+
+
+def write_changes(session):
+    """Insert the queued change_log rows as the last statement before COMMIT"""
+    # Flush first so the final flush of the commit has nothing left to queue
+    session.flush()
+    rows = session.info.pop(PENDING_CHANGES_KEY, None)
+    if not rows:
+        return
+
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        # Serialize the seq assignment until commit so sequence order matches commit order
+        connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": CHANGE_LOG_LOCK_ID})
+    connection.execute(insert(ChangeLogEntry), rows)
+    session.info["change_log_written"] = True
+
+
+def _notify_after_commit(session):
+    if session.info.pop("change_log_written", False):
+        change_notifier.notify()
+
+
+def _reset_after_transaction(session, transaction):
+    # Changes of a rolled back or closed transaction are never written
+    if transaction.parent is None:
+        session.info.pop(PENDING_CHANGES_KEY, None)
+        session.info.pop("change_log_written", None)
+
+
+# after_flush still sees the pre-flush new/dirty/deleted sets, with generated ids populated
+event.listen(Session, "after_flush", record_changes)
+event.listen(Session, "before_commit", write_changes)
+event.listen(Session, "after_commit", _notify_after_commit)
+event.listen(Session, "after_transaction_end", _reset_after_transaction)
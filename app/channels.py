@@ -0,0 +1,150 @@
+"""Deduplicated channel records shared by videos and their rollups.
+
+video_count, total_duration, rating_sum, rating_count (over all votes of
+the channel's videos) and latest_upload_date are adjusted with relative
+UPDATEs whenever a video joins or leaves a channel, changes its duration
+or receives a vote, so channel pages never scan the videos table.
+"""
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from .database import upsert_insert
+from .models import Channel, Video
+
+
+def upsert_channel(db: Session, channel_id: str, name: Optional[str] = None, **fields):
+    """Create the channel or update its known fields; None values never overwrite stored ones"""
+    values = {key: value for key, value in {"name": name, **fields}.items() if value is not None}
+    now = datetime.now(timezone.utc)
+
+    stmt = upsert_insert(db, Channel)
+    if stmt is None:
+        channel = db.get(Channel, channel_id)
+        if channel is None:
+            db.add(Channel(channel_id=channel_id, created_at=now, **values))
+        else:
+            for key, value in values.items():
+                setattr(channel, key, value)
+        db.flush()
+        return
+
+    # Executed immediately so the row exists before the video referencing it is flushed
+    stmt = stmt.values(channel_id=channel_id, created_at=now, **values)
+    if values:
+        stmt = stmt.on_conflict_do_update(index_elements=["channel_id"], set_={**values, "updated_at": now})
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["channel_id"])
+    db.execute(stmt)
+
+
+class RollupState(NamedTuple):
+    """Fields of a video that contribute to its channel's rollups"""
+    channel_id: Optional[str]
+    duration: int
+    upload_date: Optional[str]
+    rating_sum: int
+    rating_count: int
+
+
+def rollup_state(video: Video) -> RollupState:
+    return RollupState(
+        video.channel_id, video.duration or 0, video.upload_date, video.rating_sum or 0, video.rating_count or 0
+    )
+
+
+def _adjust(db: Session, channel_id: str, videos=0, duration=0, rating_sum=0, rating_count=0, upload_date=None):
+    values = {
+        "video_count": Channel.video_count + videos,
+        "total_duration": Channel.total_duration + duration,
+        "rating_sum": Channel.rating_sum + rating_sum,
+        "rating_count": Channel.rating_count + rating_count,
+    }
+    if upload_date:
+        values["latest_upload_date"] = case(
+            (Channel.latest_upload_date.is_(None), upload_date),
+            (Channel.latest_upload_date < upload_date, upload_date),
+            else_=Channel.latest_upload_date,
+        )
+    db.execute(
+        update(Channel).where(Channel.channel_id == channel_id).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def adjust_channel_ratings(db: Session, channel_id: str, rating_sum: int, rating_count: int):
+    """Apply a vote's change to the channel's rating totals"""
+    _adjust(db, channel_id, rating_sum=rating_sum, rating_count=rating_count)
+
+
+def _refresh_latest_upload(db: Session, channel_id: str, exclude_video_id: str):
+    # Only needed when a video leaves a channel; uses the videos.channel_id index
+    latest = db.query(func.max(Video.upload_date)).filter(
+        Video.channel_id == channel_id,
+        Video.id != exclude_video_id
+    ).scalar()
+    db.execute(
+        update(Channel).where(Channel.channel_id == channel_id).values(latest_upload_date=latest)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def apply_rollup_change(db: Session, video: Video, before: RollupState):
+    """Move the video's contribution from its previous state to its current one"""
+    after = rollup_state(video)
+    if before == after:
+        return
+
+    if before.channel_id == after.channel_id:
+        if after.channel_id:
+            _adjust(
+                db,
+                after.channel_id,
+                duration=after.duration - before.duration,
+                rating_sum=after.rating_sum - before.rating_sum,
+                rating_count=after.rating_count - before.rating_count,
+                upload_date=after.upload_date,
+            )
+        return
+
+    if before.channel_id:
+        _adjust(
+            db,
+            before.channel_id,
+            videos=-1,
+            duration=-before.duration,
+            rating_sum=-before.rating_sum,
+            rating_count=-before.rating_count,
+        )
+        _refresh_latest_upload(db, before.channel_id, video.id)
+    if after.channel_id:
+        _adjust(
+            db,
+            after.channel_id,
+            videos=1,
+            duration=after.duration,
+            rating_sum=after.rating_sum,
+            rating_count=after.rating_count,
+            upload_date=after.upload_date,
+        )
+
+
+def recompute_rollups(db: Session, channel_ids=None):
+    """Rebuild channel rollups (all channels by default) from their videos, for bulk loads that bypass apply_rollup_change"""
+    def aggregate(expr):
+        return select(expr).where(Video.channel_id == Channel.channel_id).scalar_subquery()
+
+    stmt = update(Channel)
+    if channel_ids is not None:
+        stmt = stmt.where(Channel.channel_id.in_(list(channel_ids)))
+    db.execute(
+        stmt.values(
+            video_count=aggregate(func.count(Video.id)),
+            total_duration=aggregate(func.coalesce(func.sum(Video.duration), 0)),
+            rating_sum=aggregate(func.coalesce(func.sum(Video.rating_sum), 0)),
+            rating_count=aggregate(func.coalesce(func.sum(Video.rating_count), 0)),
+            latest_upload_date=aggregate(func.max(Video.upload_date)),
+        ).execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,324 @@
+"""Negotiated response compression, compressed request bodies and MessagePack responses.
+
+gzip is always available. Brotli (``brotli``), Zstandard (``zstandard``) and
+MessagePack (``msgpack``) are used when the optional packages are installed.
+"""
+import zlib
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Preference order when the client accepts several encodings equally
+_ENCODING_PREFERENCE = ("zstd", "br", "gzip")
+
+# Media type requested through Accept, read by NegotiatedJSONResponse
+_preferred_media_type: ContextVar[Optional[str]] = ContextVar("preferred_media_type", default=None)
+
+
+def available_encodings():
+    """Content encodings this process can produce and accept"""
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def _quality_values(header: str) -> dict:
+    """Map each token or media range of an Accept-style header to its q-value"""
+    weights = {}
+    for part in header.split(","):
+        token, *params = part.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header"""
+    weights = _quality_values(accept_encoding)
+    candidates = [
+        encoding for encoding in _ENCODING_PREFERENCE
+        if encoding in available_encodings() and weights.get(encoding, weights.get("*", 0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda encoding: weights.get(encoding, weights.get("*", 0)))
+
+
+def negotiate_media_type(accept: str) -> Optional[str]:
+    """MessagePack if the Accept header asks for it at least as strongly as for JSON, else None (JSON)"""
+    weights = _quality_values(accept)
+    # Only an explicit msgpack range counts; wildcards are served the default JSON
+    msgpack_q = max((weights.get(media_type, 0) for media_type in MSGPACK_MEDIA_TYPES), default=0)
+    if msgpack_q <= 0:
+        return None
+    json_q = weights.get("application/json", weights.get("application/*", weights.get("*/*", 0)))
+    return MSGPACK_MEDIA_TYPES[0] if msgpack_q >= json_q else None
+
+
+class _Compressor:
+    """Uniform streaming interface over the supported compressors"""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=min(level, 11))
+            self._compress, self._finish = self._obj.process, self._obj.finish
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+            self._compress, self._finish = self._obj.compress, self._obj.flush
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._compress, self._finish = self._obj.compress, self._obj.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith("text/event-stream"):
+        return False
+    return (
+        content_type.startswith("text/")
+        or "json" in content_type
+        or "xml" in content_type
+        or "msgpack" in content_type
+    )
+
+
+class ContentNegotiationMiddleware:
+    """Let NegotiatedJSONResponse render MessagePack for clients that Accept it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or msgpack is None:
+            await self.app(scope, receive, send)
+            return
+
+        media_type = negotiate_media_type(Headers(scope=scope).get("accept", ""))
+        token = _preferred_media_type.set(media_type)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _preferred_media_type.reset(token)
+
+
+class CompressionMiddleware:
+    """Compress responses above a size threshold with the client's preferred encoding"""
+
+    def __init__(self, app, minimum_size: int = 1024, level: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self.app, encoding, self.minimum_size, self.level)
+        await responder(scope, receive, send)
+
+
+class _CompressingResponder:
+    def __init__(self, app, encoding: str, minimum_size: int, level: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.level = level
+        self.send = None
+        self.initial_message = None
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    def _start_compressing(self) -> MutableHeaders:
+        self.compressor = _Compressor(self.encoding, self.level)
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        return headers
+
+    async def send_with_compression(self, message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Delay the start message until we know whether the body is compressed
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                "content-encoding" in headers
+                or not _is_compressible(headers.get("content-type", ""))
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if self.passthrough or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            headers = self._start_compressing()
+            if more_body:
+                # Streaming response: length is unknown until the stream ends
+                del headers["Content-Length"]
+                chunk = self.compressor.compress(body)
+            else:
+                chunk = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(chunk))
+            await self.send(self.initial_message)
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+class NegotiatedJSONResponse(JSONResponse):
+    """JSON response that switches to MessagePack when the client asks for it"""
+
+    def init_headers(self, headers=None):
+        super().init_headers(headers)
+        if msgpack is not None:
+            # The body depends on Accept, so shared caches must key on it
+            self.headers.add_vary_header("Accept")
+
+    def render(self, content) -> bytes:
+        if _preferred_media_type.get() in MSGPACK_MEDIA_TYPES:
+            self.media_type = MSGPACK_MEDIA_TYPES[0]
+            return msgpack.packb(content, use_bin_type=True)
+        return super().render(content)
+
+
+def _brotli_decompress(body: bytes, max_size: int) -> bytes:
+    """Decompress brotli in bounded steps, stopping once the output exceeds max_size"""
+    decompressor = brotli.Decompressor()
+    try:
+        chunks = [decompressor.process(body, output_buffer_limit=max_size + 1)]
+    except TypeError:
+        # brotli < 1.2 cannot bound the output of a call, so a small body could expand without limit
+        raise HTTPException(status_code=415, detail="Content-Encoding br requires brotli>=1.2 on the server")
+    size = len(chunks[0])
+    while size <= max_size and not decompressor.is_finished():
+        chunk = decompressor.process(b"", output_buffer_limit=max_size + 1 - size)
+        if not chunk:
+            raise ValueError("Truncated brotli stream")
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks)
+
+
+def decompress_body(body: bytes, encoding: str, max_size: int) -> bytes:
+    """Decompress a request body, refusing results larger than max_size"""
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return body
+
+    try:
+        if encoding in ("gzip", "x-gzip", "deflate"):
+            wbits = 31 if encoding != "deflate" else 15
+            decompressor = zlib.decompressobj(wbits)
+            data = decompressor.decompress(body, max_size + 1)
+        elif encoding == "br" and brotli is not None:
+            data = _brotli_decompress(body, max_size)
+        elif encoding == "zstd" and zstandard is not None:
+            data = zstandard.ZstdDecompressor().decompress(body, max_output_size=max_size + 1)
+        else:
+            raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {encoding}")
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="Malformed compressed request body")
+
+    if len(data) > max_size:
+        raise HTTPException(status_code=413, detail="Decompressed request body too large")
+    return data
+
+
+class DecompressedRequest(Request):
+    """Request whose body is transparently decompressed according to Content-Encoding"""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            encoding = self.headers.get("content-encoding", "")
+            self._body = decompress_body(body, encoding, settings.compression_max_request_size)
+        return self._body
+
+
+class DecompressingRoute(APIRoute):
+    """Route class accepting gzip/br/zstd encoded request bodies"""
+
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def decompressing_route_handler(request: Request) -> Response:
+            request = DecompressedRequest(request.scope, request.receive)
+            return await original_route_handler(request)
+
+        return decompressing_route_handler
@@ -1,16 +1,80 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Optional, List, Dict, FrozenSet, Literal
+from functools import cached_property
 import logging
+import os
 from urllib.parse import urlparse
 
+# Default serving processes are capped: each one holds its own pool, caches and rate limit buckets
+DEFAULT_MAX_WORKERS = 4
+
 class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./app.db"
+    database_replica_urls: str = ""  # Comma-separated read replicas for read-only GET endpoints
+    replica_retry_seconds: int = 30  # How long a failed replica is skipped
+    replica_health_interval_seconds: int = 15
+    read_your_writes_seconds: int = 5  # Clients read from the primary this long after their own write
+    status_since_overlap_seconds: int = 30  # Bulk status re-checks this much before `since` for late commits
+    
+    # Connection pool (server databases; SQLite keeps the SQLAlchemy defaults)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Recycle connections before server-side idle timeouts
+    db_pool_pre_ping: bool = False  # Extra round trip per checkout; recycle covers most stale connections
+    db_statement_timeout_ms: Optional[int] = None  # PostgreSQL statement_timeout
+    db_connection_budget: Optional[int] = None  # Total primary connections across all processes
+    
+    # SQLite pragmas
+    sqlite_journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"] = "WAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    
+    # Query profiling (per process, shown at /api/debug/queries)
+    db_profiling_enabled: bool = False
+    db_slow_query_ms: float = 250  # Statements slower than this are logged with their route; 0 disables
+    db_n_plus_one_threshold: int = 10  # Runs of one SELECT within a request reported as a likely N+1; 0 disables
+    db_profiling_max_statements: int = 500  # Distinct statement fingerprints tracked
     
     # API
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     debug: bool = True
+    auto_create_tables: bool = False  # Run create_all on startup (local development only); migrations own the schema
+    
+    # Serving
+    web_concurrency: Optional[int] = None  # Worker processes for python -m app.serve; defaults to CPU count, at most 4
+    reload: bool = False  # Local development only: python -m app.serve runs one auto-reloading process
+    
+    # Compression
+    compression_enabled: bool = True
+    compression_min_size: int = 1024  # Responses smaller than this are sent uncompressed
+    compression_level: int = 6
+    compression_max_request_size: int = 50 * 1024 * 1024  # Limit for decompressed worker uploads
+    
+    # Rate limiting (token bucket per client / API key)
+    rate_limit_enabled: bool = True
+    rate_limit_submit_per_minute: int = 30  # POST /api/videos/
+    rate_limit_submit_burst: int = 10
+    rate_limit_status_per_minute: int = 240  # Status polling
+    rate_limit_status_burst: int = 60
+    
+    # Client identification (rate limit buckets and queue tenants)
+    client_api_keys: str = ""  # Comma-separated API keys; X-API-Key identifies a caller only if listed here
+    trusted_proxy_count: Optional[int] = None  # Proxies appending to X-Forwarded-For; defaults to 1 on Railway, else 0
+    railway_environment: Optional[str] = None  # Set by Railway, whose edge proxy sits in front of every service
+    
+    # Admission control (public API only, worker endpoints are never shed)
+    admission_max_inflight: int = 0  # 0 disables the in-flight request cap
+    admission_worker_reserve: int = 2  # Pool connections kept free for worker endpoints
+    admission_retry_after_seconds: int = 2
+    
+    # Health checks (/health/ready, from background checks)
+    health_check_interval_seconds: float = 5  # How often the database is probed with SELECT 1
+    health_db_timeout_seconds: float = 3  # A probe taking longer counts as unreachable
+    health_max_loop_lag_ms: float = 500  # Not ready while the event loop runs this late; 0 disables
+    health_max_pool_usage: float = 1.0  # Not ready at this fraction of the pool checked out; 0 disables
     
     # CORS
     allowed_origins: str = "http://localhost:3000,http://localhost:5173"
@@ -18,13 +82,115 @@ class Settings(BaseSettings):
     # Worker Integration
     worker_api_key: Optional[str] = None
     
+    # Idempotency keys on worker endpoints
+    idempotency_ttl_hours: int = 24
+    idempotency_cache_size: int = 10000
+    
+    # Change feed
+    change_feed_poll_seconds: float = 1.0  # Long-poll recheck interval for changes from other processes
+    change_log_retention_days: int = 30
+    
+    # Ratings: Bayesian average = (prior_weight * prior_mean + sum) / (prior_weight + count)
+    rating_prior_weight: float = 5.0
+    rating_prior_mean: float = 3.0
+    
+    # Insight cache
+    insight_prompt_version: str = "v1"  # Bump when the insight prompt or model changes
+    insight_cache_enabled: bool = True
+    insight_cache_max_entries: int = 50000  # 0 disables the limit
+    insight_cache_max_bytes: int = 256 * 1024 * 1024  # 0 disables the limit
+    
+    # ETA estimates
+    eta_refresh_seconds: int = 60  # How often each process recomputes percentiles and the queue snapshot in the background
+    eta_sample_size: int = 2000  # Most recent completed jobs of each type used for the percentiles
+    eta_default_seconds: int = 300  # Processing time assumed before any job has completed
+    eta_queue_snapshot_size: int = 10000  # Pending jobs whose claim order is cached for queue positions
+    
+    # Queue backpressure (pending process jobs, counted incrementally)
+    queue_max_pending_global: int = 0  # 0 disables the cap
+    queue_max_pending_per_tenant: int = 0  # Per API key or client address; 0 disables the cap
+    queue_park_enabled: bool = False  # Park over-cap and low-priority submissions instead of rejecting with 429
+    queue_park_promote_below: int = 50  # Parked submissions are queued while fewer jobs than this are pending
+    queue_park_interval_seconds: int = 30
+    queue_park_batch_size: int = 100
+
+    # Per-source concurrency (jobs in processing per extractor or domain)
+    source_concurrency_limits: str = ""  # Comma-separated source=limit, e.g. "youtube=4,vimeo=2"
+    source_concurrency_default: int = 0  # Limit for unlisted sources; 0 = unlimited
+
+    # Job retries (transient worker errors)
+    job_max_attempts: int = 4  # Runs per process job including the first; 1 disables retries
+    job_retry_base_seconds: float = 30  # Delay before the first retry, doubled for each further one
+    job_retry_max_seconds: float = 3600
+    job_claim_timeout_seconds: int = 3600  # Processing jobs without progress for this long are requeued; 0 disables
+    job_claim_check_interval_seconds: int = 60
+
+    # Retention / archival
+    retention_interval_minutes: int = 0  # 0 disables the background retention task
+    retention_job_days: int = 30  # Finished jobs older than this are archived
+    retention_transcript_days: int = 0  # 0 keeps all transcripts inline in the videos table
+    retention_batch_size: int = 500
+    retention_export_dir: Optional[str] = None  # Export archived jobs as .jsonl.gz instead of jobs_archive
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
 
     @property
+    def workers(self) -> int:
+        """Number of serving processes: WEB_CONCURRENCY, else one per core up to DEFAULT_MAX_WORKERS"""
+        if self.web_concurrency:
+            return max(1, self.web_concurrency)
+        return min(os.cpu_count() or 1, DEFAULT_MAX_WORKERS)
+
+    @property
+    def pool_limits(self):
+        """Per-process (pool_size, max_overflow), derived from db_connection_budget when set"""
+        if not self.db_connection_budget:
+            return self.db_pool_size, self.db_max_overflow
+        per_process = max(1, self.db_connection_budget // self.workers)
+        pool_size = min(self.db_pool_size, per_process)
+        return pool_size, per_process - pool_size
+
+    @property
+    def create_tables_on_startup(self) -> bool:
+        """Whether the app should create missing tables itself instead of relying on migrations"""
+        return self.auto_create_tables
+
+    @property
+    def proxy_hops(self) -> int:
+        """Trusted proxies in front of the app: TRUSTED_PROXY_COUNT, else Railway's edge proxy when deployed there"""
+        if self.trusted_proxy_count is not None:
+            return max(0, self.trusted_proxy_count)
+        return 1 if self.railway_environment else 0
+
+    @cached_property
+    def api_keys(self) -> FrozenSet[str]:
+        """Parse client API keys from environment variable"""
+        return frozenset(key.strip() for key in self.client_api_keys.split(",") if key.strip())
+
+    @cached_property
+    def replica_urls(self) -> List[str]:
+        """Parse read replica URLs from environment variable"""
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
+    @cached_property
+    def source_limits(self) -> Dict[str, int]:
+        """Parse per-source concurrency limits from environment variable"""
+        limits = {}
+        for item in self.source_concurrency_limits.split(","):
+            source, _, limit = item.partition("=")
+            if not source.strip():
+                continue
+            try:
+                limits[source.strip().lower()] = int(limit)
+            except ValueError:
+                logging.getLogger(__name__).warning(f"Skipping invalid source concurrency limit: {item}")
+        return limits
+
+    @cached_property
     def cors_origins(self) -> List[str]:
-        """Parse and validate CORS origins from environment variable"""
+        """Parse and validate CORS origins from environment variable (parsed once per Settings)"""
         logger = logging.getLogger(__name__)
         
         # Split and clean origins
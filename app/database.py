@@ -1,18 +1,127 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from starlette.concurrency import run_in_threadpool
+from typing import List
+import asyncio
+import itertools
+import logging
+import threading
+import time
 from .config import settings
+from .profiling import profiler
 
-# Create engine - PostgreSQL only for production
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_size=10,        # Number of connections to maintain
-    max_overflow=20      # Maximum overflow connections
+logger = logging.getLogger(__name__)
+
+# Cookie set after a client's own write so its next reads go to the primary
+READ_YOUR_WRITES_COOKIE = "trnscrb_last_write"
+# Same marker as a response header; cross-origin clients never send the cookie and echo this back instead
+READ_YOUR_WRITES_HEADER = "X-Last-Write"
+
+def engine_options(database_url: str) -> dict:
+    """Build create_engine() arguments suited to the database dialect"""
+    backend = make_url(database_url).get_backend_name()
+
+    if backend == "sqlite":
+        # SQLite has no server-side pool to size; FastAPI uses sessions across threads
+        return {"connect_args": {"check_same_thread": False}}
+
+    pool_size, max_overflow = settings.pool_limits
+    options = {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if backend == "postgresql" and settings.db_statement_timeout_ms:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.db_statement_timeout_ms}"}
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply journal and locking pragmas to every new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.close()
+
+def create_db_engine(database_url: str):
+    """Create an engine configured for the dialect of the given URL"""
+    db_engine = create_engine(database_url, **engine_options(database_url))
+    if db_engine.dialect.name == "sqlite":
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    if settings.db_profiling_enabled:
+        profiler.install(db_engine)
+    return db_engine
+
+class ReplicaRouter:
+    """Round-robin over healthy read replicas, falling back to the primary"""
+
+    def __init__(self, primary, replicas: List, retry_seconds: int = 30):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.retry_seconds = retry_seconds
+        self._down_until = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        for replica in self.replicas:
+            event.listen(replica, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        # Connection failures (including failures to connect at all) take the replica out of rotation
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+    def mark_down(self, replica):
+        with self._lock:
+            self._down_until[replica] = time.monotonic() + self.retry_seconds
+        logger.warning(f"Read replica {replica.url!r} marked unhealthy for {self.retry_seconds}s")
+
+    def is_healthy(self, replica) -> bool:
+        return self._down_until.get(replica, 0) <= time.monotonic()
+
+    def choose(self):
+        """Pick the next healthy replica, or the primary if none are available"""
+        if not self.replicas:
+            return self.primary
+
+        start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if self.is_healthy(replica):
+                return replica
+        return self.primary
+
+    def check_health(self):
+        """Probe every replica and update its health state"""
+        for replica in self.replicas:
+            try:
+                with replica.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except Exception:
+                self.mark_down(replica)
+            else:
+                with self._lock:
+                    self._down_until.pop(replica, None)
+
+# Primary engine - all writes and the worker claim path
+engine = create_db_engine(settings.database_url)
+
+# Optional read replicas for read-only GET endpoints
+replica_router = ReplicaRouter(
+    engine,
+    [create_db_engine(url) for url in settings.replica_urls],
+    retry_seconds=settings.replica_retry_seconds,
 )
 
-# Create session factory
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Create base class for models
 Base = declarative_base()
@@ -23,4 +132,89 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def upsert_insert(db, model):
+    """INSERT supporting on_conflict_do_update for the session's dialect, None if unsupported"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(model)
+
+def increment_below(db, model, key: dict, column: str, limit: int) -> bool:
+    """Add one to a counter row, creating it, unless it has reached limit (0 = no limit); True if incremented"""
+    counter = getattr(model, column)
+    stmt = upsert_insert(db, model)
+    if stmt is None:
+        row = db.get(model, tuple(key.values()), with_for_update=True)
+        if row is None:
+            db.add(model(**key, **{column: 1}))
+        elif limit > 0 and getattr(row, column) >= limit:
+            return False
+        else:
+            setattr(row, column, getattr(row, column) + 1)
+        db.flush()
+        return True
+
+    # One statement, so concurrent callers can never push the counter past the limit
+    stmt = stmt.values(**key, **{column: 1}).on_conflict_do_update(
+        index_elements=list(key),
+        set_={column: counter + 1},
+        where=(counter < limit) if limit > 0 else None,
+    )
+    return db.execute(stmt).rowcount == 1
+
+def pool_usage(db_engine=None):
+    """Return (checked out connections, capacity) for an engine's pool, capacity None if unbounded"""
+    pool = (db_engine or engine).pool
+    if not isinstance(pool, QueuePool):
+        return 0, None
+    # QueuePool does not expose max_overflow publicly; -1 means unlimited overflow
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    if max_overflow < 0:
+        return pool.checkedout(), None
+    return pool.checkedout(), pool.size() + max_overflow
+
+def recently_wrote(request: Request) -> bool:
+    """Check whether the client made a write within the read-your-writes window"""
+    markers = (request.headers.get(READ_YOUR_WRITES_HEADER), request.cookies.get(READ_YOUR_WRITES_COOKIE))
+    now = time.time()
+    for marker in markers:
+        try:
+            age = now - float(marker or 0)
+        except ValueError:
+            continue
+        # A marker from the future is not a write this server made; ignore it rather than pin the client forever
+        if 0 <= age < settings.read_your_writes_seconds:
+            return True
+    return False
+
+def read_only_request(request: Request):
+    """Route dependency for POST endpoints that only read, so they do not count as the client's write"""
+    request.state.read_only = True
+
+# Dependency to get a session for read-only endpoints
+def get_read_db(request: Request):
+    if recently_wrote(request):
+        bind = replica_router.primary
+    else:
+        bind = replica_router.choose()
+
+    db = ReadSessionLocal(bind=bind)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def replica_health_loop(interval_seconds: int):
+    """Periodically probe read replicas so failed ones rejoin the rotation"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(replica_router.check_health)
+        except Exception:
+            logger.exception("Replica health check failed")
@@ -0,0 +1,227 @@
+"""Estimated completion times for queued and processing videos.
+
+Processing-time percentiles per job type and video duration bucket and the
+number of active workers are recomputed from recently completed jobs every
+ETA_REFRESH_SECONDS by a background task in each process. The same refresh
+snapshots the claim order (run_after) of the first ETA_QUEUE_SNAPSHOT_SIZE
+pending process jobs and the queue_counters total. Requests only read the
+last snapshot, so a status request never touches the jobs table for it.
+"""
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import desc, func, or_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .analytics import duration_bucket, percentile
+from .config import settings
+from .database import SessionLocal
+from .models import Video, Job, QueueCounter
+
+logger = logging.getLogger(__name__)
+
+# Workers that finished a job this recently still count as active
+ACTIVE_WORKER_WINDOW = timedelta(minutes=10)
+
+# Insights jobs take far less time than transcription, so each type has its own percentiles
+JOB_TYPES = ("process", "insights")
+
+
+class EtaModel:
+    """Percentile tables of processing time, refreshed periodically from the jobs table"""
+
+    def __init__(
+        self,
+        sample_size: int = 2000,
+        default_seconds: float = 300,
+        queue_snapshot_size: int = 10000,
+    ):
+        self.sample_size = sample_size
+        self.default_seconds = default_seconds
+        self.queue_snapshot_size = queue_snapshot_size
+        # Per job type: bucket -> {"p50", "p95", "ratio_p50", "ratio_p95"}, and the same plus "mean" over all buckets
+        self.buckets = {job_type: {} for job_type in JOB_TYPES}
+        self.overall = {job_type: self._default_stats() for job_type in JOB_TYPES}
+        self.active_workers = 1
+        self.queue = []  # Sorted run_after timestamps of the first pending process jobs
+        self.queue_total = 0  # Pending process jobs counted in queue_counters
+        self._lock = threading.Lock()
+
+    def _default_stats(self) -> dict:
+        return {
+            "p50": self.default_seconds,
+            "p95": self.default_seconds,
+            "mean": self.default_seconds,
+            "ratio_p50": None,
+            "ratio_p95": None,
+        }
+
+    def _job_type_stats(self, db: Session, job_type: str):
+        """(buckets, overall) percentiles of the most recent completed jobs of one type, overall None without any"""
+        rows = db.query(Job.started_at, Job.completed_at, Video.duration).join(
+            Video, Video.id == Job.video_id
+        ).filter(
+            Job.status == "completed",
+            Job.job_type == job_type,
+            Job.started_at.is_not(None),
+            Job.completed_at.is_not(None)
+        ).order_by(desc(Job.completed_at)).limit(self.sample_size).all()
+
+        totals = defaultdict(list)
+        ratios = defaultdict(list)
+        overall = []
+        overall_ratios = []
+        for started_at, completed_at, duration in rows:
+            seconds = max(0.0, (completed_at - started_at).total_seconds())
+            bucket = duration_bucket(duration)
+            totals[bucket].append(seconds)
+            overall.append(seconds)
+            if duration:
+                ratios[bucket].append(seconds / duration)
+                overall_ratios.append(seconds / duration)
+
+        buckets = {}
+        for bucket, values in totals.items():
+            values.sort()
+            ratio_values = sorted(ratios[bucket])
+            buckets[bucket] = {
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "ratio_p50": percentile(ratio_values, 0.5),
+                "ratio_p95": percentile(ratio_values, 0.95),
+            }
+
+        if not overall:
+            return buckets, None
+        overall.sort()
+        overall_ratios.sort()
+        return buckets, {
+            "p50": percentile(overall, 0.5),
+            "p95": percentile(overall, 0.95),
+            "mean": sum(overall) / len(overall),
+            "ratio_p50": percentile(overall_ratios, 0.5),
+            "ratio_p95": percentile(overall_ratios, 0.95),
+        }
+
+    def refresh(self, db: Session):
+        """Recompute percentile tables from the most recent completed jobs and snapshot the queue"""
+        stats = {job_type: self._job_type_stats(db, job_type) for job_type in JOB_TYPES}
+
+        recent = datetime.now(timezone.utc) - ACTIVE_WORKER_WINDOW
+        active_workers = db.query(func.count(func.distinct(Job.worker_id))).filter(
+            Job.worker_id.is_not(None),
+            or_(Job.status == "processing", Job.completed_at >= recent)
+        ).scalar()
+
+        queue = [_timestamp(run_after) for (run_after,) in db.query(Job.run_after).filter(
+            Job.status == "pending",
+            Job.job_type == "process",
+        ).order_by(Job.run_after).limit(self.queue_snapshot_size)]
+        # backpressure.GLOBAL_SCOPE; backpressure itself depends on this module
+        queue_total = db.query(QueueCounter.pending).filter(QueueCounter.scope == "global").scalar() or 0
+
+        with self._lock:
+            self.buckets = {job_type: buckets for job_type, (buckets, _) in stats.items()}
+            # A type without history keeps its previous (or default) statistics
+            self.overall = {
+                job_type: overall or self.overall[job_type]
+                for job_type, (_, overall) in stats.items()
+            }
+            self.queue = queue
+            self.queue_total = max(queue_total, len(queue))
+            self.active_workers = max(1, active_workers or 0)
+
+    def processing_seconds(self, duration: Optional[float], quantile: str = "p50", job_type: str = "process") -> float:
+        """Expected processing time of one job of the given type"""
+        # Buckets without samples fall back to the statistics over all buckets
+        stats = self.buckets[job_type].get(duration_bucket(duration)) or self.overall[job_type]
+        ratio = stats[f"ratio_{quantile}"]
+        if duration and ratio is not None:
+            return ratio * duration
+        return stats[quantile]
+
+    def queue_position(self, run_after: Optional[datetime]) -> int:
+        """Pending process jobs claimed before one due at run_after, as of the last refresh"""
+        queue = self.queue
+        position = bisect_left(queue, _timestamp(run_after)) if run_after else 0
+        if position == len(queue) and len(queue) == self.queue_snapshot_size:
+            # Past the snapshot: placed at the back of the counted queue
+            return max(len(queue), self.queue_total - 1)
+        return position
+
+    def drain_seconds(self, jobs: float) -> float:
+        """Time for the active workers to get through this many queued process jobs"""
+        return jobs / self.active_workers * self.overall["process"]["mean"]
+
+    def estimate(
+        self,
+        now: datetime,
+        job_status: Optional[str],
+        duration: Optional[float] = None,
+        started_at: Optional[datetime] = None,
+        queue_position: Optional[int] = None,
+        run_after: Optional[datetime] = None,
+        job_type: str = "process",
+    ) -> Optional[dict]:
+        """ETA for a video whose job is pending (with its queue position and schedule) or processing"""
+        if job_status == "pending":
+            # Jobs ahead are spread over the active workers
+            wait = self.drain_seconds(queue_position or 0)
+            if run_after:
+                # Scheduled or backing off before a retry: not claimable before run_after
+                wait = max(wait, (run_after - now).total_seconds())
+            seconds = wait + self.processing_seconds(duration, job_type=job_type)
+        elif job_status == "processing":
+            elapsed = (now - started_at).total_seconds() if started_at else 0.0
+            expected = self.processing_seconds(duration, job_type=job_type)
+            if elapsed >= expected:
+                # Slower than typical: fall back to the tail estimate
+                expected = self.processing_seconds(duration, "p95", job_type)
+            seconds = max(0.0, expected - elapsed)
+        else:
+            return None
+
+        seconds = round(seconds)
+        return {
+            "eta_seconds": seconds,
+            "estimated_completion_at": (now + timedelta(seconds=seconds)).isoformat(),
+            "queue_position": queue_position,
+            # Clients can poll less often while the expected wait is long
+            "poll_after_seconds": int(min(60, max(2, seconds / 4))),
+        }
+
+
+def _timestamp(value: datetime) -> float:
+    # SQLite hands back naive datetimes, which are stored as UTC
+    return value.replace(tzinfo=value.tzinfo or timezone.utc).timestamp()
+
+
+eta_model = EtaModel(
+    settings.eta_sample_size,
+    settings.eta_default_seconds,
+    settings.eta_queue_snapshot_size,
+)
+
+
+def run_eta_refresh():
+    db = SessionLocal()
+    try:
+        eta_model.refresh(db)
+    finally:
+        db.close()
+
+
+async def eta_refresh_loop(interval_seconds: int):
+    """Refresh the ETA model now and then periodically, so requests only read its snapshot"""
+    while True:
+        try:
+            await run_in_threadpool(run_eta_refresh)
+        except Exception:
+            logger.exception("ETA refresh failed")
+        await asyncio.sleep(interval_seconds)
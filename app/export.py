@@ -0,0 +1,213 @@
+"""Bulk transcript export streamed straight from the database.
+
+Videos are read through a server-side cursor (yield_per) in batches and
+written out one at a time, so memory stays flat however many transcripts
+are exported. JSONL puts one video per line; SRT, VTT and TXT put one file
+per video into a zip archive that is built while it streams. Videos whose
+transcript has no segments get SRT/VTT files with a single cue spanning the
+video, so subtitle archives are never missing a transcribed video.
+
+Run once from the command line:
+
+    python -m app.export --format srt --channel-id UC123 --output transcripts.zip
+"""
+import argparse
+import json
+import logging
+import sys
+import zipfile
+from datetime import datetime
+from itertools import groupby
+from typing import Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import Video, TranscriptSegment
+from .transcript_store import load_transcript, load_segments
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("jsonl", "srt", "vtt", "txt")
+EXPORT_BATCH_SIZE = 500
+
+# Fields of each JSONL record besides the transcript
+JSONL_COLUMNS = (
+    Video.id, Video.url, Video.title, Video.duration, Video.channel, Video.channel_id,
+    Video.upload_date, Video.view_count, Video.rating, Video.created_at, Video.insights,
+)
+
+
+def _filter(
+    stmt,
+    status: Optional[str] = "completed",
+    channel_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    ids: Optional[Sequence[str]] = None,
+):
+    """Restrict an export statement to the selected videos"""
+    if status:
+        stmt = stmt.where(Video.status == status)
+    if channel_id:
+        stmt = stmt.where(Video.channel_id == channel_id)
+    if since:
+        stmt = stmt.where(Video.created_at >= since)
+    if until:
+        stmt = stmt.where(Video.created_at < until)
+    if ids:
+        stmt = stmt.where(Video.id.in_(ids))
+    return stmt
+
+
+def _stream(db: Session, stmt, batch_size: int):
+    """Execute with a server-side cursor, fetching batch_size rows at a time"""
+    return db.execute(stmt.execution_options(yield_per=batch_size))
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def format_srt(segments: Iterable) -> str:
+    """Render (start, end, text) segments as SubRip"""
+    cues = []
+    for number, (start, end, text) in enumerate(segments, 1):
+        cues.append(f"{number}\n{_timestamp(start, ',')} --> {_timestamp(end, ',')}\n{text.strip()}\n")
+    return "\n".join(cues)
+
+
+def format_vtt(segments: Iterable) -> str:
+    """Render (start, end, text) segments as WebVTT"""
+    cues = [f"{_timestamp(start, '.')} --> {_timestamp(end, '.')}\n{text.strip()}\n" for start, end, text in segments]
+    return "WEBVTT\n\n" + "\n".join(cues)
+
+
+def iter_jsonl(db: Session, batch_size: int = EXPORT_BATCH_SIZE, **filters) -> Iterator[bytes]:
+    """One JSON line per selected video, transcript included"""
+    stmt = _filter(select(*JSONL_COLUMNS, Video.transcript, Video.transcript_offloaded), **filters).order_by(Video.id)
+    for row in _stream(db, stmt, batch_size):
+        record = {column.key: getattr(row, column.key) for column in JSONL_COLUMNS}
+        if record["created_at"]:
+            record["created_at"] = record["created_at"].isoformat()
+        transcript = row.transcript
+        if transcript is None and row.transcript_offloaded:
+            transcript = load_transcript(db, row.id)
+        record["transcript"] = transcript
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def iter_transcript_files(db: Session, fmt: str, batch_size: int = EXPORT_BATCH_SIZE, **filters) -> Iterator[tuple]:
+    """(filename, content) for each selected video in the given subtitle or text format"""
+    if fmt == "txt":
+        stmt = _filter(select(Video.id, Video.transcript, Video.transcript_offloaded), **filters).order_by(Video.id)
+        for row in _stream(db, stmt, batch_size):
+            transcript = row.transcript
+            if transcript is None and row.transcript_offloaded:
+                transcript = load_transcript(db, row.id)
+            if transcript is not None:
+                yield f"{row.id}.txt", transcript
+        return
+
+    # Segments of all selected videos in one ordered pass
+    stmt = _filter(
+        select(Video.id, TranscriptSegment.start_time, TranscriptSegment.end_time, TranscriptSegment.text)
+        .join(TranscriptSegment, TranscriptSegment.video_id == Video.id),
+        **filters
+    ).order_by(Video.id, TranscriptSegment.position)
+    render = format_srt if fmt == "srt" else format_vtt
+    for video_id, rows in groupby(_stream(db, stmt, batch_size), key=lambda row: row.id):
+        yield f"{video_id}.{fmt}", render((row.start_time, row.end_time, row.text) for row in rows)
+
+    # Videos without segment rows: segments retention moved to the transcript archive, else the plain
+    # transcript as one cue over the whole video
+    stmt = _filter(
+        select(Video.id, Video.duration, Video.transcript, Video.transcript_offloaded)
+        .where(~exists().where(TranscriptSegment.video_id == Video.id)),
+        **filters
+    ).order_by(Video.id)
+    for row in _stream(db, stmt, batch_size):
+        segments = load_segments(db, row.id) if row.transcript_offloaded else None
+        if segments:
+            yield f"{row.id}.{fmt}", render((segment["start"], segment["end"], segment["text"]) for segment in segments)
+            continue
+        transcript = row.transcript
+        if transcript is None and row.transcript_offloaded:
+            transcript = load_transcript(db, row.id)
+        if transcript:
+            yield f"{row.id}.{fmt}", render([(0.0, float(row.duration or 0), transcript)])
+
+
+class _ChunkWriter:
+    """Write-only file object collecting what zipfile writes until it is drained"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(files: Iterable[tuple]) -> Iterator[bytes]:
+    """Stream a zip archive of (filename, content) pairs, holding one file in memory at a time"""
+    writer = _ChunkWriter()
+    # The writer is not seekable, so zipfile emits data descriptors instead of seeking back
+    with zipfile.ZipFile(writer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+            yield writer.drain()
+    yield writer.drain()
+
+
+def iter_export(db: Session, fmt: str, batch_size: int = EXPORT_BATCH_SIZE, **filters) -> Iterator[bytes]:
+    """Byte chunks of a complete export in the given format"""
+    if fmt == "jsonl":
+        return iter_jsonl(db, batch_size, **filters)
+    return iter_zip(iter_transcript_files(db, fmt, batch_size, **filters))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export transcripts as JSONL or a zip of SRT/VTT/TXT files")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="jsonl")
+    parser.add_argument("--output", default="-", help="Output file, - for stdout")
+    parser.add_argument("--status", default="completed", help="Video status to export, empty for all")
+    parser.add_argument("--channel-id", default=None)
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Videos created at or after (ISO 8601)")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="Videos created before (ISO 8601)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        written = 0
+        for chunk in iter_export(
+            db, args.format, args.batch_size,
+            status=args.status or None, channel_id=args.channel_id, since=args.since, until=args.until
+        ):
+            out.write(chunk)
+            written += len(chunk)
+        logger.info(f"Exported {written} bytes as {args.format}")
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Liveness and readiness state kept current by background tasks.
+
+Probes must stay cheap, so /health/ready never touches the database
+itself. A background task runs SELECT 1 every HEALTH_CHECK_INTERVAL_SECONDS
+and a ticker measures how late the event loop wakes up. Readiness combines
+their latest results with the current pool usage. It fails while the
+database is unreachable, the pool is saturated or the loop is lagging,
+which takes an overloaded instance out of rotation before its requests
+start timing out.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .database import engine, pool_usage
+
+logger = logging.getLogger(__name__)
+
+# Event loop ticker period and the number of recent ticks readiness looks at
+LAG_TICK_SECONDS = 0.25
+LAG_WINDOW = 8
+
+
+class HealthMonitor:
+    """Latest database check and event loop lag of this process"""
+
+    def __init__(self, db_engine=None, pool_usage_fn: Optional[Callable[[], Tuple[int, Optional[int]]]] = None):
+        self.db_engine = db_engine or engine
+        self.pool_usage = pool_usage_fn or pool_usage
+        self.db_ok: Optional[bool] = None
+        self.db_error: Optional[str] = None
+        self.db_latency_ms: Optional[float] = None
+        self.db_checked_at: Optional[float] = None
+        self.lag_samples = deque(maxlen=LAG_WINDOW)
+
+    def check_database(self):
+        """Run SELECT 1 and record the outcome; blocking, run it in a thread"""
+        started = time.perf_counter()
+        try:
+            with self.db_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as exc:
+            self.record_database(False, error=f"{type(exc).__name__}: {exc}"[:300])
+        else:
+            self.record_database(True, latency_ms=(time.perf_counter() - started) * 1000)
+
+    def record_database(self, ok: bool, latency_ms: Optional[float] = None, error: Optional[str] = None):
+        if ok is False and self.db_ok is not False:
+            logger.warning(f"Database check failed: {error}")
+        self.db_ok, self.db_latency_ms, self.db_error = ok, latency_ms, error
+        self.db_checked_at = time.monotonic()
+
+    def record_lag(self, lag_ms: float):
+        self.lag_samples.append(max(0.0, lag_ms))
+
+    @property
+    def loop_lag_ms(self) -> float:
+        return max(self.lag_samples, default=0.0)
+
+    def readiness(self) -> dict:
+        """Readiness report; "reasons" lists what keeps the instance out of rotation"""
+        reasons = []
+        checked_ago = None if self.db_checked_at is None else time.monotonic() - self.db_checked_at
+        stale_after = 3 * settings.health_check_interval_seconds + settings.health_db_timeout_seconds
+        if checked_ago is None:
+            reasons.append("database not checked yet")
+        elif checked_ago > stale_after:
+            reasons.append(f"database check is {checked_ago:.0f}s old")
+        elif not self.db_ok:
+            reasons.append(f"database unreachable: {self.db_error}")
+
+        checked_out, capacity = self.pool_usage()
+        if capacity and settings.health_max_pool_usage > 0 and checked_out >= capacity * settings.health_max_pool_usage:
+            reasons.append(f"connection pool saturated ({checked_out}/{capacity})")
+
+        lag_ms = self.loop_lag_ms
+        if settings.health_max_loop_lag_ms > 0 and lag_ms > settings.health_max_loop_lag_ms:
+            reasons.append(f"event loop lag {lag_ms:.0f} ms")
+
+        return {
+            "status": "not_ready" if reasons else "ready",
+            "reasons": reasons,
+            "database": {
+                "reachable": self.db_ok,
+                "latency_ms": round(self.db_latency_ms, 1) if self.db_latency_ms is not None else None,
+                "checked_seconds_ago": round(checked_ago, 1) if checked_ago is not None else None,
+            },
+            "pool": {"checked_out": checked_out, "capacity": capacity},
+            "event_loop_lag_ms": round(lag_ms, 1),
+        }
+
+
+health_monitor = HealthMonitor()
+
+
+async def database_check_loop(interval_seconds: float, timeout_seconds: float):
+    """Check the database right away and then periodically; a hung check counts as a failure"""
+    check = None
+    while True:
+        # A check stuck on a dead connection is waited for, never stacked up
+        if check is None or check.done():
+            check = asyncio.create_task(run_in_threadpool(health_monitor.check_database))
+        try:
+            await asyncio.wait_for(asyncio.shield(check), timeout_seconds)
+        except asyncio.TimeoutError:
+            health_monitor.record_database(False, error=f"no response within {timeout_seconds}s")
+        except Exception:
+            logger.exception("Database health check failed")
+        await asyncio.sleep(interval_seconds)
+
+
+async def event_loop_lag_loop(tick_seconds: float = LAG_TICK_SECONDS):
+    """Measure how much later than scheduled the event loop wakes up"""
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(tick_seconds)
+        health_monitor.record_lag((time.monotonic() - started - tick_seconds) * 1000)
@@ -0,0 +1,98 @@
+"""Idempotency keys for retry-safe worker calls.
+
+Responses are stored in the idempotency_keys table in the same transaction as
+the change they describe, and cached in-process so a retry is usually answered
+without touching the database. Other processes fall back to the table.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import IdempotencyRecord
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+class IdempotencyCache:
+    """Bounded in-process cache of responses with a time-to-live"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            response, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: dict):
+        with self._lock:
+            self._entries[key] = (response, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = IdempotencyCache(settings.idempotency_cache_size, settings.idempotency_ttl_hours * 3600)
+
+
+def scoped_key(endpoint: str, job_id: str, idempotency_key: Optional[str]) -> Optional[str]:
+    """Namespace a client key by endpoint and job so keys cannot collide across calls"""
+    if not idempotency_key:
+        return None
+    return f"{endpoint}:{job_id}:{idempotency_key}"
+
+
+def lookup(db: Session, key: Optional[str]) -> Optional[dict]:
+    """Return the stored response for a key, checking the in-process cache first"""
+    if key is None:
+        return None
+
+    response = response_cache.get(key)
+    if response is not None:
+        return response
+
+    record = db.get(IdempotencyRecord, key)
+    if record is None:
+        return None
+    response_cache.set(key, record.response)
+    return record.response
+
+
+def commit_with_key(db: Session, key: Optional[str], response: dict) -> dict:
+    """Commit the session, storing the response under the key in the same transaction"""
+    if key is None:
+        db.commit()
+        return response
+
+    db.add(IdempotencyRecord(key=key, response=response))
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent duplicate committed first; replay its response
+        db.rollback()
+        stored = lookup(db, key)
+        if stored is None:
+            raise
+        return stored
+
+    response_cache.set(key, response)
+    return response
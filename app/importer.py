@@ -0,0 +1,564 @@
+"""Bulk import of the legacy worker database.json.
+
+The file is parsed incrementally, one record at a time, so it is never held
+in memory. Supported layouts:
+
+    {"videos": [...], "jobs": [...]}       sections as lists
+    {"videos": {"<id>": {...}}, ...}       sections keyed by id
+    {"<id>": {"url": ...}, ...}            videos keyed by id
+    [{...}, ...]                           a list of videos
+
+Records are mapped onto videos, video_metadata, channels, video_ratings and
+jobs and written in batches of multi-row upserts keyed by id, so an import
+can be repeated safely: stored jobs are left alone and a stored video only
+takes a record's status, transcript and insights when the record is further
+along (pending < processing < completed/failed). A video gets at most one
+pending job per type, and jobs read before their video wait for it. Written
+videos and new jobs appear in the change feed. Channel rollups are rebuilt
+once the whole file is loaded. After every committed batch the number of
+consumed records is saved to a checkpoint file; an interrupted import
+started again with the same file skips what was already loaded.
+
+    python -m app.importer ../worker/database.json --batch-size 2000
+"""
+import argparse
+import codecs
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal, upsert_insert
+from .models import Video, VideoMetadata, Channel, Job, VideoRating
+from .models.channel import CHANNEL_FIELDS
+from .models.video import HOT_METADATA_FIELDS
+from .models.video_metadata import METADATA_FIELDS
+from .channels import recompute_rollups
+from .insight_cache import transcript_hash
+from .changes import log_changes
+from .ratings import ANONYMOUS_RATER
+from .backpressure import reconcile_counters
+from .sources import source_for
+
+logger = logging.getLogger(__name__)
+
+LEGACY_SECTIONS = ("videos", "jobs")
+FINISHED_STATUSES = ("completed", "failed")
+LEGACY_STATUS_ALIASES = {"error": "failed", "done": "completed"}
+
+IMPORT_BATCH_SIZE = 1000
+READ_CHUNK_SIZE = 1 << 20
+# A value still undecodable with this much buffered is malformed, not just incomplete
+MAX_VALUE_SIZE = 64 << 20
+
+# Ratings of videos that already exist are left alone, their votes may have changed since
+RATING_COLUMNS = ("rating", "rating_sum", "rating_count", "rating_bayes")
+
+# Progress of videos that already exist is only replaced by a record that is further along,
+# so a re-import never sends a processed video back to pending or empties its transcript
+STATUS_RANK = {"pending": 0, "processing": 1, "completed": 2, "failed": 2}
+PROGRESS_COLUMNS = ("status", "processing_stage", "error", "transcript", "transcript_hash", "insights", "updated_at")
+
+# Set only by transcript offloading, never by a legacy record
+STORED_ONLY_COLUMNS = ("transcript_offloaded",)
+
+_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    """Pull parser over a binary JSON file that decodes one value at a time"""
+
+    def __init__(self, f, chunk_size: int = READ_CHUNK_SIZE, max_value_size: int = MAX_VALUE_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.text = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        if not chunk:
+            self.eof = True
+            self.buf += self.text.decode(b"", final=True)
+            return False
+        # Drop the consumed prefix so the buffer stays around one chunk
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += self.text.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it, "" at end of input"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} near byte {self.bytes_read}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number ending exactly at the buffer end may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as exc:
+                if self.eof:
+                    raise
+                if len(self.buf) - self.pos > self.max_value_size:
+                    raise ValueError(f"Malformed JSON near byte {self.bytes_read}: {exc.msg}") from exc
+            self._fill()
+
+    def array(self) -> Iterator:
+        """Values of the array starting at the current position"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+    def keys(self) -> Iterator[str]:
+        """Keys of the object at the current position; the caller consumes each value"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.expect(",}") == "}":
+                return
+
+
+def iter_records(stream: _JsonStream) -> Iterator[Tuple[str, dict]]:
+    """(section, record) pairs of a legacy database file, section being "videos" or "jobs\""""
+    if stream.peek() == "[":
+        for record in stream.array():
+            yield "videos", record
+        return
+
+    for key in stream.keys():
+        if key not in LEGACY_SECTIONS:
+            # Top-level videos keyed by id; anything else is skipped
+            value = stream.value()
+            if isinstance(value, dict) and "url" in value:
+                yield "videos", {"id": key, **value}
+            continue
+        if stream.peek() == "[":
+            for record in stream.array():
+                yield key, record
+        else:
+            for record_id in stream.keys():
+                record = stream.value()
+                yield key, {"id": record_id, **record} if isinstance(record, dict) else record
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value, timezone.utc)
+        parsed = datetime.fromisoformat(str(value))
+    except (ValueError, OverflowError, OSError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _status(value) -> str:
+    # Nothing is still working on legacy "processing" records, so they are queued again
+    status = LEGACY_STATUS_ALIASES.get(value, value)
+    return status if status in FINISHED_STATUSES else "pending"
+
+
+def map_video(record: dict) -> Optional[dict]:
+    """Map a legacy video record to rows of each table, None if it cannot be imported"""
+    if not isinstance(record, dict) or not record.get("id") or not record.get("url"):
+        return None
+    # Metadata may be flat on the record or nested as in worker results
+    fields = {**(record.get("metadata") or {}), **record}
+    created_at = _parse_datetime(fields.get("created_at")) or datetime.now(timezone.utc)
+    status = _status(fields.get("status"))
+    transcript = fields.get("transcript")
+    rating = fields.get("rating")
+    rating = rating if isinstance(rating, int) and 1 <= rating <= 5 else None
+
+    video = {column.key: None for column in Video.__table__.columns}
+    video.update({key: fields.get(key) for key in HOT_METADATA_FIELDS})
+    video.update(
+        id=str(record["id"]),
+        url=fields["url"],
+        status=status,
+        processing_stage=fields.get("processing_stage") if status == "completed" else None,
+        created_at=created_at,
+        updated_at=_parse_datetime(fields.get("updated_at")),
+        transcript=transcript,
+        transcript_offloaded=False,
+        transcript_hash=transcript_hash(transcript) if transcript else None,
+        insights=fields.get("insights"),
+        error=fields.get("error"),
+        rating=rating,
+        rating_sum=rating or 0,
+        rating_count=1 if rating else 0,
+    )
+    if rating:
+        weight, mean = settings.rating_prior_weight, settings.rating_prior_mean
+        video["rating_bayes"] = (weight * mean + rating) / (weight + 1)
+
+    metadata = None
+    if any(fields.get(key) is not None for key in METADATA_FIELDS):
+        metadata = {"id": video["id"], **{key: fields.get(key) for key in METADATA_FIELDS}}
+
+    channel = None
+    if video["channel_id"]:
+        channel = {"channel_id": video["channel_id"], "name": video["channel"]}
+        channel.update({column: fields.get(key) for key, column in CHANNEL_FIELDS.items()})
+
+    return {"video": video, "metadata": metadata, "channel": channel}
+
+
+def map_job(record: dict) -> Optional[dict]:
+    """Map a legacy job record to a jobs row, None if it cannot be imported"""
+    if not isinstance(record, dict) or not record.get("id") or not record.get("video_id"):
+        return None
+    status = _status(record.get("status"))
+    finished = status in FINISHED_STATUSES
+    error = record.get("error_message") or record.get("error")
+    created_at = _parse_datetime(record.get("created_at")) or datetime.now(timezone.utc)
+    return {
+        "id": str(record["id"]),
+        "video_id": str(record["video_id"]),
+        "status": status,
+        "job_type": record.get("job_type") if record.get("job_type") in ("process", "insights") else "process",
+        "created_at": created_at,
+        "run_after": created_at,
+        "attempts": 1 if finished else 0,
+        "source": None,
+        "updated_at": _parse_datetime(record.get("updated_at")),
+        "started_at": _parse_datetime(record.get("started_at")) if finished else None,
+        "completed_at": _parse_datetime(record.get("completed_at")) if finished else None,
+        "worker_id": record.get("worker_id") if finished else None,
+        "error_message": str(error)[:1000] if error else None,
+        "progress": record.get("progress") if finished else None,
+        "stage_history": None,
+    }
+
+
+def queued_job(video: dict) -> dict:
+    """Pending process job for an unfinished legacy video, with an id stable across re-imports"""
+    return {
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"legacy-job:{video['id']}")),
+        "video_id": video["id"],
+        "status": "pending",
+        "job_type": "process",
+        "created_at": video["created_at"],
+        "run_after": video["created_at"],
+        "attempts": 0,
+        "source": source_for(video["url"], video.get("extractor")),
+        "updated_at": None,
+        "started_at": None,
+        "completed_at": None,
+        "worker_id": None,
+        "error_message": None,
+        "progress": None,
+        "stage_history": None,
+    }
+
+
+def _status_rank(column):
+    return case(STATUS_RANK, value=column, else_=0)
+
+
+def _upsert(db: Session, model, rows, keys, update_columns=None, keep_stored=(), advance_only=()):
+    """Multi-row INSERT ... ON CONFLICT; keep_stored columns only take non-null values, advance_only ones a higher status.
+
+    Returns True when the rows were written by a Core statement, which the change log hook does not see.
+    """
+    if not rows:
+        return False
+    table = model.__table__
+    columns = update_columns if update_columns is not None else [key for key in rows[0] if key not in keys]
+    # Core executemany on the table skips the ORM's per-row bulk bookkeeping
+    stmt = upsert_insert(db, table)
+    if stmt is None:
+        for row in rows:
+            stored = db.get(model, tuple(row[key] for key in keys))
+            if stored is None:
+                db.add(model(**row))
+                continue
+            advances = advance_only and STATUS_RANK.get(row["status"], 0) > STATUS_RANK.get(stored.status, 0)
+            for column in columns:
+                if (column in keep_stored and row[column] is None) or (column in advance_only and not advances):
+                    continue
+                setattr(stored, column, row[column])
+        db.flush()
+        return False
+
+    advances = _status_rank(stmt.excluded.status) > _status_rank(table.c.status) if advance_only else None
+    set_ = {}
+    for column in columns:
+        value = stmt.excluded[column]
+        if column in keep_stored:
+            value = func.coalesce(value, table.c[column])
+        if column in advance_only:
+            value = case((advances, value), else_=table.c[column])
+        set_[column] = value
+    stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_=set_) if set_ else stmt.on_conflict_do_nothing(index_elements=list(keys))
+    db.execute(stmt, rows)
+    return True
+
+
+def _drop_duplicate_pending(db: Session, jobs: list) -> list:
+    """Keep one pending job per video and job type; a job already active in the database wins, then the earliest"""
+    pending = [job for job in jobs if job["status"] == "pending"]
+    if not pending:
+        return jobs
+    active = db.query(Job.id, Job.video_id, Job.job_type).filter(
+        Job.video_id.in_({job["video_id"] for job in pending}),
+        Job.status.in_(("pending", "processing")),
+    ).all()
+    holders = {(video_id, job_type): job_id for job_id, video_id, job_type in active}
+    return [
+        job for job in jobs
+        if job["status"] != "pending" or holders.setdefault((job["video_id"], job["job_type"]), job["id"]) == job["id"]
+    ]
+
+
+class _Batch:
+    """Mapped records waiting to be written, deduplicated by primary key"""
+
+    def __init__(self):
+        self.videos = {}
+        self.metadata = {}
+        self.channels = {}
+        self.jobs = {}
+        self.job_records = {}  # Job id -> number of the record it came from
+        self.queued = []  # Unfinished videos that get a pending job unless one is already active
+
+    def __len__(self):
+        return len(self.videos) + len(self.jobs)
+
+    def add_video(self, mapped: dict, queue_unfinished: bool):
+        video = mapped["video"]
+        self.videos[video["id"]] = video
+        if mapped["metadata"]:
+            self.metadata[video["id"]] = mapped["metadata"]
+        if mapped["channel"]:
+            channel = self.channels.setdefault(mapped["channel"]["channel_id"], {})
+            channel.update({key: value for key, value in mapped["channel"].items() if value is not None or key not in channel})
+        if queue_unfinished and video["status"] not in FINISHED_STATUSES:
+            self.queued.append(video["id"])
+
+    def add_job(self, job: dict, record: int):
+        self.jobs[job["id"]] = job
+        self.job_records[job["id"]] = record
+
+    def write(self, db: Session) -> Tuple[int, int, int, dict]:
+        """Upsert the batch.
+
+        Returns the number of videos and jobs written, the number of duplicate pending jobs dropped
+        and the jobs whose video is neither in the batch nor in the database yet.
+        """
+        video_ids = list(self.videos)
+        now = datetime.now(timezone.utc)
+        channel_rows = [
+            {"channel_id": channel_id, "name": None, "follower_count": None, "subscriber_count": None,
+             "created_at": now, **values}
+            for channel_id, values in self.channels.items()
+        ]
+        _upsert(db, Channel, channel_rows, ["channel_id"],
+                update_columns=["name", "follower_count", "subscriber_count"],
+                keep_stored=("name", "follower_count", "subscriber_count"))
+
+        videos = list(self.videos.values())
+        update_columns = [
+            key for key in videos[0] if key != "id" and key not in RATING_COLUMNS and key not in STORED_ONLY_COLUMNS
+        ] if videos else []
+        stored_videos = dict(db.query(Video.id, Video.status).filter(Video.id.in_(video_ids)).all()) if video_ids else {}
+        if _upsert(db, Video, videos, ["id"], update_columns=update_columns, advance_only=PROGRESS_COLUMNS):
+            log_changes(db, "video", [(video_id, video_id) for video_id in video_ids if video_id not in stored_videos], "insert")
+            log_changes(db, "video", [(video_id, video_id) for video_id in stored_videos], "update")
+        _upsert(db, VideoMetadata, list(self.metadata.values()), ["id"])
+        votes = [
+            {"video_id": video["id"], "rater_id": ANONYMOUS_RATER, "rating": video["rating"], "created_at": now}
+            for video in videos if video["rating"]
+        ]
+        _upsert(db, VideoRating, votes, ["video_id", "rater_id"], update_columns=[])
+
+        # Jobs whose video is neither in this batch nor in the database wait for a later batch
+        jobs = list(self.jobs.values())
+        referenced = {job["video_id"] for job in jobs} - set(video_ids)
+        known = set(db.scalars(select(Video.id).where(Video.id.in_(referenced)))) if referenced else set()
+        orphans = {job["id"]: job for job in jobs if job["video_id"] not in known and job["video_id"] not in self.videos}
+        jobs = [job for job in jobs if job["id"] not in orphans]
+        # Queued after the file's own jobs, so a legacy pending job of the video takes precedence
+        jobs += [
+            queued_job(self.videos[video_id]) for video_id in self.queued
+            if stored_videos.get(video_id) not in FINISHED_STATUSES
+        ]
+        kept = _drop_duplicate_pending(db, jobs)
+        # Only jobs from the file count as skipped; a dropped synthesized job was never a record
+        duplicates = len(({job["id"] for job in jobs} - {job["id"] for job in kept}) & set(self.job_records))
+        jobs = kept
+        for job in jobs:
+            # Legacy jobs carry no URL; their source comes from a video of the same batch when there is one
+            video = self.videos.get(job["video_id"])
+            if job["source"] is None and job["job_type"] == "process" and video:
+                job["source"] = source_for(video["url"], video.get("extractor"))
+        # Stored jobs may be claimed or finished by now and are never reset
+        job_ids = [job["id"] for job in jobs]
+        stored_jobs = set(db.scalars(select(Job.id).where(Job.id.in_(job_ids)))) if job_ids else set()
+        if _upsert(db, Job, jobs, ["id"], update_columns=[]):
+            log_changes(db, "job", [(job["id"], job["video_id"]) for job in jobs if job["id"] not in stored_jobs], "insert")
+        db.commit()
+        return len(videos), len(jobs), duplicates, orphans
+
+
+def _read_checkpoint(checkpoint_path: str, source: dict) -> int:
+    try:
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return 0
+    if checkpoint.get("source") != source:
+        logger.warning(f"Ignoring checkpoint {checkpoint_path} written for a different file")
+        return 0
+    return checkpoint.get("records", 0)
+
+
+def _write_checkpoint(checkpoint_path: str, source: dict, records: int):
+    # Replace atomically so an interrupted write never leaves a corrupt checkpoint
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"source": source, "records": records, "updated_at": datetime.now(timezone.utc).isoformat()}, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def import_file(
+    db: Session,
+    path: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    checkpoint_path: Optional[str] = None,
+    queue_unfinished: bool = True,
+) -> dict:
+    """Import a legacy database file, resuming from its checkpoint if one exists"""
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+    total_bytes = os.path.getsize(path)
+    source = {"path": os.path.abspath(path), "size": total_bytes}
+    resume_from = _read_checkpoint(checkpoint_path, source)
+    if resume_from:
+        logger.info(f"Resuming {path} after {resume_from} records")
+
+    result = {"videos": 0, "jobs": 0, "skipped": 0, "resumed_from": resume_from}
+    batch = _Batch()
+    records = 0
+    started = time.monotonic()
+
+    deferred = {}  # Job id -> (record number, job) for jobs read before their video
+
+    def flush():
+        for job_id, (record, job) in list(deferred.items()):
+            if job["video_id"] in batch.videos:
+                batch.add_job(job, record)
+                del deferred[job_id]
+        videos, jobs, duplicates, orphans = batch.write(db)
+        result["videos"] += videos
+        result["jobs"] += jobs
+        result["skipped"] += duplicates
+        deferred.update({job_id: (batch.job_records[job_id], job) for job_id, job in orphans.items()})
+        # A resumed import reads deferred jobs again
+        _write_checkpoint(checkpoint_path, source, min([records] + [record - 1 for record, _ in deferred.values()]))
+        elapsed = max(time.monotonic() - started, 1e-9)
+        logger.info(
+            f"Imported {records} records ({stream.bytes_read * 100 // max(total_bytes, 1)}% of {path}), "
+            f"{(records - resume_from) / elapsed:.0f} records/s"
+        )
+
+    with open(path, "rb") as f:
+        stream = _JsonStream(f)
+        for section, record in iter_records(stream):
+            records += 1
+            if records <= resume_from:
+                continue
+            if section == "videos":
+                mapped = map_video(record)
+                if mapped:
+                    batch.add_video(mapped, queue_unfinished)
+            else:
+                mapped = map_job(record)
+                if mapped:
+                    batch.add_job(mapped, records)
+            if not mapped:
+                result["skipped"] += 1
+            if len(batch) >= batch_size:
+                flush()
+                batch = _Batch()
+        if len(batch):
+            flush()
+
+    if deferred:
+        result["skipped"] += len(deferred)
+        logger.warning(
+            f"Skipped {len(deferred)} jobs whose video is neither in the file nor in the database: "
+            f"{', '.join(sorted(deferred)[:20])}"
+        )
+
+    # Rebuilt once at the end: per-batch recomputation would rescan growing channels over and over
+    recompute_rollups(db)
+    db.commit()
+    # Queued legacy jobs bypassed admission
+    reconcile_counters(db)
+
+    # A finished import leaves nothing to resume
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import the legacy worker database.json")
+    parser.add_argument("path", help="Legacy database.json")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Records per committed batch")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file, defaults to <path>.checkpoint")
+    parser.add_argument("--no-queue", action="store_true", help="Do not create pending jobs for unfinished videos")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        result = import_file(db, args.path, args.batch_size, args.checkpoint, not args.no_queue)
+    finally:
+        db.close()
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Cache of generated insights keyed by transcript hash and prompt version.
+
+Identical transcripts (re-submitted videos, regeneration without changes)
+reuse stored insights instead of another LLM call. Entries are evicted in
+least-recently-used order by the retention pass once the configured entry
+count or total size is exceeded.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func, select, update, delete, tuple_
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import upsert_insert
+from .models import InsightCacheEntry
+
+
+def transcript_hash(transcript: str) -> str:
+    """Content hash identifying a transcript"""
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+class InsightCacheStats:
+    """Hit and miss counters of this process"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+stats = InsightCacheStats()
+
+
+def lookup(db: Session, content_hash: str, prompt_version: Optional[str] = None) -> Optional[dict]:
+    """Return cached insights and mark the entry as used, or None on a miss"""
+    prompt_version = prompt_version or settings.insight_prompt_version
+    entry = db.get(InsightCacheEntry, (content_hash, prompt_version))
+    stats.record(entry is not None)
+    if entry is None:
+        return None
+
+    # Atomic increment so concurrent hits are all counted
+    db.execute(
+        update(InsightCacheEntry)
+        .where(
+            InsightCacheEntry.transcript_hash == content_hash,
+            InsightCacheEntry.prompt_version == prompt_version,
+        )
+        .values(hit_count=InsightCacheEntry.hit_count + 1, last_used_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    return entry.insights
+
+
+def store(db: Session, content_hash: str, insights: dict, prompt_version: Optional[str] = None):
+    """Insert or replace the cached insights for a transcript; the caller commits"""
+    prompt_version = prompt_version or settings.insight_prompt_version
+    now = datetime.now(timezone.utc)
+    values = {
+        "insights": insights,
+        "size_bytes": len(json.dumps(insights, separators=(",", ":"))),
+        "last_used_at": now,
+    }
+
+    stmt = upsert_insert(db, InsightCacheEntry)
+    if stmt is None:
+        entry = db.get(InsightCacheEntry, (content_hash, prompt_version))
+        if entry is None:
+            db.add(InsightCacheEntry(transcript_hash=content_hash, prompt_version=prompt_version, created_at=now, **values))
+        else:
+            for key, value in values.items():
+                setattr(entry, key, value)
+        return
+
+    # Upsert: results for the same transcript may arrive concurrently from several workers
+    stmt = stmt.values(transcript_hash=content_hash, prompt_version=prompt_version, created_at=now, **values)
+    db.execute(stmt.on_conflict_do_update(index_elements=["transcript_hash", "prompt_version"], set_=values))
+
+
+def usage(db: Session) -> dict:
+    """Entry count and total size of the cache"""
+    entries, size_bytes = db.query(
+        func.count(), func.coalesce(func.sum(InsightCacheEntry.size_bytes), 0)
+    ).select_from(InsightCacheEntry).one()
+    return {"entries": entries, "size_bytes": int(size_bytes)}
+
+
+def evict(db: Session, max_entries: int, max_bytes: int, batch_size: int = 500) -> int:
+    """Delete least recently used entries until both limits are met"""
+    current = usage(db)
+    excess_entries = max(0, current["entries"] - max_entries) if max_entries else 0
+    excess_bytes = max(0, current["size_bytes"] - max_bytes) if max_bytes else 0
+    if not excess_entries and not excess_bytes:
+        return 0
+
+    victims = []
+    rows = db.execute(
+        select(InsightCacheEntry.transcript_hash, InsightCacheEntry.prompt_version, InsightCacheEntry.size_bytes)
+        .order_by(InsightCacheEntry.last_used_at)
+        .execution_options(yield_per=batch_size)
+    )
+    try:
+        for content_hash, prompt_version, size_bytes in rows:
+            if len(victims) >= excess_entries and excess_bytes <= 0:
+                break
+            victims.append((content_hash, prompt_version))
+            excess_bytes -= size_bytes
+    finally:
+        rows.close()
+
+    key = tuple_(InsightCacheEntry.transcript_hash, InsightCacheEntry.prompt_version)
+    for start in range(0, len(victims), batch_size):
+        db.execute(delete(InsightCacheEntry).where(key.in_(victims[start:start + batch_size])))
+    db.commit()
+    return len(victims)
@@ -1,27 +1,98 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import time
 
-from .database import engine, Base
-from .api import videos, worker
+from .database import engine, Base, replica_router, replica_health_loop, pool_usage, READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_HEADER
+from .api import videos, worker, changes, analytics, channels, debug
 from .config import settings
+from .compression import CompressionMiddleware, ContentNegotiationMiddleware, NegotiatedJSONResponse
+from .ratelimit import RateLimitMiddleware, RateLimitRule, AdmissionControlMiddleware, InMemoryRateLimitStore
+from .retention import retention_loop
+from .backpressure import park_promotion_loop
+from .retry import claim_expiry_loop
+from .eta import eta_refresh_loop
+from .profiling import QueryProfilingMiddleware
+from .health import health_monitor, database_check_loop, event_loop_lag_loop
 
-# Create tables on startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
+    # Schema is managed by migrations (python -m app.release); create_all is a development shortcut
+    if settings.create_tables_on_startup:
+        Base.metadata.create_all(bind=engine)
+
+    tasks = [
+        asyncio.create_task(database_check_loop(settings.health_check_interval_seconds, settings.health_db_timeout_seconds)),
+        asyncio.create_task(event_loop_lag_loop()),
+    ]
+    if settings.retention_interval_minutes > 0:
+        tasks.append(asyncio.create_task(retention_loop(settings.retention_interval_minutes)))
+    if replica_router.replicas:
+        tasks.append(asyncio.create_task(replica_health_loop(settings.replica_health_interval_seconds)))
+    if settings.queue_park_enabled:
+        tasks.append(asyncio.create_task(park_promotion_loop(settings.queue_park_interval_seconds)))
+    if settings.job_claim_timeout_seconds > 0:
+        tasks.append(asyncio.create_task(claim_expiry_loop(settings.job_claim_check_interval_seconds)))
+    tasks.append(asyncio.create_task(eta_refresh_loop(settings.eta_refresh_seconds)))
+
     yield
 
+    for task in tasks:
+        task.cancel()
+
 # Create FastAPI app
 app = FastAPI(
     title="Transcribe.Cafe Backend",
     description="Backend API for YouTube transcription service",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=NegotiatedJSONResponse
 )
 
+# Compress large responses (transcripts, insights, metadata)
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        level=settings.compression_level,
+    )
+
+# MessagePack for clients that Accept it, independent of compression
+app.add_middleware(ContentNegotiationMiddleware)
+
+def _per_process(limit: int) -> int:
+    """Split a limit across serving processes; in-memory buckets are not shared between them"""
+    return -(-limit // settings.workers)
+
+# Throttle submissions and status polling per client / API key
+rate_limit_store = InMemoryRateLimitStore()
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=rate_limit_store,
+        rules=[
+            RateLimitRule("submit", "POST", r"/api/videos/?", _per_process(settings.rate_limit_submit_per_minute), _per_process(settings.rate_limit_submit_burst)),
+            RateLimitRule("status", "GET", r"/api/videos/[^/]+/status", _per_process(settings.rate_limit_status_per_minute), _per_process(settings.rate_limit_status_burst)),
+            RateLimitRule("bulk_status", "POST", r"/api/videos/status", _per_process(settings.rate_limit_status_per_minute), _per_process(settings.rate_limit_status_burst)),
+        ],
+    )
+
+# Shed public load before it exhausts the DB pool; worker endpoints are exempt
+app.add_middleware(
+    AdmissionControlMiddleware,
+    pool_usage=pool_usage,
+    max_inflight=settings.admission_max_inflight,
+    worker_reserve=settings.admission_worker_reserve,
+    retry_after_seconds=settings.admission_retry_after_seconds,
+)
+
+# Attribute SQL statements to routes for the slow-query log and N+1 detection
+if settings.db_profiling_enabled:
+    app.add_middleware(QueryProfilingMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -29,8 +100,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[READ_YOUR_WRITES_HEADER],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """Mark clients that just wrote so their next reads skip the replicas"""
+    response = await call_next(request)
+    is_write = request.method not in ("GET", "HEAD", "OPTIONS") and not getattr(request.state, "read_only", False)
+    if replica_router.replicas and is_write and response.status_code < 400:
+        marker = str(time.time())
+        response.headers[READ_YOUR_WRITES_HEADER] = marker
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            marker,
+            max_age=settings.read_your_writes_seconds,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
 # Log CORS configuration for transparency
 logger = logging.getLogger(__name__)
 logger.info(f"CORS configured with origins: {settings.cors_origins}")
@@ -38,6 +127,10 @@ logger.info(f"CORS configured with origins: {settings.cors_origins}")
 # Include routers
 app.include_router(videos.router, prefix="/api/videos", tags=["videos"])
 app.include_router(worker.router, prefix="/api/worker", tags=["worker"])
+app.include_router(changes.router, prefix="/api/changes", tags=["changes"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(channels.router, prefix="/api/channels", tags=["channels"])
+app.include_router(debug.router, prefix="/api/debug", tags=["debug"])
 
 @app.get("/health")
 async def health_check():
@@ -48,6 +141,17 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving, no dependencies checked"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe from cached background checks; 503 takes the instance out of rotation"""
+    report = health_monitor.readiness()
+    return JSONResponse(report, status_code=503 if report["reasons"] else 200)
+
 @app.get("/api/info")
 async def api_info():
     """API information and architecture type"""
@@ -65,6 +169,11 @@ async def api_info():
         "endpoints": {
             "videos": "/api/videos",
             "worker": "/api/worker",
+            "changes": "/api/changes",
+            "analytics": "/api/analytics",
+            "channels": "/api/channels",
+            "export": "/api/videos/export",
+            "debug": "/api/debug/queries",
             "docs": "/docs"
         }
     }
@@ -75,14 +184,10 @@ async def root():
     return {
         "message": "Transcribe.Cafe Backend API",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "readiness": "/health/ready"
     }
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host=settings.api_host,
-        port=settings.api_port,
-        reload=settings.debug
-    )
\ No newline at end of file
+    from .serve import main
+    main()
\ No newline at end of file
@@ -1,4 +1,16 @@
 from .video import Video
+from .video_metadata import VideoMetadata
+from .channel import Channel
 from .job import Job
+from .job_archive import JobArchive
+from .transcript_segment import TranscriptSegment
+from .transcript_archive import TranscriptArchive
+from .idempotency_record import IdempotencyRecord
+from .change_log import ChangeLogEntry
+from .insight_cache_entry import InsightCacheEntry
+from .video_rating import VideoRating
+from .queue_counter import QueueCounter
+from .parked_submission import ParkedSubmission
+from .source_slot import SourceSlot
 
-__all__ = ["Video", "Job"]
\ No newline at end of file
+__all__ = ["Video", "VideoMetadata", "Channel", "Job", "JobArchive", "TranscriptSegment", "TranscriptArchive", "IdempotencyRecord", "ChangeLogEntry", "InsightCacheEntry", "VideoRating", "QueueCounter", "ParkedSubmission", "SourceSlot"]
\ No newline at end of file
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, JSON
+from datetime import datetime, timezone
+from ..database import Base
+
+class ChangeLogEntry(Base):
+    """Append-only record of a change to a video or job, ordered by seq"""
+    __tablename__ = "change_log"
+
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    entity_type = Column(String(20), nullable=False)  # video, job
+    entity_id = Column(String(36), nullable=False)
+    video_id = Column(String(36), nullable=False)
+    operation = Column(String(10), nullable=False)  # insert, update, delete
+    changed_fields = Column(JSON)  # Attribute names for updates
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            "seq": self.seq,
+            "entity_type": self.entity_type,
+            "entity_id": self.entity_id,
+            "video_id": self.video_id,
+            "operation": self.operation,
+            "changed_fields": self.changed_fields,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
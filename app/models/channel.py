@@ -0,0 +1,42 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime
+from datetime import datetime, timezone
+from ..database import Base
+
+# yt-dlp metadata keys stored on the channel, mapped to Channel columns
+CHANNEL_FIELDS = {
+    "channel_follower_count": "follower_count",
+    "subscriber_count": "subscriber_count",
+}
+
+class Channel(Base):
+    """Channel shared by its videos, keyed by the extractor's channel_id"""
+    __tablename__ = "channels"
+
+    channel_id = Column(String(255), primary_key=True)
+    name = Column(String(255))
+    follower_count = Column(Integer)
+    subscriber_count = Column(Integer)
+    
+    # Rollups over the channel's videos, maintained incrementally (see app/channels.py)
+    video_count = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+    total_duration = Column(BigInteger, nullable=False, default=0, server_default="0")  # Seconds
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    latest_upload_date = Column(String(50), index=True)  # YYYYMMDD of the newest video
+    
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            "channel_id": self.channel_id,
+            "name": self.name,
+            "follower_count": self.follower_count,
+            "subscriber_count": self.subscriber_count,
+            "video_count": self.video_count or 0,
+            "total_duration": self.total_duration or 0,
+            "rating_count": self.rating_count or 0,
+            "average_rating": round(self.rating_sum / self.rating_count, 3) if self.rating_count else None,
+            "latest_upload_date": self.latest_upload_date,
+        }
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from datetime import datetime, timezone
+from ..database import Base
+
+class IdempotencyRecord(Base):
+    """Stored response of a worker request, replayed when the request is retried"""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(255), primary_key=True)  # "<endpoint>:<job_id>:<Idempotency-Key>"
+    response = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from datetime import datetime, timezone
+from ..database import Base
+
+class InsightCacheEntry(Base):
+    """Generated insights reused for identical transcripts under the same prompt version"""
+    __tablename__ = "insight_cache"
+
+    transcript_hash = Column(String(64), primary_key=True)  # sha256 hex of the transcript text
+    prompt_version = Column(String(50), primary_key=True)
+    insights = Column(JSON, nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    last_used_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, JSON, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 import uuid
@@ -10,30 +10,85 @@ class Job(Base):
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     video_id = Column(String(36), ForeignKey("videos.id"), nullable=False)
     status = Column(String(20), nullable=False, default="pending")  # pending, processing, completed, failed
+    job_type = Column(String(20), nullable=False, default="process", server_default="process")  # process, insights
+    tenant_id = Column(String(255))  # Submitting client, counted against the per-tenant queue cap
+    source = Column(String(100))  # Extractor or domain the job downloads from, for per-source concurrency
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
     started_at = Column(DateTime(timezone=True))
+    run_after = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))  # Not claimable before this
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")  # Claims so far
     completed_at = Column(DateTime(timezone=True))
     
     # Job metadata
     worker_id = Column(String(255))  # Identifier of the worker processing this job
     error_message = Column(String(1000))
     progress = Column(JSON)  # Progress information from worker
+    stage_history = Column(JSON)  # [[stage, started_epoch, ended_epoch or null], ...]
     
     # Relationship
     video = relationship("Video", backref="jobs")
 
+    __table_args__ = (
+        # Retention scans finished jobs by completion time
+        Index("ix_jobs_status_completed_at", "status", "completed_at"),
+        # Active-job lookups per video (bulk status, insight deduplication)
+        Index("ix_jobs_video_id_status", "video_id", "status"),
+        # Queue position counts
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+        # Claim listing of due jobs
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        # At most one queued and one running insights job per video
+        Index(
+            "uq_jobs_insights_pending",
+            "video_id",
+            unique=True,
+            postgresql_where=text("job_type = 'insights' AND status = 'pending'"),
+            sqlite_where=text("job_type = 'insights' AND status = 'pending'"),
+        ),
+        Index(
+            "uq_jobs_insights_processing",
+            "video_id",
+            unique=True,
+            postgresql_where=text("job_type = 'insights' AND status = 'processing'"),
+            sqlite_where=text("job_type = 'insights' AND status = 'processing'"),
+        ),
+    )
+
+    def enter_stage(self, stage: str, at: datetime):
+        """Close the open stage and start a new one; repeated reports of the same stage are ignored"""
+        history = list(self.stage_history or [])
+        if history and history[-1][2] is None:
+            if history[-1][0] == stage:
+                return
+            history[-1] = [history[-1][0], history[-1][1], round(at.timestamp(), 3)]
+        history.append([stage, round(at.timestamp(), 3), None])
+        self.stage_history = history
+
+    def close_stage(self, at: datetime):
+        """Mark the open stage as finished"""
+        history = list(self.stage_history or [])
+        if history and history[-1][2] is None:
+            history[-1] = [history[-1][0], history[-1][1], round(at.timestamp(), 3)]
+            self.stage_history = history
+
     def to_dict(self):
         """Convert model to dictionary for API responses"""
         return {
             "id": self.id,
             "video_id": self.video_id,
             "status": self.status,
+            "job_type": self.job_type,
+            "tenant_id": self.tenant_id,
+            "source": self.source,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "started_at": self.started_at.isoformat() if self.started_at else None,
+            "run_after": self.run_after.isoformat() if self.run_after else None,
+            "attempts": self.attempts,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "worker_id": self.worker_id,
             "error_message": self.error_message,
             "progress": self.progress,
+            "stage_history": self.stage_history,
         }
\ No newline at end of file
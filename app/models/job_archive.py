@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON
+from datetime import datetime, timezone
+from ..database import Base
+
+class JobArchive(Base):
+    """Cold storage for finished jobs moved out of the hot jobs table"""
+    __tablename__ = "jobs_archive"
+
+    id = Column(String(36), primary_key=True)
+    video_id = Column(String(36), nullable=False, index=True)
+    status = Column(String(20), nullable=False)
+    job_type = Column(String(20), nullable=False, server_default="process")
+    tenant_id = Column(String(255))
+    source = Column(String(100))
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    started_at = Column(DateTime(timezone=True))
+    run_after = Column(DateTime(timezone=True))
+    attempts = Column(Integer, nullable=False, server_default="0")
+    completed_at = Column(DateTime(timezone=True))
+    worker_id = Column(String(255))
+    error_message = Column(String(1000))
+    progress = Column(JSON)
+    stage_history = Column(JSON)
+    archived_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
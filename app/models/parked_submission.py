@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from datetime import datetime, timezone
+from ..database import Base
+
+class ParkedSubmission(Base):
+    """Accepted submission waiting outside the jobs table until the queue has room"""
+    __tablename__ = "parked_submissions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    video_id = Column(String(36), ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, unique=True)
+    tenant_id = Column(String(255))
+    source = Column(String(100))
+    priority = Column(String(20), nullable=False, default="normal")  # normal (over a queue cap), low
+    run_after = Column(DateTime(timezone=True))  # Requested schedule, carried over to the job
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
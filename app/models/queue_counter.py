@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, Integer
+from ..database import Base
+
+class QueueCounter(Base):
+    """Number of pending process jobs, globally and per tenant, maintained on enqueue and claim"""
+    __tablename__ = "queue_counters"
+
+    scope = Column(String(300), primary_key=True)  # "global" or "tenant:<tenant_id>"
+    pending = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, Integer
+from ..database import Base
+
+class SourceSlot(Base):
+    """Jobs of one source (extractor or domain) currently being processed"""
+    __tablename__ = "source_slots"
+
+    source = Column(String(100), primary_key=True)
+    in_flight = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime, LargeBinary, ForeignKey
+from datetime import datetime, timezone
+from ..database import Base
+
+class TranscriptArchive(Base):
+    """Compressed transcript and segments of a cold video, kept out of the videos table"""
+    __tablename__ = "transcript_archive"
+
+    video_id = Column(String(36), ForeignKey("videos.id"), primary_key=True)
+    transcript = Column(LargeBinary, nullable=False)  # gzip of the UTF-8 text
+    segments = Column(LargeBinary)  # gzip of the segments as JSON, null when the video had none
+    archived_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
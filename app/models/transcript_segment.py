@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, Float, Text, ForeignKey, Index
+from ..database import Base
+
+class TranscriptSegment(Base):
+    """Timestamped piece of a video transcript"""
+    __tablename__ = "transcript_segments"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    video_id = Column(String(36), ForeignKey("videos.id"), nullable=False)
+    position = Column(Integer, nullable=False)  # 0-based order within the transcript
+    start_time = Column(Float, nullable=False)  # Seconds from the start of the video
+    end_time = Column(Float, nullable=False)
+    text = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_transcript_segments_video_position", "video_id", "position", unique=True),
+        Index("ix_transcript_segments_video_start", "video_id", "start_time"),
+        Index("ix_transcript_segments_video_end", "video_id", "end_time"),
+    )
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses"""
+        return {
+            "index": self.position,
+            "start": self.start_time,
+            "end": self.end_time,
+            "text": self.text,
+        }
@@ -1,8 +1,16 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, JSON, Float, Boolean
+from sqlalchemy import Column, String, Integer, Float, Text, Boolean, DateTime, JSON, ForeignKey, Index, false
+from sqlalchemy.ext.associationproxy import association_proxy
+from sqlalchemy.orm import relationship, object_session
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime, timezone
 import uuid
 from ..database import Base
+from .. import transcript_store
+from .video_metadata import VideoMetadata, METADATA_FIELDS
+from .channel import Channel, CHANNEL_FIELDS
+
+# Metadata keys stored directly on the videos row
+HOT_METADATA_FIELDS = ("title", "duration", "channel", "channel_id", "view_count", "upload_date", "thumbnail", "extractor", "video_id")
 
 class Video(Base):
     __tablename__ = "videos"
@@ -19,68 +27,74 @@ class Video(Base):
     
     # Content
     transcript = Column(Text)
+    transcript_offloaded = Column(Boolean, nullable=False, default=False, server_default=false())  # Moved to transcript_archive
+    transcript_hash = Column(String(64))  # sha256 of the transcript, keys the insight cache
     insights = Column(JSON)
     error = Column(Text)
     
-    # Rating system (v1.1.0)
-    rating = Column(Integer)  # 1-5 stars
+    # Rating system (v1.1.0); per-rater votes live in video_ratings
+    rating = Column(Integer)  # Rounded mean of all votes, 1-5 stars
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_bayes = Column(Float)  # Bayesian average used for top-rated ordering, null without votes
     
-    # Basic metadata (v1.2.0)
-    uploader = Column(String(255))
+    # List-critical metadata; the rest lives in video_metadata and channels
     channel = Column(String(255))
-    channel_id = Column(String(255))
-    uploader_id = Column(String(255))
+    channel_id = Column(String(255), ForeignKey("channels.channel_id"))
     view_count = Column(Integer)
-    like_count = Column(Integer)
-    comment_count = Column(Integer)
-    subscriber_count = Column(Integer)
     upload_date = Column(String(50))
-    timestamp = Column(Integer)
-    release_timestamp = Column(Integer)
-    description = Column(Text)
-    tags = Column(JSON)  # List of strings
-    categories = Column(JSON)  # List of strings
-    video_id = Column(String(255))
-    webpage_url = Column(String(2048))
-    original_url = Column(String(2048))
+    thumbnail = Column(String(2048))
     extractor = Column(String(100))
-    extractor_key = Column(String(100))
+    video_id = Column(String(255))
     
-    # Technical metadata
-    resolution = Column(String(50))
-    width = Column(Integer)
-    height = Column(Integer)
-    fps = Column(Integer)
-    vcodec = Column(String(100))
-    acodec = Column(String(100))
-    filesize = Column(Integer)
-    filesize_approx = Column(Integer)
-    language = Column(String(10))
-    subtitles = Column(JSON)  # List of subtitle info
-    automatic_captions = Column(JSON)  # List of caption info
-    age_limit = Column(Integer)
-    availability = Column(String(50))
-    live_status = Column(String(50))
-    was_live = Column(Boolean)
-    playable_in_embed = Column(Boolean)
+    details = relationship(VideoMetadata, uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+    channel_ref = relationship(Channel, viewonly=True)
     
-    # Additional metadata
-    thumbnail = Column(String(2048))
-    thumbnails = Column(JSON)  # List of thumbnail objects
-    playlist = Column(String(255))
-    playlist_id = Column(String(255))
-    playlist_title = Column(String(500))
-    playlist_index = Column(Integer)
-    playlist_count = Column(Integer)
-    average_rating = Column(Float)
-    abr = Column(Float)  # Audio bitrate
-    vbr = Column(Float)  # Video bitrate
-    tbr = Column(Float)  # Total bitrate
-    channel_follower_count = Column(Integer)
-    chapters = Column(JSON)  # List of chapter objects
+    channel_follower_count = association_proxy("channel_ref", "follower_count")
+    subscriber_count = association_proxy("channel_ref", "subscriber_count")
+
+    __table_args__ = (
+        # Channel video listings and latest-upload recomputation
+        Index("ix_videos_channel_id_upload_date", "channel_id", "upload_date"),
+        # Keyset pagination of the top feeds
+        Index("ix_videos_rating_bayes_id", "rating_bayes", "id"),
+        Index("ix_videos_view_count_id", "view_count", "id"),
+        Index("ix_videos_created_at_id", "created_at", "id"),
+    )
+
+    def load_transcript(self):
+        """Return the transcript, reading it from the transcript archive if it was offloaded"""
+        if self.transcript is not None:
+            return self.transcript
+        if self.transcript_offloaded:
+            return transcript_store.load_transcript(object_session(self), self.id)
+        return None
+
+    def apply_metadata(self, metadata: dict) -> dict:
+        """Store known yt-dlp fields on the video or its metadata row.
 
-    def to_dict(self):
-        """Convert model to dictionary for API responses"""
+        Returns the channel-level fields (Channel column names), which the
+        caller upserts into channels.
+        """
+        channel_fields = {}
+        for key, value in metadata.items():
+            if key in HOT_METADATA_FIELDS:
+                setattr(self, key, value)
+            elif key in METADATA_FIELDS:
+                if self.details is None:
+                    self.details = VideoMetadata()
+                setattr(self.details, key, value)
+            elif key in CHANNEL_FIELDS:
+                channel_fields[CHANNEL_FIELDS[key]] = value
+        return channel_fields
+
+    def to_dict(self, include_metadata: bool = True, include_transcript: bool = True):
+        """Convert model to dictionary for API responses.
+
+        include_metadata loads video_metadata and channels; without
+        include_transcript the transcript is left out (None), so listings
+        never read transcript bodies.
+        """
         def safe_isoformat(dt):
             """Safely convert datetime to ISO format"""
             if dt is None:
@@ -90,7 +104,7 @@ class Video(Base):
             except (AttributeError, ValueError):
                 return None
         
-        return {
+        result = {
             "id": self.id,
             "title": self.title,
             "url": self.url,
@@ -99,58 +113,31 @@ class Video(Base):
             "processing_stage": self.processing_stage,
             "created_at": safe_isoformat(self.created_at),
             "updated_at": safe_isoformat(self.updated_at),
-            "transcript": self.transcript,
+            "transcript": self.load_transcript() if include_transcript else None,
             "insights": self.insights,
             "error": self.error,
             "rating": self.rating,
+            "rating_count": self.rating_count or 0,
+            "rating_bayes": self.rating_bayes,
             
             # Extended metadata
-            "uploader": self.uploader,
             "channel": self.channel,
             "channel_id": self.channel_id,
-            "uploader_id": self.uploader_id,
             "view_count": self.view_count,
-            "like_count": self.like_count,
-            "comment_count": self.comment_count,
-            "subscriber_count": self.subscriber_count,
             "upload_date": self.upload_date,
-            "timestamp": self.timestamp,
-            "release_timestamp": self.release_timestamp,
-            "description": self.description,
-            "tags": self.tags,
-            "categories": self.categories,
-            "video_id": self.video_id,
-            "webpage_url": self.webpage_url,
-            "original_url": self.original_url,
-            "extractor": self.extractor,
-            "extractor_key": self.extractor_key,
-            "resolution": self.resolution,
-            "width": self.width,
-            "height": self.height,
-            "fps": self.fps,
-            "vcodec": self.vcodec,
-            "acodec": self.acodec,
-            "filesize": self.filesize,
-            "filesize_approx": self.filesize_approx,
-            "language": self.language,
-            "subtitles": self.subtitles,
-            "automatic_captions": self.automatic_captions,
-            "age_limit": self.age_limit,
-            "availability": self.availability,
-            "live_status": self.live_status,
-            "was_live": self.was_live,
-            "playable_in_embed": self.playable_in_embed,
             "thumbnail": self.thumbnail,
-            "thumbnails": self.thumbnails,
-            "playlist": self.playlist,
-            "playlist_id": self.playlist_id,
-            "playlist_title": self.playlist_title,
-            "playlist_index": self.playlist_index,
-            "playlist_count": self.playlist_count,
-            "average_rating": self.average_rating,
-            "abr": self.abr,
-            "vbr": self.vbr,
-            "tbr": self.tbr,
-            "channel_follower_count": self.channel_follower_count,
-            "chapters": self.chapters,
-        }
\ No newline at end of file
+            "extractor": self.extractor,
+            "video_id": self.video_id,
+        }
+        if include_metadata:
+            result["channel_follower_count"] = self.channel_follower_count
+            result["subscriber_count"] = self.subscriber_count
+            for field in METADATA_FIELDS:
+                result[field] = getattr(self.details, field) if self.details else None
+        return result
+
+
+for _field in METADATA_FIELDS:
+    setattr(Video, _field, association_proxy(
+        "details", _field, creator=lambda value, field=_field: VideoMetadata(**{field: value})
+    ))
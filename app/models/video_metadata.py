@@ -0,0 +1,62 @@
+from sqlalchemy import Column, String, Integer, Text, JSON, Float, Boolean, ForeignKey
+from ..database import Base
+
+# Rarely read yt-dlp fields, exposed on Video through association proxies
+METADATA_FIELDS = (
+    "uploader", "uploader_id", "like_count", "comment_count", "timestamp", "release_timestamp",
+    "description", "tags", "categories", "webpage_url", "original_url", "extractor_key",
+    "resolution", "width", "height", "fps", "vcodec", "acodec", "filesize", "filesize_approx",
+    "language", "subtitles", "automatic_captions", "age_limit", "availability", "live_status",
+    "was_live", "playable_in_embed", "thumbnails", "playlist", "playlist_id", "playlist_title",
+    "playlist_index", "playlist_count", "average_rating", "abr", "vbr", "tbr", "chapters",
+)
+
+class VideoMetadata(Base):
+    """Wide, rarely read metadata of a video, kept out of the hot videos rows"""
+    __tablename__ = "video_metadata"
+
+    id = Column(String(36), ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)  # Same as videos.id
+    
+    uploader = Column(String(255))
+    uploader_id = Column(String(255))
+    like_count = Column(Integer)
+    comment_count = Column(Integer)
+    timestamp = Column(Integer)
+    release_timestamp = Column(Integer)
+    description = Column(Text)
+    tags = Column(JSON)  # List of strings
+    categories = Column(JSON)  # List of strings
+    webpage_url = Column(String(2048))
+    original_url = Column(String(2048))
+    extractor_key = Column(String(100))
+    
+    # Technical metadata
+    resolution = Column(String(50))
+    width = Column(Integer)
+    height = Column(Integer)
+    fps = Column(Integer)
+    vcodec = Column(String(100))
+    acodec = Column(String(100))
+    filesize = Column(Integer)
+    filesize_approx = Column(Integer)
+    language = Column(String(10))
+    subtitles = Column(JSON)  # List of subtitle info
+    automatic_captions = Column(JSON)  # List of caption info
+    age_limit = Column(Integer)
+    availability = Column(String(50))
+    live_status = Column(String(50))
+    was_live = Column(Boolean)
+    playable_in_embed = Column(Boolean)
+    
+    # Additional metadata
+    thumbnails = Column(JSON)  # List of thumbnail objects
+    playlist = Column(String(255))
+    playlist_id = Column(String(255))
+    playlist_title = Column(String(500))
+    playlist_index = Column(Integer)
+    playlist_count = Column(Integer)
+    average_rating = Column(Float)
+    abr = Column(Float)  # Audio bitrate
+    vbr = Column(Float)  # Video bitrate
+    tbr = Column(Float)  # Total bitrate
+    chapters = Column(JSON)  # List of chapter objects
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from datetime import datetime, timezone
+from ..database import Base
+
+class VideoRating(Base):
+    """One rater's current rating of a video"""
+    __tablename__ = "video_ratings"
+
+    video_id = Column(String(36), ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True)
+    rater_id = Column(String(255), primary_key=True)  # Request body, X-Rater-Id header, or "anonymous"
+    rating = Column(Integer, nullable=False)  # 1-5 stars
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime(timezone=True), onupdate=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,214 @@
+"""Opt-in SQL profiling on the engines' cursor events.
+
+With DB_PROFILING_ENABLED every statement is reduced to a fingerprint
+(literals and parameter lists replaced by ?) and timed. Per fingerprint
+the process keeps the execution count, cumulative and maximum time, a
+window of recent timings for the p95, and the routes it ran from.
+Statements slower than DB_SLOW_QUERY_MS are logged with their route. A
+SELECT that runs DB_N_PLUS_ONE_THRESHOLD times within one request is
+logged and counted as a likely N+1 (typically a lazy relationship load
+such as Job.video inside a loop). GET /api/debug/queries shows the top
+offenders of this process.
+"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Recent timings kept per fingerprint for the p95
+PROFILE_SAMPLES = 1000
+
+SORT_KEYS = {
+    "total": lambda stats: stats["total_ms"],
+    "count": lambda stats: stats["count"],
+    "p95": lambda stats: stats["p95_ms"],
+    "max": lambda stats: stats["max_ms"],
+}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_ROWS = re.compile(r"(\(\?(?:\.\.\.)?\))(?:\s*,\s*\1)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Statement text with literals, placeholders and IN lists normalized, so executions group together"""
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _PARAMETER.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _PARAMETER_LIST.sub("(?...)", text)
+    return _VALUES_ROWS.sub(r"\1, ...", text)
+
+
+class RequestProfile:
+    """Statements run while serving one request"""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.counts = Counter()
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the scope; before that only the raw path is known
+        route = self.scope.get("route")
+        return f"{self.scope.get('method', '')} {getattr(route, 'path', None) or self.scope.get('path', '')}".strip()
+
+
+_current_request: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "query_profile_request", default=None
+)
+
+
+class QueryProfiler:
+    """Statement statistics of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.n_plus_one = {}
+            self.requests = 0
+            self.since = datetime.now(timezone.utc)
+
+    def install(self, db_engine):
+        """Time every statement executed through the engine"""
+        event.listen(db_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(db_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def uninstall(self, db_engine):
+        event.remove(db_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(db_engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profiling_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_profiling_started", None)
+        if started is not None:
+            self.record(statement, (time.perf_counter() - started) * 1000)
+
+    def record(self, statement: str, elapsed_ms: float):
+        """Add one execution to the statistics and to the current request's profile"""
+        key = fingerprint(statement)
+        request = _current_request.get()
+        route = request.route if request else "background"
+
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                if len(self.statements) >= settings.db_profiling_max_statements:
+                    key = "(other statements)"
+                stats = self.statements.setdefault(key, {
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "samples": deque(maxlen=PROFILE_SAMPLES), "routes": Counter(),
+                })
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["samples"].append(elapsed_ms)
+            stats["routes"][route] += 1
+
+        if request is not None:
+            request.counts[key] += 1
+        if settings.db_slow_query_ms and elapsed_ms >= settings.db_slow_query_ms:
+            logger.warning(f"Slow query ({elapsed_ms:.1f} ms) in {route}: {key[:1000]}")
+
+    @contextmanager
+    def request(self, scope: dict):
+        """Attribute the statements run inside the block to one request"""
+        profile = RequestProfile(scope)
+        token = _current_request.set(profile)
+        try:
+            yield profile
+        finally:
+            _current_request.reset(token)
+            self.finish(profile)
+
+    def finish(self, profile: RequestProfile):
+        """Count the request and flag SELECTs it repeated often enough to be an N+1"""
+        threshold = settings.db_n_plus_one_threshold
+        suspects = [
+            (key, count) for key, count in profile.counts.items()
+            if threshold > 0 and count >= threshold and key.startswith("SELECT")
+        ]
+        route = profile.route
+        with self._lock:
+            self.requests += 1
+            for key, count in suspects:
+                pattern = self.n_plus_one.get((route, key))
+                if pattern is None:
+                    if len(self.n_plus_one) >= settings.db_profiling_max_statements:
+                        continue
+                    pattern = self.n_plus_one[(route, key)] = {"requests": 0, "max_repeats": 0}
+                pattern["requests"] += 1
+                pattern["max_repeats"] = max(pattern["max_repeats"], count)
+        for key, count in suspects:
+            logger.warning(f"Possible N+1 in {route}: statement ran {count} times: {key[:1000]}")
+
+    def snapshot(self, limit: int = 20, sort: str = "total") -> dict:
+        """Top statements by the sort key and the suspected N+1 patterns"""
+        with self._lock:
+            statements = []
+            for key, stats in self.statements.items():
+                samples = sorted(stats["samples"])
+                statements.append({
+                    "fingerprint": key,
+                    "count": stats["count"],
+                    "total_ms": round(stats["total_ms"], 3),
+                    "mean_ms": round(stats["total_ms"] / stats["count"], 3),
+                    "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "routes": dict(stats["routes"].most_common(5)),
+                })
+            n_plus_one = [
+                {"route": route, "fingerprint": key, **pattern}
+                for (route, key), pattern in self.n_plus_one.items()
+            ]
+            requests, since = self.requests, self.since
+
+        statements.sort(key=SORT_KEYS[sort], reverse=True)
+        n_plus_one.sort(key=lambda pattern: (pattern["requests"], pattern["max_repeats"]), reverse=True)
+        return {
+            "since": since.isoformat(),
+            "requests": requests,
+            "statements": statements[:limit],
+            "n_plus_one": n_plus_one[:limit],
+        }
+
+
+profiler = QueryProfiler()
+
+
+class QueryProfilingMiddleware:
+    """Attribute statements to the request being served"""
+
+    def __init__(self, app, query_profiler: Optional[QueryProfiler] = None):
+        self.app = app
+        self.profiler = query_profiler or profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with self.profiler.request(scope):
+            await self.app(scope, receive, send)
@@ -0,0 +1,171 @@
+"""Token-bucket rate limiting and load-shedding admission control"""
+import math
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+from .config import settings
+
+WORKER_PATH_PREFIX = "/api/worker"
+
+
+def client_address(headers: Headers, client: Optional[Tuple[str, int]]) -> str:
+    """Address of the caller as recorded by the outermost trusted proxy"""
+    peer = client[0] if client else "unknown"
+    hops = settings.proxy_hops
+    if hops <= 0:
+        return peer
+
+    # Each proxy appends the address it received the request from; anything left of that is client-supplied
+    entries = [
+        entry.strip()
+        for value in headers.getlist("x-forwarded-for")
+        for entry in value.split(",")
+        if entry.strip()
+    ]
+    if not entries:
+        return peer
+    return entries[-hops] if len(entries) >= hops else entries[0]
+
+
+def client_key(headers: Headers, client: Optional[Tuple[str, int]]) -> str:
+    """Identify the caller by a configured API key, falling back to the client address"""
+    api_key = headers.get("x-api-key")
+    if api_key and api_key in settings.api_keys:
+        return f"key:{api_key}"
+    return f"ip:{client_address(headers, client)}"
+
+
+class RateLimitStore(ABC):
+    """Storage for token buckets; subclass to share buckets between processes (e.g. Redis)"""
+
+    @abstractmethod
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """Take tokens from a bucket, returning 0 if allowed or seconds until enough tokens refill"""
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Process-local token buckets with LRU eviction of idle clients"""
+
+    def __init__(self, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        with self._lock:
+            now = self.clock()
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / rate
+
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+            return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+@dataclass
+class RateLimitRule:
+    """Limit for requests whose method and path match"""
+    name: str
+    method: str
+    path: str  # Regular expression matched against the full path
+    per_minute: int
+    burst: int
+
+    def __post_init__(self):
+        self._pattern = re.compile(self.path)
+
+    def matches(self, method: str, path: str) -> bool:
+        return method == self.method and self._pattern.fullmatch(path) is not None
+
+
+class RateLimitMiddleware:
+    """Reject requests over their rule's token bucket with 429 and Retry-After"""
+
+    def __init__(self, app, rules: List[RateLimitRule], store: Optional[RateLimitStore] = None):
+        self.app = app
+        self.rules = rules
+        self.store = store or InMemoryRateLimitStore()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            rule = next((r for r in self.rules if r.matches(scope["method"], scope["path"])), None)
+            if rule is not None and rule.per_minute > 0:
+                key = f"{rule.name}:{client_key(Headers(scope=scope), scope.get('client'))}"
+                retry_after = self.store.consume(key, rule.per_minute / 60.0, rule.burst)
+                if retry_after > 0:
+                    response = JSONResponse(
+                        {"detail": "Rate limit exceeded"},
+                        status_code=429,
+                        headers={"Retry-After": str(math.ceil(retry_after))},
+                    )
+                    await response(scope, receive, send)
+                    return
+
+        await self.app(scope, receive, send)
+
+
+class AdmissionControlMiddleware:
+    """Shed public API load with 503 when too many requests are in flight or the DB pool is saturated"""
+
+    def __init__(
+        self,
+        app,
+        pool_usage: Callable[[], Tuple[int, Optional[int]]],
+        max_inflight: int = 0,
+        worker_reserve: int = 2,
+        retry_after_seconds: int = 2,
+    ):
+        self.app = app
+        self.pool_usage = pool_usage
+        self.max_inflight = max_inflight
+        self.worker_reserve = worker_reserve
+        self.retry_after_seconds = retry_after_seconds
+        self.inflight = 0
+
+    def _overloaded(self) -> bool:
+        if self.max_inflight and self.inflight >= self.max_inflight:
+            return True
+        checked_out, capacity = self.pool_usage()
+        return capacity is not None and checked_out >= capacity - self.worker_reserve
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or not path.startswith("/api/") or path.startswith(WORKER_PATH_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        if self._overloaded():
+            response = JSONResponse(
+                {"detail": "Service overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.inflight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight -= 1
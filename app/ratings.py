@@ -0,0 +1,68 @@
+"""Per-rater video ratings and their aggregates on the video row.
+
+A vote is recorded as (video, rater) and changes the video's rating_sum and
+rating_count by its difference to the rater's previous vote. The new
+aggregates, the rounded mean and the Bayesian average are computed in the
+UPDATE from the stored values, so concurrent votes never overwrite each
+other's contribution.
+
+The rater is identified on the server, by a configured API key or else the
+client address as recorded by the trusted proxies, never by a value the
+client chooses.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import Float, Integer, case, cast, func
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+
+from .config import settings
+from .models import Video, VideoRating
+from .ratelimit import client_key
+
+# Rater of single ratings imported from the legacy store
+ANONYMOUS_RATER = "anonymous"
+
+
+def rater_id(headers: Headers, client: Optional[Tuple[str, int]]) -> Optional[str]:
+    """Digest of the caller's API key or address, None when the caller cannot be identified"""
+    key = client_key(headers, client)
+    if key == "ip:unknown":
+        return None
+    # Votes keep neither keys nor addresses
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def record_vote(db: Session, video_id: str, rater_id: str, rating: int) -> Tuple[int, int]:
+    """Store the rater's vote, returning the (sum, count) change it causes"""
+    vote = db.query(VideoRating).filter(
+        VideoRating.video_id == video_id,
+        VideoRating.rater_id == rater_id
+    ).first()
+
+    if vote is None:
+        db.add(VideoRating(video_id=video_id, rater_id=rater_id, rating=rating))
+        return rating, 1
+
+    delta = rating - vote.rating
+    vote.rating = rating
+    vote.updated_at = datetime.now(timezone.utc)
+    return delta, 0
+
+
+def apply_vote(video: Video, sum_delta: int, count_delta: int):
+    """Adjust the video's aggregates relative to their stored values at flush time.
+
+    rating_bayes = (prior_weight * prior_mean + sum) / (prior_weight + count) keeps
+    videos with a handful of votes from topping the ranking.
+    """
+    weight, mean = settings.rating_prior_weight, settings.rating_prior_mean
+    new_sum = Video.rating_sum + sum_delta
+    new_count = Video.rating_count + count_delta
+
+    video.rating_sum = new_sum
+    video.rating_count = new_count
+    video.rating_bayes = case((new_count > 0, (weight * mean + new_sum) / (weight + new_count)), else_=None)
+    video.rating = case((new_count > 0, cast(func.round(cast(new_sum, Float) / new_count), Integer)), else_=None)
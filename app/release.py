@@ -0,0 +1,67 @@
+"""One-shot release step: apply pending migrations once per deploy.
+
+Run before starting web processes (Railway preDeployCommand / Procfile release):
+
+    python -m app.release
+
+On PostgreSQL an advisory lock makes concurrent invocations wait for each
+other instead of racing on schema locks, and the step exits without running
+Alembic when the database is already at head.
+"""
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for the PostgreSQL advisory lock
+MIGRATION_LOCK_ID = 7_340_035
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def migrate(database_url: str = None) -> bool:
+    """Upgrade the database to head, returning False if it was already current"""
+    alembic_cfg = Config(ALEMBIC_INI)
+    heads = set(ScriptDirectory.from_config(alembic_cfg).get_heads())
+
+    migration_engine = create_engine(database_url or settings.database_url, poolclass=NullPool)
+    try:
+        with migration_engine.connect() as connection:
+            is_postgresql = connection.dialect.name == "postgresql"
+            if is_postgresql:
+                connection.execute(text("SELECT pg_advisory_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+            try:
+                current = set(MigrationContext.configure(connection).get_current_heads())
+                if current == heads:
+                    logger.info(f"Database already at head {sorted(heads)}, skipping migrations")
+                    return False
+
+                logger.info(f"Upgrading database from {sorted(current) or 'empty'} to {sorted(heads)}")
+                alembic_cfg.attributes["connection"] = connection
+                command.upgrade(alembic_cfg, "head")
+                connection.commit()
+                return True
+            finally:
+                if is_postgresql:
+                    connection.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+                    connection.commit()
+    finally:
+        migration_engine.dispose()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    migrate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Retention and archival of finished jobs and cold transcripts.
+
+Run once from the command line:
+
+    python -m app.retention --job-days 30 --transcript-days 90
+
+or enable the background task with RETENTION_INTERVAL_MINUTES.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, insert, delete, update, func
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .database import SessionLocal
+from .models import Video, Job, JobArchive, IdempotencyRecord, ChangeLogEntry, TranscriptSegment
+from .transcript_store import save_transcript
+from .changes import log_changes
+from . import insight_cache, backpressure, retry, sources
+
+logger = logging.getLogger(__name__)
+
+FINISHED_JOB_STATUSES = ("completed", "failed")
+
+
+def _lock_batch(stmt, db: Session):
+    """Let concurrent retention runs on PostgreSQL pick disjoint batches"""
+    if db.get_bind().dialect.name == "postgresql":
+        return stmt.with_for_update(skip_locked=True)
+    return stmt
+
+
+def _export_jobs(rows, export_dir: str) -> str:
+    """Write a batch of archived jobs to a compressed JSONL file"""
+    os.makedirs(export_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    path = os.path.join(export_dir, f"jobs-{stamp}.jsonl.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(row), default=str) + "\n")
+    return path
+
+
+def archive_jobs(
+    db: Session,
+    older_than_days: int,
+    batch_size: int = 500,
+    export_dir: Optional[str] = None,
+) -> int:
+    """Move finished jobs older than the cutoff out of the jobs table in batches"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    jobs = Job.__table__
+    total = 0
+
+    while True:
+        stmt = select(jobs).where(
+            jobs.c.status.in_(FINISHED_JOB_STATUSES),
+            jobs.c.completed_at < cutoff,
+        ).order_by(jobs.c.completed_at).limit(batch_size)
+        rows = db.execute(_lock_batch(stmt, db)).mappings().all()
+        if not rows:
+            break
+
+        if export_dir:
+            path = _export_jobs(rows, export_dir)
+            logger.info(f"Exported {len(rows)} archived jobs to {path}")
+        else:
+            db.execute(insert(JobArchive), [dict(row) for row in rows])
+
+        ids = [row["id"] for row in rows]
+        db.execute(delete(Job).where(Job.id.in_(ids)))
+        log_changes(db, "job", [(row["id"], row["video_id"]) for row in rows], "delete")
+        db.commit()
+
+        total += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    return total
+
+
+def offload_transcripts(db: Session, older_than_days: int, batch_size: int = 500) -> int:
+    """Move transcripts of old completed videos to the compressed transcript archive"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    total = 0
+
+    while True:
+        stmt = select(Video.id, Video.transcript).where(
+            Video.status == "completed",
+            Video.transcript.is_not(None),
+            func.coalesce(Video.updated_at, Video.created_at) < cutoff,
+        ).limit(batch_size)
+        rows = db.execute(_lock_batch(stmt, db)).all()
+        if not rows:
+            break
+
+        ids = [video_id for video_id, _ in rows]
+        segments = {}
+        for segment in db.scalars(
+            select(TranscriptSegment).where(TranscriptSegment.video_id.in_(ids)).order_by(TranscriptSegment.position)
+        ):
+            segments.setdefault(segment.video_id, []).append(segment.to_dict())
+
+        for video_id, transcript in rows:
+            save_transcript(db, video_id, transcript, segments.get(video_id))
+        # Keep updated_at untouched so offloading is invisible to clients
+        db.execute(
+            update(Video)
+            .where(Video.id.in_(ids))
+            .values(transcript=None, transcript_offloaded=True, updated_at=Video.updated_at)
+        )
+        # The segments went into the same archive row; the endpoints and exports read them from there
+        db.execute(delete(TranscriptSegment).where(TranscriptSegment.video_id.in_(ids)))
+        log_changes(db, "video", [(video_id, video_id) for video_id in ids], "update", ["transcript", "transcript_offloaded"])
+        db.commit()
+
+        total += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    return total
+
+
+def purge_idempotency_keys(db: Session, older_than_hours: int) -> int:
+    """Delete stored worker responses past their replay window"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=older_than_hours)
+    deleted = db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.created_at < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+
+def prune_change_log(db: Session, older_than_days: int) -> int:
+    """Delete change feed entries older than the retention window"""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    deleted = db.execute(delete(ChangeLogEntry).where(ChangeLogEntry.created_at < cutoff)).rowcount
+    db.commit()
+    return deleted
+
+
+def run_retention(
+    job_days: Optional[int] = None,
+    transcript_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    export_dir: Optional[str] = None,
+) -> dict:
+    """Run one retention pass using settings for any omitted option"""
+    job_days = settings.retention_job_days if job_days is None else job_days
+    transcript_days = settings.retention_transcript_days if transcript_days is None else transcript_days
+    batch_size = batch_size or settings.retention_batch_size
+    export_dir = export_dir or settings.retention_export_dir
+
+    db = SessionLocal()
+    try:
+        result = {
+            "archived_jobs": archive_jobs(db, job_days, batch_size, export_dir),
+            "offloaded_transcripts": 0,
+            "expired_idempotency_keys": purge_idempotency_keys(db, settings.idempotency_ttl_hours),
+            "pruned_changes": prune_change_log(db, settings.change_log_retention_days),
+            "evicted_insights": insight_cache.evict(
+                db, settings.insight_cache_max_entries, settings.insight_cache_max_bytes, batch_size
+            ),
+            "expired_claims": retry.requeue_expired_claims(db),
+            "reconciled_queue_counters": backpressure.reconcile_counters(db),
+            "reconciled_source_slots": sources.reconcile_slots(db),
+        }
+        if transcript_days > 0:
+            result["offloaded_transcripts"] = offload_transcripts(db, transcript_days, batch_size)
+    finally:
+        db.close()
+
+    logger.info(f"Retention pass finished: {result}")
+    return result
+
+
+async def retention_loop(interval_minutes: int):
+    """Run retention passes forever, sleeping between runs"""
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            await run_in_threadpool(run_retention)
+        except Exception:
+            logger.exception("Retention pass failed")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive finished jobs and offload cold transcripts")
+    parser.add_argument("--job-days", type=int, default=None, help="Archive finished jobs older than N days")
+    parser.add_argument("--transcript-days", type=int, default=None, help="Offload transcripts older than N days (0 disables)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--export-dir", default=None, help="Write archived jobs as .jsonl.gz files instead of jobs_archive")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    result = run_retention(args.job_days, args.transcript_days, args.batch_size, args.export_dir)
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Automatic retries of process jobs that failed with a transient error.
+
+A retried job goes back to pending with run_after pushed into the future,
+so workers keep claiming other jobs in the meantime. The delay grows
+exponentially with the attempt number. Half of it is fixed, so a
+throttling source always gets a growing pause, and half is random
+("equal jitter"), which spreads the retries of jobs that failed together
+instead of sending them back to the source at the same moment.
+
+Claims expire: a job that stays in processing without a progress report
+for JOB_CLAIM_TIMEOUT_SECONDS (its worker crashed or lost the network) is
+requeued, or failed once it has used up its attempts, and gives back its
+source slot and its queue slot. The video leaves "processing" as well, and
+the result endpoint refuses late results of the expired claim.
+"""
+import asyncio
+import logging
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from . import backpressure, sources
+from .config import settings
+from .database import SessionLocal
+from .models import Job, Video
+
+logger = logging.getLogger(__name__)
+
+# Errors that are worth retrying: throttling, server errors, network trouble
+TRANSIENT_ERROR_PATTERNS = re.compile(
+    r"HTTP Error (429|5\d\d)|Too Many Requests|rate.?limit|try again later|timed? ?out|"
+    r"Connection (reset|refused|aborted)|Temporary failure in name resolution|IncompleteRead|"
+    r"Unable to download (webpage|video data)|Read timed out|Service Unavailable",
+    re.IGNORECASE,
+)
+
+# Errors that will fail again however often the job runs
+PERMANENT_ERROR_PATTERNS = re.compile(
+    r"Video unavailable|Private video|copyright|Sign in to confirm your age|members-only|"
+    r"Unsupported URL|is not a valid URL|This video has been removed|HTTP Error (400|401|403|404|410)",
+    re.IGNORECASE,
+)
+
+
+def is_transient(error: Optional[str]) -> bool:
+    """Classify a worker error message; unknown errors are not retried"""
+    if not error or PERMANENT_ERROR_PATTERNS.search(error):
+        return False
+    return bool(TRANSIENT_ERROR_PATTERNS.search(error))
+
+
+def backoff_seconds(
+    attempt: int,
+    base: Optional[float] = None,
+    cap: Optional[float] = None,
+    rng: Callable[[], float] = random.random,
+) -> float:
+    """Jittered delay before retry number `attempt` (1-based)"""
+    base = settings.job_retry_base_seconds if base is None else base
+    cap = settings.job_retry_max_seconds if cap is None else cap
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + rng() * delay / 2
+
+
+def should_retry(attempts: int, error: Optional[str], retryable: Optional[bool] = None) -> bool:
+    """Whether a job that failed on its `attempts`-th run gets another one; the worker's own verdict wins"""
+    if attempts >= settings.job_max_attempts:
+        return False
+    return retryable if retryable is not None else is_transient(error)
+
+
+def next_run_after(now: datetime, attempts: int) -> datetime:
+    return now + timedelta(seconds=backoff_seconds(attempts))
+
+
+def requeue_expired_claims(db: Session, timeout_seconds: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """Take back processing jobs whose worker went silent; returns the number of jobs released"""
+    timeout_seconds = settings.job_claim_timeout_seconds if timeout_seconds is None else timeout_seconds
+    if timeout_seconds <= 0:
+        return 0
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=timeout_seconds)
+
+    expired = db.query(Job).filter(
+        Job.status == "processing",
+        Job.updated_at < cutoff,
+    ).with_for_update(skip_locked=True).all()
+
+    for job in expired:
+        sources.release(db, job)
+        job.close_stage(now)
+        job.worker_id = None
+        job.updated_at = now
+        error = f"Claim expired after {timeout_seconds}s without progress"
+        exhausted = (job.attempts or 0) >= settings.job_max_attempts
+        if exhausted:
+            job.status = "failed"
+            job.completed_at = now
+        else:
+            job.status = "pending"
+            job.run_after = now
+            backpressure.requeue(db, job)
+        job.error_message = error
+
+        # The claim marked the video as processing whatever the job type
+        video = db.query(Video).filter(Video.id == job.video_id).first()
+        if video and video.status == "processing":
+            if job.job_type == "process":
+                video.status = "failed" if exhausted else "pending"
+                if exhausted:
+                    video.error = error
+            else:
+                # Insights run on a finished transcript, which the expired claim did not touch
+                video.status = "completed"
+            video.processing_stage = None
+            video.updated_at = now
+
+    db.commit()
+    if expired:
+        logger.warning(f"Released {len(expired)} processing jobs with expired claims")
+    return len(expired)
+
+
+def run_claim_expiry() -> int:
+    db = SessionLocal()
+    try:
+        return requeue_expired_claims(db)
+    finally:
+        db.close()
+
+
+async def claim_expiry_loop(interval_seconds: int):
+    """Periodically requeue jobs whose worker stopped reporting"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(run_claim_expiry)
+        except Exception:
+            logger.exception("Claim expiry failed")
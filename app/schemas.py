@@ -1,13 +1,19 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 # Request schemas
 class VideoCreateRequest(BaseModel):
     url: str
+    priority: Literal["normal", "low"] = "normal"  # Low priority is parked when QUEUE_PARK_ENABLED
+    run_after: Optional[datetime] = None  # Schedule processing for later
 
 class VideoRatingRequest(BaseModel):
-    rating: int
+    rating: int  # The rater is identified by API key or address, see ratings.rater_id
+
+class BulkStatusRequest(BaseModel):
+    ids: List[str] = Field(..., max_length=500)
+    since: Optional[datetime] = None  # Only return videos changed after this time (minus a small overlap)
 
 # Response schemas
 class VideoResponse(BaseModel):
@@ -23,6 +29,8 @@ class VideoResponse(BaseModel):
     insights: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     rating: Optional[int] = None
+    rating_count: int = 0
+    rating_bayes: Optional[float] = None
     
     # Extended metadata fields
     uploader: Optional[str] = None
@@ -77,21 +85,80 @@ class VideoResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class VideoStatusSummary(BaseModel):
+    id: str
+    status: str
+    processing_stage: Optional[str] = None
+    error: Optional[str] = None
+    updated_at: Optional[str] = None
+    job_status: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
+    eta: Optional[Dict[str, Any]] = None  # eta_seconds, estimated_completion_at, queue_position, poll_after_seconds
+
+class BulkStatusResponse(BaseModel):
+    videos: List[VideoStatusSummary]
+    server_time: str  # Pass as `since` on the next poll
+
+class TopVideosResponse(BaseModel):
+    videos: List[VideoResponse]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
+
+class ChannelResponse(BaseModel):
+    channel_id: str
+    name: Optional[str] = None
+    follower_count: Optional[int] = None
+    subscriber_count: Optional[int] = None
+    video_count: int = 0
+    total_duration: int = 0  # Seconds
+    rating_count: int = 0
+    average_rating: Optional[float] = None
+    latest_upload_date: Optional[str] = None
+
 class JobResponse(BaseModel):
     id: str
     video_id: str
     status: str
+    job_type: str = "process"  # process, insights
+    tenant_id: Optional[str] = None
+    source: Optional[str] = None  # youtube, vimeo, ... or the URL's domain
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
     started_at: Optional[str] = None
     completed_at: Optional[str] = None
+    run_after: Optional[str] = None  # Not claimable before this time (scheduled or retry backoff)
+    attempts: int = 0
     worker_id: Optional[str] = None
     error_message: Optional[str] = None
     progress: Optional[Dict[str, Any]] = None
+    stage_history: Optional[List[List[Any]]] = None  # [stage, started_epoch, ended_epoch]
 
     class Config:
         from_attributes = True
 
+class TranscriptSegmentResponse(BaseModel):
+    index: int
+    start: float
+    end: float
+    text: str
+
+class TranscriptSegmentsResponse(BaseModel):
+    video_id: str
+    chapter: Optional[Dict[str, Any]] = None
+    segments: List[TranscriptSegmentResponse]
+
+class ChangeEntry(BaseModel):
+    seq: int
+    entity_type: str
+    entity_id: str
+    video_id: str
+    operation: str
+    changed_fields: Optional[List[str]] = None
+    created_at: Optional[str] = None
+
+class ChangeFeedResponse(BaseModel):
+    changes: List[ChangeEntry]
+    next_after: int  # Cursor for the next request
+
 # Worker integration schemas
 class WorkerJobRequest(BaseModel):
     video_id: str
@@ -100,13 +167,40 @@ class WorkerJobRequest(BaseModel):
 class WorkerClaimRequest(BaseModel):
     worker_id: str
 
+class TranscriptSegmentData(BaseModel):
+    start: float = Field(ge=0)  # Seconds from the start of the video
+    end: float
+    text: str
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        if self.end < self.start:
+            raise ValueError("segment end is before its start")
+        return self
+
 class WorkerJobResult(BaseModel):
     video_id: str
+    worker_id: Optional[str] = None  # Worker holding the claim; refused once the claim has moved on
     status: str  # completed, failed
     processing_stage: Optional[str] = None  # downloading, transcribing, generating_insights
     transcript: Optional[str] = None
+    segments: Optional[List[TranscriptSegmentData]] = None  # Timestamped transcript segments
     insights: Optional[Dict[str, Any]] = None
+    prompt_version: Optional[str] = None  # Insight prompt/model version; defaults to INSIGHT_PROMPT_VERSION
     error: Optional[str] = None
+    retryable: Optional[bool] = None  # Overrides the server's transient error classification for failures
+
+    @field_validator("segments")
+    @classmethod
+    def order_segments(cls, segments):
+        """Store segments in time order; range lookups need both starts and ends to be non-decreasing"""
+        if segments is None:
+            return None
+        segments = sorted(segments, key=lambda segment: (segment.start, segment.end))
+        for previous, segment in zip(segments, segments[1:]):
+            if segment.end < previous.end:
+                raise ValueError(f"segment at {segment.start}s ends inside the segment at {previous.start}s")
+        return segments
     metadata: Optional[Dict[str, Any]] = None  # Extended video metadata
 
 class WorkerJobProgress(BaseModel):
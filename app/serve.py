@@ -0,0 +1,35 @@
+"""Production entrypoint: run uvicorn with one worker process per core (up to 4 by default).
+
+    python -m app.serve
+
+Workers are shared-nothing processes. State that must hold across them lives
+in the database (idempotency keys, change feed, queue counters); in-process
+state is either a cache with a database fallback or scaled per process
+(rate limit buckets, connection pool).
+"""
+import os
+
+import uvicorn
+
+from .config import settings
+
+
+def main():
+    # Railway and similar platforms provide the port to bind through PORT
+    port = int(os.environ.get("PORT", settings.api_port))
+
+    # Auto-reload is an explicit development switch and implies a single process
+    reload = settings.reload
+    workers = 1 if reload else settings.workers
+
+    uvicorn.run(
+        "app.main:app",
+        host=settings.api_host,
+        port=port,
+        workers=workers,
+        reload=reload,
+    )
+
+
+if __name__ == "__main__":
+    main()
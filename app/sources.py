@@ -0,0 +1,130 @@
+"""Per-source concurrency limits for claims.
+
+Every process job records its source, which is the yt-dlp extractor name
+when known and otherwise derived from the URL's domain. source_slots
+counts each source's jobs in processing. A claim takes a slot with one
+conditional upsert and fails while the source is at its limit
+(SOURCE_CONCURRENCY_LIMITS). The worker job listing leaves out saturated
+sources, so workers go on to other sources instead of all hitting a
+throttling one at once. Results give the slot back, so do expired claims
+(see retry.requeue_expired_claims), and the retention pass reconciles the
+counters with the jobs in processing.
+"""
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import increment_below
+from .models import Job, SourceSlot
+
+# Domains whose source name should match the yt-dlp extractor name
+SOURCE_DOMAINS = {
+    "youtube.com": "youtube",
+    "youtu.be": "youtube",
+    "youtube-nocookie.com": "youtube",
+    "vimeo.com": "vimeo",
+    "twitch.tv": "twitch",
+    "tiktok.com": "tiktok",
+    "twitter.com": "twitter",
+    "x.com": "twitter",
+    "soundcloud.com": "soundcloud",
+    "dailymotion.com": "dailymotion",
+}
+
+# Candidate jobs fetched per requested job so saturated sources can be skipped
+LISTING_OVERFETCH = 4
+
+
+def source_for(url: Optional[str], extractor: Optional[str] = None) -> Optional[str]:
+    """Source class of a video: its extractor (e.g. "youtube:tab" -> "youtube") or its URL's domain"""
+    if extractor and extractor.lower() != "generic":
+        return extractor.split(":")[0].lower()[:100]
+    host = (urlparse(url).hostname or "") if url else ""
+    if not host:
+        return None
+    labels = host.lower().split(".")
+    for i in range(len(labels) - 1):
+        domain = ".".join(labels[i:])
+        if domain in SOURCE_DOMAINS:
+            return SOURCE_DOMAINS[domain]
+    return ".".join(labels[-2:])[:100]
+
+
+def limit_for(source: Optional[str]) -> int:
+    """Max jobs of a source in processing; 0 means unlimited"""
+    if not source:
+        return 0
+    return settings.source_limits.get(source, settings.source_concurrency_default)
+
+
+def acquire(db: Session, job: Job) -> bool:
+    """Take a processing slot for the job's source; False while the source is at its limit"""
+    if not job.source:
+        return True
+    return increment_below(db, SourceSlot, {"source": job.source}, "in_flight", limit_for(job.source))
+
+
+def release(db: Session, job: Job):
+    """Give back the slot of a job that left processing"""
+    if not job.source:
+        return
+    db.execute(
+        update(SourceSlot).where(SourceSlot.source == job.source, SourceSlot.in_flight > 0)
+        .values(in_flight=SourceSlot.in_flight - 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def free_slots(db: Session) -> Dict[str, int]:
+    """Remaining slots of every source with a limit and jobs in processing"""
+    free = {}
+    for source, in_flight in db.query(SourceSlot.source, SourceSlot.in_flight).all():
+        limit = limit_for(source)
+        if limit > 0:
+            free[source] = limit - in_flight
+    return free
+
+
+def pick_claimable(jobs: List[Job], free: Dict[str, int], limit: int) -> List[Job]:
+    """First `limit` jobs, taking no more jobs of a source than it has free slots"""
+    free = dict(free)
+    picked = []
+    for job in jobs:
+        if len(picked) >= limit:
+            break
+        source_limit = limit_for(job.source)
+        if source_limit > 0:
+            remaining = free.get(job.source, source_limit)
+            if remaining <= 0:
+                continue
+            free[job.source] = remaining - 1
+        picked.append(job)
+    return picked
+
+
+def reconcile_slots(db: Session) -> int:
+    """Reset the slot counters to the jobs actually in processing; returns the number of corrected sources"""
+    counts = dict(
+        db.query(Job.source, func.count(Job.id))
+        .filter(Job.status == "processing", Job.source.is_not(None))
+        .group_by(Job.source).all()
+    )
+    stored = dict(db.query(SourceSlot.source, SourceSlot.in_flight).all())
+
+    corrected = 0
+    for source in set(counts) | set(stored):
+        actual = counts.get(source, 0)
+        if stored.get(source) == actual:
+            continue
+        if source not in stored:
+            db.add(SourceSlot(source=source, in_flight=actual))
+        else:
+            db.execute(update(SourceSlot).where(SourceSlot.source == source).values(in_flight=actual))
+        corrected += 1
+
+    db.execute(delete(SourceSlot).where(SourceSlot.in_flight == 0))
+    db.commit()
+    return corrected
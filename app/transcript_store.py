@@ -0,0 +1,43 @@
+import gzip
+import json
+from typing import List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from .models.transcript_archive import TranscriptArchive
+
+
+def _compress(text: str) -> bytes:
+    return gzip.compress(text.encode("utf-8"))
+
+
+def _decompress(data: bytes) -> str:
+    return gzip.decompress(data).decode("utf-8")
+
+
+def save_transcript(db: Session, video_id: str, text: str, segments: Optional[List[dict]] = None) -> None:
+    """Store a compressed transcript, and its segments if any, in the transcript archive table"""
+    # The archive lives in the database, so every instance and replica sees it and it survives redeploys
+    db.merge(TranscriptArchive(
+        video_id=video_id,
+        transcript=_compress(text),
+        segments=_compress(json.dumps(segments, ensure_ascii=False)) if segments else None,
+    ))
+
+
+def load_transcript(db: Session, video_id: str) -> Optional[str]:
+    """Read an offloaded transcript, returning None if there is none"""
+    data = db.scalar(select(TranscriptArchive.transcript).where(TranscriptArchive.video_id == video_id))
+    return _decompress(data) if data is not None else None
+
+
+def load_segments(db: Session, video_id: str) -> Optional[List[dict]]:
+    """Read the segments offloaded with a transcript, None if there are none"""
+    data = db.scalar(select(TranscriptArchive.segments).where(TranscriptArchive.video_id == video_id))
+    return json.loads(_decompress(data)) if data is not None else None
+
+
+def delete_transcript(db: Session, video_id: str) -> None:
+    """Remove an offloaded transcript and its segments in the caller's transaction"""
+    db.execute(delete(TranscriptArchive).where(TranscriptArchive.video_id == video_id))
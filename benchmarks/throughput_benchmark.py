@@ -0,0 +1,116 @@
+"""Measure request throughput of python -m app.serve at different worker counts.
+
+    python benchmarks/throughput_benchmark.py [--workers 1 2 4] [--requests 2000] [--concurrency 64]
+
+Seeds a temporary SQLite database with completed videos, starts the server
+with WEB_CONCURRENCY=N for each N and hammers GET /api/videos/{id}.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _seed(database_url, count):
+    from sqlalchemy import create_engine, insert
+    from app.database import Base
+    from app.models import Video
+
+    seed_engine = create_engine(database_url)
+    Base.metadata.create_all(seed_engine)
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    with seed_engine.begin() as conn:
+        conn.execute(insert(Video), [
+            {
+                "id": video_id,
+                "url": f"https://youtu.be/{video_id[:11]}",
+                "status": "completed",
+                "title": "Benchmark video",
+                "transcript": "lorem ipsum dolor sit amet " * 400,
+                "insights": {"summary": "benchmark " * 50},
+            }
+            for video_id in ids
+        ])
+    seed_engine.dispose()
+    return ids
+
+
+async def _hammer(base_url, ids, total, concurrency):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        counter = iter(range(total))
+
+        async def run():
+            for i in counter:
+                response = await client.get(f"/api/videos/{ids[i % len(ids)]}")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+def _wait_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    ids = _seed(database_url, 200)
+    print(f"CPU cores: {os.cpu_count()}")
+
+    for workers in args.workers:
+        port = _free_port()
+        env = dict(
+            os.environ,
+            DATABASE_URL=database_url,
+            DEBUG="False",
+            WEB_CONCURRENCY=str(workers),
+            PORT=str(port),
+            API_HOST="127.0.0.1",
+            RATE_LIMIT_ENABLED="False",
+        )
+        server = subprocess.Popen([sys.executable, "-m", "app.serve"], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            _wait_ready(base_url)
+            rps = asyncio.run(_hammer(base_url, ids, args.requests, args.concurrency))
+            print(f"workers={workers:<3d} {rps:8.1f} req/s")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""Import the legacy worker database.json: python migrate_data.py ../worker/database.json
+
+Thin wrapper around python -m app.importer, which documents the options.
+"""
+from app.importer import main
+
+if __name__ == "__main__":
+    main()
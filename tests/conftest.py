@@ -0,0 +1,72 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db, get_read_db
+from app.models import Video, Job
+
+
+@pytest.fixture
+def db_session_factory():
+    """Session factory bound to a fresh in-memory SQLite database"""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_session_factory):
+    """Database session for tests that call service functions directly"""
+    db = db_session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client(db_session_factory):
+    """Test client with database dependencies pointed at the test database"""
+    # Import lazily: some tests reload app.main with a patched environment
+    from app import main
+
+    def override_get_db():
+        db = db_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # Every test starts with full rate limit buckets
+    main.rate_limit_store.clear()
+    main.app.dependency_overrides[get_db] = override_get_db
+    main.app.dependency_overrides[get_read_db] = override_get_db
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def create_video_job(db_session_factory):
+    """Factory that inserts a video with one job and returns (video_id, job_id)"""
+    def factory(status="processing", job_status=None, **video_fields):
+        db = db_session_factory()
+        try:
+            video = Video(url=video_fields.pop("url", "https://youtu.be/abc"), status=status, **video_fields)
+            db.add(video)
+            db.flush()
+            job = Job(video_id=video.id, status=job_status or status)
+            db.add(job)
+            db.commit()
+            return video.id, job.id
+        finally:
+            db.close()
+
+    return factory
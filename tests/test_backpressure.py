@@ -0,0 +1,103 @@
+import pytest
+
+from app import backpressure, ratelimit
+from app.config import Settings
+from app.models import Job, ParkedSubmission, QueueCounter, Video
+
+
+@pytest.fixture
+def caps(monkeypatch):
+    """Set queue caps and park mode for a test"""
+    def configure(global_cap=0, tenant_cap=0, park=False, promote_below=50):
+        monkeypatch.setattr(backpressure.settings, "queue_max_pending_global", global_cap)
+        monkeypatch.setattr(backpressure.settings, "queue_max_pending_per_tenant", tenant_cap)
+        monkeypatch.setattr(backpressure.settings, "queue_park_enabled", park)
+        monkeypatch.setattr(backpressure.settings, "queue_park_promote_below", promote_below)
+    return configure
+
+
+@pytest.fixture(autouse=True)
+def api_keys(monkeypatch):
+    """API keys the tests submit with, each its own tenant"""
+    monkeypatch.setattr(ratelimit, "settings", Settings(client_api_keys="a,b,secret-a,secret-b"))
+
+
+class TestQueueBackpressure:
+    """Test suite for queue caps, parking and counter maintenance"""
+
+    def _submit(self, client, api_key="a", **body):
+        return client.post("/api/videos/", json={"url": "https://youtu.be/x", **body}, headers={"X-API-Key": api_key})
+
+    def _claim(self, client, job_id):
+        return client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w1"})
+
+    def test_counters_follow_enqueue_and_claim(self, client, db_session):
+        """Test that submissions and claims adjust the global and tenant counters"""
+        self._submit(client, "secret-a")
+        self._submit(client, "secret-b")
+        job = db_session.query(Job).first()
+        self._claim(client, job.id)
+
+        assert backpressure.pending(db_session) == 1
+        assert backpressure.pending(db_session, f"tenant:{job.tenant_id}") == 0
+        assert job.tenant_id.startswith("key:") and "secret" not in job.tenant_id  # Stored as a digest
+
+    def test_per_tenant_cap(self, client, caps):
+        """Test that one tenant over its cap is rejected while others still get in"""
+        caps(tenant_cap=2)
+        self._submit(client, "a")
+        self._submit(client, "a")
+
+        rejected = self._submit(client, "a")
+        other = self._submit(client, "b")
+
+        assert rejected.status_code == 429
+        assert rejected.json()["queue"] == "tenant"
+        assert rejected.json()["estimated_wait_seconds"] > 0
+        assert int(rejected.headers["Retry-After"]) >= 1
+        assert other.status_code == 200
+
+    def test_global_cap_frees_up_after_claim(self, client, caps, db_session):
+        """Test the global cap and that a claim makes room again"""
+        caps(global_cap=1)
+        self._submit(client, "a")
+        assert self._submit(client, "b").status_code == 429
+
+        self._claim(client, db_session.query(Job).first().id)
+
+        assert self._submit(client, "b").status_code == 200
+        # The rejected submission left no video and no counted slot behind
+        assert db_session.query(Video).count() == 2
+        assert backpressure.pending(db_session) == 1
+
+    def test_parking_and_promotion(self, client, caps, db_session):
+        """Test that over-cap and low-priority submissions are parked and queued later"""
+        caps(global_cap=1, park=True, promote_below=2)
+        self._submit(client, "a")
+        over_cap = self._submit(client, "a")
+        low = self._submit(client, "b", priority="low")
+
+        assert (over_cap.status_code, low.status_code) == (202, 202)
+        assert over_cap.json()["processing_stage"] == "parked"
+        assert db_session.query(Job).count() == 1
+        assert db_session.query(ParkedSubmission).count() == 2
+
+        # One slot below the promotion mark: the normal-priority submission goes first
+        assert backpressure.promote_parked(db_session) == 1
+        promoted = db_session.query(Job).filter(Job.video_id == over_cap.json()["id"]).one()
+        assert promoted.status == "pending"
+        assert db_session.get(Video, over_cap.json()["id"]).processing_stage is None
+        assert backpressure.promote_parked(db_session) == 0
+
+    def test_reconcile_fixes_drift(self, client, db_session):
+        """Test that reconciliation restores counters from the jobs table"""
+        self._submit(client, "a")
+        db_session.query(QueueCounter).update({"pending": 7})
+        db_session.add(QueueCounter(scope="tenant:gone", pending=3))
+        db_session.commit()
+
+        corrected = backpressure.reconcile_counters(db_session)
+
+        assert corrected == 3
+        assert backpressure.pending(db_session) == 1
+        assert db_session.get(QueueCounter, "tenant:gone") is None
@@ -0,0 +1,68 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+
+class TestBulkStatus:
+    """Test suite for the batch status endpoint"""
+
+    def test_returns_status_and_progress_for_all_ids(self, client, create_video_job):
+        """Test that one request returns status and job progress for every id"""
+        processing_id, job_id = create_video_job(status="processing", processing_stage="transcribing")
+        completed_id, _ = create_video_job(status="completed", transcript="long text")
+        client.post(f"/api/worker/jobs/{job_id}/progress", json={"percent": 40})
+
+        response = client.post("/api/videos/status", json={"ids": [processing_id, completed_id, "missing"]})
+
+        assert response.status_code == 200
+        videos = {v["id"]: v for v in response.json()["videos"]}
+        assert set(videos) == {processing_id, completed_id}
+        assert videos[processing_id]["processing_stage"] == "transcribing"
+        assert videos[processing_id]["job_status"] == "processing"
+        assert videos[processing_id]["progress"] == {"percent": 40}
+        assert videos[completed_id]["job_status"] is None
+        assert "transcript" not in videos[completed_id]
+
+    def test_since_filters_unchanged_videos(self, client, create_video_job):
+        """Test that only videos updated after `since` are returned"""
+        old_time = datetime.now(timezone.utc) - timedelta(hours=1)
+        stale_id, _ = create_video_job(status="completed", job_status="completed",
+                                       created_at=old_time, updated_at=old_time)
+        fresh_id, _ = create_video_job(status="processing")
+
+        since = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+        response = client.post("/api/videos/status", json={"ids": [stale_id, fresh_id], "since": since})
+
+        assert [v["id"] for v in response.json()["videos"]] == [fresh_id]
+        assert response.json()["server_time"]
+
+    def test_since_overlaps_late_commits(self, client, create_video_job):
+        """Test that a change stamped shortly before `since` is still returned"""
+        stamped = datetime.now(timezone.utc) - timedelta(seconds=5)
+        late_id, _ = create_video_job(status="processing", updated_at=stamped)
+
+        since = datetime.now(timezone.utc).isoformat()
+        response = client.post("/api/videos/status", json={"ids": [late_id], "since": since})
+
+        assert [v["id"] for v in response.json()["videos"]] == [late_id]
+
+    def test_status_poll_is_not_a_write(self, client, create_video_job, monkeypatch):
+        """Test that the read-only bulk poll does not pin the client to the primary"""
+        from app import main
+        from app.database import READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_HEADER
+        monkeypatch.setattr(main.replica_router, "replicas", [object()])
+        video_id, _ = create_video_job(status="processing")
+
+        polled = client.post("/api/videos/status", json={"ids": [video_id]})
+        assert READ_YOUR_WRITES_COOKIE not in polled.cookies
+        assert READ_YOUR_WRITES_HEADER not in polled.headers
+
+        rated = client.post(f"/api/videos/{video_id}/rating", json={"rating": 5})
+        assert rated.status_code < 400
+        assert READ_YOUR_WRITES_COOKIE in rated.cookies
+        assert float(rated.headers[READ_YOUR_WRITES_HEADER]) <= time.time()
+
+    def test_too_many_ids_rejected(self, client):
+        """Test that the id list is bounded"""
+        response = client.post("/api/videos/status", json={"ids": [str(i) for i in range(501)]})
+
+        assert response.status_code == 422
@@ -0,0 +1,79 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.models import ChangeLogEntry, Job, Video
+from app.retention import archive_jobs, offload_transcripts
+
+
+class TestChangeFeed:
+    """Test suite for the cursor-based change feed"""
+
+    def test_writes_are_logged_in_order(self, client):
+        """Test that creating a video logs the video and its job"""
+        video = client.post("/api/videos/", json={"url": "https://youtu.be/abc"}).json()
+
+        changes = client.get("/api/changes").json()["changes"]
+
+        assert [(c["entity_type"], c["operation"]) for c in changes] == [("video", "insert"), ("job", "insert")]
+        assert all(c["video_id"] == video["id"] for c in changes)
+        assert [c["seq"] for c in changes] == sorted(c["seq"] for c in changes)
+
+    def test_cursor_returns_only_newer_changes(self, client, create_video_job):
+        """Test that `after` resumes the feed from the last seen sequence number"""
+        video_id, job_id = create_video_job(status="processing")
+        first_page = client.get("/api/changes").json()
+
+        client.post(f"/api/worker/jobs/{job_id}/stage",
+                    json={"video_id": video_id, "processing_stage": "transcribing"})
+        next_page = client.get("/api/changes", params={"after": first_page["next_after"]}).json()
+
+        updates = {c["entity_type"]: c for c in next_page["changes"]}
+        assert set(updates) == {"video", "job"}
+        assert "processing_stage" in updates["video"]["changed_fields"]
+        assert next_page["next_after"] > first_page["next_after"]
+
+    def test_limit_pages_through_feed(self, client):
+        """Test that the feed can be consumed in pages"""
+        for _ in range(3):
+            client.post("/api/videos/", json={"url": "https://youtu.be/abc"})
+
+        page = client.get("/api/changes", params={"limit": 4}).json()
+        rest = client.get("/api/changes", params={"after": page["next_after"]}).json()
+
+        assert len(page["changes"]) == 4
+        assert len(rest["changes"]) == 2
+
+    def test_long_poll_times_out_when_idle(self, client):
+        """Test that waiting with no changes returns an empty page with the same cursor"""
+        started = time.monotonic()
+        response = client.get("/api/changes", params={"after": 10, "wait": 0.3}).json()
+
+        assert response == {"changes": [], "next_after": 10}
+        assert time.monotonic() - started >= 0.3
+
+    def test_core_statements_are_logged(self, client, db_session, create_video_job):
+        """Test that archival and offloading, which bypass the ORM, still reach the feed"""
+        old = datetime.now(timezone.utc) - timedelta(days=100)
+        video_id, job_id = create_video_job(status="completed", transcript="text", created_at=old, updated_at=old)
+        db_session.query(Job).filter(Job.id == job_id).update({"completed_at": old})
+        db_session.commit()
+        after = client.get("/api/changes").json()["next_after"]
+
+        archive_jobs(db_session, older_than_days=30)
+        offload_transcripts(db_session, older_than_days=30)
+
+        changes = client.get("/api/changes", params={"after": after}).json()["changes"]
+        assert [(c["entity_type"], c["entity_id"], c["operation"]) for c in changes] == [
+            ("job", job_id, "delete"), ("video", video_id, "update")
+        ]
+        assert changes[1]["changed_fields"] == ["transcript", "transcript_offloaded"]
+
+    def test_rolled_back_changes_are_not_logged(self, db_session):
+        """Test that changes queued by a flush are dropped with the transaction"""
+        db_session.add(Video(url="https://youtu.be/gone", status="pending"))
+        db_session.flush()
+        db_session.rollback()
+        db_session.add(Video(url="https://youtu.be/kept", status="pending"))
+        db_session.commit()
+
+        assert db_session.query(ChangeLogEntry).count() == 1
@@ -0,0 +1,68 @@
+from app.models import Channel
+
+
+class TestChannelRollups:
+    """Test suite for incrementally maintained channel statistics"""
+
+    def _complete(self, client, job_id, **metadata):
+        client.post(f"/api/worker/jobs/{job_id}/result", json={
+            "video_id": "ignored",
+            "status": "completed",
+            "transcript": "text",
+            "metadata": metadata,
+        })
+
+    def _publish(self, client, create_video_job, channel_id, duration, upload_date):
+        video_id, job_id = create_video_job(status="processing")
+        self._complete(client, job_id, channel=f"Channel {channel_id}", channel_id=channel_id,
+                       duration=duration, upload_date=upload_date)
+        return video_id, job_id
+
+    def test_results_and_ratings_update_rollups(self, client, create_video_job, db_session):
+        """Test video count, duration, latest upload and rating aggregates"""
+        first, _ = self._publish(client, create_video_job, "UC1", 100, "20240101")
+        second, _ = self._publish(client, create_video_job, "UC1", 50, "20250301")
+        client.post(f"/api/videos/{first}/rating", json={"rating": 5})
+        client.post(f"/api/videos/{second}/rating", json={"rating": 2})
+        client.post(f"/api/videos/{second}/rating", json={"rating": 4})
+
+        channel = client.get("/api/channels/UC1").json()
+
+        assert channel["video_count"] == 2
+        assert channel["total_duration"] == 150
+        assert channel["latest_upload_date"] == "20250301"
+        assert channel["rating_count"] == 2
+        assert channel["average_rating"] == 4.5
+
+    def test_resubmitted_result_is_not_double_counted(self, client, create_video_job, db_session):
+        """Test that a second result for the same video only applies differences"""
+        _, job_id = self._publish(client, create_video_job, "UC1", 100, "20240101")
+        self._complete(client, job_id, channel="Channel UC1", channel_id="UC1", duration=120)
+
+        channel = db_session.get(Channel, "UC1")
+        assert (channel.video_count, channel.total_duration) == (1, 120)
+
+    def test_video_moving_channels(self, client, create_video_job, db_session):
+        """Test that a video's contribution moves when its channel changes"""
+        self._publish(client, create_video_job, "UC1", 10, "20240101")
+        _, job_id = self._publish(client, create_video_job, "UC1", 100, "20250101")
+        self._complete(client, job_id, channel="Channel UC2", channel_id="UC2", duration=100, upload_date="20250101")
+
+        old, new = db_session.get(Channel, "UC1"), db_session.get(Channel, "UC2")
+        assert (old.video_count, old.total_duration, old.latest_upload_date) == (1, 10, "20240101")
+        assert (new.video_count, new.total_duration, new.latest_upload_date) == (1, 100, "20250101")
+
+    def test_listing_and_channel_videos(self, client, create_video_job):
+        """Test channel listing order and a channel's video list"""
+        self._publish(client, create_video_job, "UC1", 10, "20240101")
+        self._publish(client, create_video_job, "UC2", 10, "20230101")
+        newest, _ = self._publish(client, create_video_job, "UC2", 10, "20250101")
+
+        by_videos = client.get("/api/channels").json()
+        by_latest = client.get("/api/channels?sort=latest").json()
+        videos = client.get("/api/channels/UC2/videos").json()
+
+        assert [c["channel_id"] for c in by_videos] == ["UC2", "UC1"]
+        assert [c["channel_id"] for c in by_latest] == ["UC2", "UC1"]
+        assert [v["id"] for v in videos][0] == newest and len(videos) == 2
+        assert client.get("/api/channels/missing").status_code == 404
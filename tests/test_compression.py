@@ -0,0 +1,170 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import (
+    CompressionMiddleware,
+    ContentNegotiationMiddleware,
+    NegotiatedJSONResponse,
+    decompress_body,
+    negotiate_encoding,
+    negotiate_media_type,
+)
+
+
+def _payload_app(compress=True):
+    test_app = FastAPI(default_response_class=NegotiatedJSONResponse)
+    if compress:
+        test_app.add_middleware(CompressionMiddleware, minimum_size=500)
+    test_app.add_middleware(ContentNegotiationMiddleware)
+
+    @test_app.get("/large")
+    async def large():
+        return {"transcript": "lorem ipsum " * 1000}
+
+    @test_app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    return test_app
+
+
+class TestEncodingNegotiation:
+    """Test suite for Accept-Encoding negotiation"""
+
+    def test_gzip_selected(self):
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+
+    def test_q_zero_rejected(self):
+        assert negotiate_encoding("gzip;q=0") is None
+
+    def test_wildcard_accepts_gzip(self):
+        assert negotiate_encoding("*") is not None
+
+    def test_unknown_encoding_ignored(self):
+        assert negotiate_encoding("compress") is None
+
+    def test_q_value_after_other_params(self):
+        assert negotiate_encoding("gzip;level=1;q=0") is None
+
+
+class TestMediaTypeNegotiation:
+    """Test suite for choosing MessagePack from the Accept header"""
+
+    @pytest.mark.parametrize("accept, expected", [
+        ("application/msgpack", "application/msgpack"),
+        ("application/x-msgpack", "application/msgpack"),
+        ("application/json, application/msgpack", "application/msgpack"),
+        ("application/json;q=0.9, application/msgpack", "application/msgpack"),
+        ("application/msgpack;q=0", None),
+        ("application/msgpack; q=0.0, */*", None),
+        ("application/json, application/msgpack;q=0.5", None),
+        ("*/*;q=0.8, application/msgpack;q=0.5", None),
+        ("*/*", None),
+        ("", None),
+    ])
+    def test_q_values_decide(self, accept, expected):
+        assert negotiate_media_type(accept) == expected
+
+
+class TestResponseCompression:
+    """Test suite for response compression middleware"""
+
+    def setup_method(self):
+        self.client = TestClient(_payload_app())
+
+    def test_large_response_compressed(self):
+        """Test that responses above the threshold are gzip encoded"""
+        response = self.client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "accept-encoding" in response.headers["vary"].lower()
+        assert int(response.headers["content-length"]) < 12000
+        assert response.json()["transcript"].startswith("lorem ipsum")
+
+    def test_small_response_not_compressed(self):
+        """Test that small responses are sent as-is"""
+        response = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"ok": True}
+
+    def test_no_accept_encoding_not_compressed(self):
+        """Test that clients without Accept-Encoding get identity responses"""
+        response = self.client.get("/large", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_msgpack_response(self):
+        """Test that Accept: application/msgpack switches the encoding"""
+        msgpack = pytest.importorskip("msgpack")
+        response = self.client.get("/small", headers={"Accept": "application/msgpack"})
+
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == {"ok": True}
+        assert "accept" in response.headers["vary"].lower()
+
+    def test_msgpack_without_compression(self):
+        """Test that MessagePack negotiation does not depend on the compression middleware"""
+        msgpack = pytest.importorskip("msgpack")
+        client = TestClient(_payload_app(compress=False))
+
+        response = client.get("/small", headers={"Accept": "application/msgpack"})
+
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == {"ok": True}
+
+
+class TestCompressedWorkerUpload:
+    """Test suite for compressed request bodies on worker endpoints"""
+
+    def test_decompression_limit(self):
+        """Test that bodies expanding past the limit are refused"""
+        with pytest.raises(HTTPException) as error:
+            decompress_body(gzip.compress(b"0" * 10_000), "gzip", max_size=1000)
+        assert error.value.status_code == 413
+
+    def test_brotli_bomb_stops_at_limit(self):
+        """Test that brotli output is bounded while decompressing, not checked afterwards"""
+        brotli = pytest.importorskip("brotli")
+        if compression.brotli is None:
+            pytest.skip("brotli unavailable to the app")
+        body = brotli.compress(b"0" * 50_000_000)
+
+        with pytest.raises(HTTPException) as error:
+            decompress_body(body, "br", max_size=1000)
+        # 415 when the installed brotli is too old to bound its output
+        assert error.value.status_code in (413, 415)
+
+    def test_gzip_result_accepted(self, client, create_video_job):
+        """Test that a gzip encoded job result is decoded and applied"""
+        video_id, job_id = create_video_job()
+
+        body = gzip.compress(json.dumps({
+            "video_id": video_id,
+            "status": "completed",
+            "transcript": "compressed transcript",
+        }).encode())
+        response = client.post(
+            f"/api/worker/jobs/{job_id}/result",
+            content=body,
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        )
+
+        assert response.status_code == 200
+        assert client.get(f"/api/videos/{video_id}").json()["transcript"] == "compressed transcript"
+
+    def test_unsupported_encoding_rejected(self, client):
+        """Test that unknown request encodings are rejected with 415"""
+        response = client.post(
+            "/api/worker/jobs/missing/result",
+            content=b"data",
+            headers={"Content-Encoding": "compress", "Content-Type": "application/json"},
+        )
+
+        assert response.status_code == 415
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from app.eta import EtaModel
+from app.models import Job, QueueCounter
+
+
+def _completed_job(video_id, seconds, worker_id="w1", job_type="process"):
+    completed = datetime.now(timezone.utc) - timedelta(minutes=1)
+    return Job(
+        video_id=video_id,
+        job_type=job_type,
+        status="completed",
+        worker_id=worker_id,
+        started_at=completed - timedelta(seconds=seconds),
+        completed_at=completed,
+    )
+
+
+class TestEtaModel:
+    """Test suite for processing-time percentiles and estimates"""
+
+    def test_defaults_without_history(self, db_session):
+        """Test that the default processing time is used before any job completes"""
+        model = EtaModel(default_seconds=120)
+        model.refresh(db_session)
+        now = datetime.now(timezone.utc)
+
+        eta = model.estimate(now, "pending", queue_position=0)
+
+        assert eta["eta_seconds"] == 120
+        assert eta["queue_position"] == 0
+        assert model.estimate(now, "completed") is None
+
+    def test_estimates_scale_with_duration_queue_and_workers(self, db_session, create_video_job):
+        """Test duration-ratio estimates, queue waits and worker parallelism"""
+        video_id, _ = create_video_job(status="completed", job_status="completed", duration=600)
+        db_session.add_all([_completed_job(video_id, 300, "w1"), _completed_job(video_id, 300, "w2")])
+        db_session.commit()
+        model = EtaModel()
+        model.refresh(db_session)
+        now = datetime.now(timezone.utc)
+
+        assert model.active_workers == 2
+        assert model.processing_seconds(900) == 450  # Half real time in the 5-20m bucket
+        assert model.processing_seconds(2400) == 1200  # Empty bucket uses the overall ratio
+        assert model.estimate(now, "pending", duration=600, queue_position=4)["eta_seconds"] == 2 * 300 + 300
+        running = model.estimate(now, "processing", duration=600, started_at=now - timedelta(seconds=100))
+        assert running["eta_seconds"] == 200
+
+    def test_job_types_have_separate_percentiles(self, db_session, create_video_job):
+        """Test that insights jobs are estimated from insights history, not from transcription times"""
+        video_id, _ = create_video_job(status="completed", job_status="completed", duration=600)
+        db_session.add_all([_completed_job(video_id, 300), _completed_job(video_id, 20, job_type="insights")])
+        db_session.commit()
+        model = EtaModel(default_seconds=120)
+        model.refresh(db_session)
+        now = datetime.now(timezone.utc)
+
+        assert model.processing_seconds(600) == 300
+        assert model.processing_seconds(600, job_type="insights") == 20
+        assert model.estimate(now, "pending", duration=600, queue_position=0, job_type="insights")["eta_seconds"] == 20
+        # Queued process jobs ahead still drain at the transcription pace
+        assert model.drain_seconds(1) == 300
+
+    def test_queue_position_follows_claim_order(self, db_session, create_video_job):
+        """Test that positions count process jobs by run_after and fall back to the counted queue"""
+        video_id, _ = create_video_job(status="pending")
+        now = datetime.now(timezone.utc)
+        db_session.add_all([
+            Job(video_id=video_id, status="pending", run_after=now + timedelta(hours=1)),  # Backing off
+            Job(video_id=video_id, status="pending", job_type="insights", run_after=now - timedelta(hours=1)),
+        ])
+        db_session.add(QueueCounter(scope="global", pending=50))
+        db_session.commit()
+
+        model = EtaModel()
+        model.refresh(db_session)
+        assert model.queue_position(now) == 1
+        assert model.queue_position(now + timedelta(hours=2)) == 2
+
+        truncated = EtaModel(queue_snapshot_size=1)
+        truncated.refresh(db_session)
+        assert truncated.queue_position(now - timedelta(days=1)) == 0
+        assert truncated.queue_position(now + timedelta(hours=2)) == 49
+
+
+class TestEtaEndpoints:
+    """Test suite for ETA in status responses"""
+
+    def test_status_and_bulk_status_include_eta(self, client, db_session, create_video_job, monkeypatch):
+        """Test that pending videos report their queue position in both status endpoints"""
+        first_id, _ = create_video_job(status="pending")
+        second_id, _ = create_video_job(status="pending")
+        done_id, _ = create_video_job(status="completed")
+        model = EtaModel()
+        model.refresh(db_session)
+        monkeypatch.setattr("app.api.videos.eta_model", model)
+
+        # Requests only read the snapshot taken by the background refresh
+        with patch.object(EtaModel, "refresh") as refresh:
+            single = client.get(f"/api/videos/{second_id}/status").json()
+            bulk = client.post("/api/videos/status", json={"ids": [first_id, second_id, done_id]}).json()
+        refresh.assert_not_called()
+
+        assert single["eta"]["queue_position"] == 1
+        etas = {v["id"]: v["eta"] for v in bulk["videos"]}
+        assert etas[first_id]["queue_position"] == 0
+        assert etas[second_id]["queue_position"] == 1
+        assert etas[second_id]["eta_seconds"] > etas[first_id]["eta_seconds"]
+        assert etas[done_id] is None
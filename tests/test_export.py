@@ -0,0 +1,75 @@
+import io
+import json
+import zipfile
+
+from app import export
+
+
+class TestTranscriptExport:
+    """Test suite for streamed bulk transcript export"""
+
+    def _complete(self, client, job_id, segments=None, transcript=None, **metadata):
+        response = client.post(f"/api/worker/jobs/{job_id}/result", json={
+            "video_id": "ignored",
+            "status": "completed",
+            "transcript": transcript,
+            "segments": segments,
+            "metadata": metadata,
+        })
+        assert response.status_code == 200
+
+    def _publish(self, client, create_video_job, **metadata):
+        video_id, job_id = create_video_job(status="processing")
+        segments = [{"start": 0.0, "end": 1.5, "text": "hello"}, {"start": 3661.25, "end": 3662.0, "text": "world"}]
+        self._complete(client, job_id, segments, **metadata)
+        return video_id
+
+    def test_jsonl_export(self, client, create_video_job):
+        """Test one record per completed video with its transcript"""
+        first = self._publish(client, create_video_job, title="One", channel_id="UC1")
+        second = self._publish(client, create_video_job, title="Two", channel_id="UC2")
+        create_video_job(status="pending")
+
+        response = client.get("/api/videos/export")
+        records = [json.loads(line) for line in response.text.splitlines()]
+
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert sorted(r["id"] for r in records) == sorted([first, second])
+        assert records[0]["transcript"] == "hello world"
+        only = client.get("/api/videos/export", params={"channel_id": "UC2"}).text.splitlines()
+        assert [json.loads(line)["title"] for line in only] == ["Two"]
+
+    def test_zipped_subtitles(self, client, create_video_job):
+        """Test SRT and VTT archives built from transcript segments"""
+        video_id = self._publish(client, create_video_job)
+
+        srt = zipfile.ZipFile(io.BytesIO(client.get("/api/videos/export?format=srt").content))
+        vtt = zipfile.ZipFile(io.BytesIO(client.get("/api/videos/export?format=vtt").content))
+
+        assert srt.read(f"{video_id}.srt").decode() == (
+            "1\n00:00:00,000 --> 00:00:01,500\nhello\n\n2\n01:01:01,250 --> 01:01:02,000\nworld\n"
+        )
+        assert vtt.read(f"{video_id}.vtt").decode().startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\nhello\n")
+
+    def test_videos_without_segments_are_exported(self, client, create_video_job):
+        """Test that TXT export uses the transcript and subtitles fall back to one cue over the video"""
+        video_id, job_id = create_video_job(status="processing", duration=75)
+        self._complete(client, job_id, transcript="plain text only")
+        timed_id = self._publish(client, create_video_job)
+
+        txt = zipfile.ZipFile(io.BytesIO(client.get("/api/videos/export?format=txt").content))
+        srt = zipfile.ZipFile(io.BytesIO(client.get("/api/videos/export?format=srt").content))
+        vtt = zipfile.ZipFile(io.BytesIO(client.get("/api/videos/export?format=vtt").content))
+
+        assert txt.read(f"{video_id}.txt").decode() == "plain text only"
+        assert sorted(srt.namelist()) == sorted([f"{video_id}.srt", f"{timed_id}.srt"])
+        assert srt.read(f"{video_id}.srt").decode() == "1\n00:00:00,000 --> 00:01:15,000\nplain text only\n"
+        assert vtt.read(f"{video_id}.vtt").decode() == "WEBVTT\n\n00:00:00.000 --> 00:01:15.000\nplain text only\n"
+
+    def test_zip_is_streamed_per_file(self):
+        """Test that the archive is emitted as it is built and stays valid"""
+        files = ((f"{i}.txt", "x" * 100) for i in range(3))
+        chunks = list(export.iter_zip(files))
+
+        assert len(chunks) == 4 and all(chunks[:3])
+        assert zipfile.ZipFile(io.BytesIO(b"".join(chunks))).namelist() == ["0.txt", "1.txt", "2.txt"]
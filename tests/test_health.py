@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from app import health
+from app.health import HealthMonitor
+
+
+@pytest.fixture
+def monitor(db_session_factory):
+    """Health monitor of the test database with an idle pool"""
+    return HealthMonitor(db_session_factory.kw["bind"], pool_usage_fn=lambda: (0, 10))
+
+
+class TestHealthChecks:
+    """Test suite for liveness and readiness"""
+
+    def test_ready_after_successful_check(self, monitor):
+        """Test that an instance is not ready until the database has been checked"""
+        assert monitor.readiness()["reasons"] == ["database not checked yet"]
+
+        monitor.check_database()
+        report = monitor.readiness()
+
+        assert (report["status"], report["reasons"]) == ("ready", [])
+        assert report["database"]["reachable"] is True
+        assert report["pool"] == {"checked_out": 0, "capacity": 10}
+
+    def test_unreachable_database(self, tmp_path):
+        """Test that a failing database check is reported with its error"""
+        monitor = HealthMonitor(create_engine(f"sqlite:///{tmp_path}/missing/app.db"), pool_usage_fn=lambda: (0, None))
+        monitor.check_database()
+
+        [reason] = monitor.readiness()["reasons"]
+        assert reason.startswith("database unreachable: OperationalError")
+
+    def test_saturated_pool_and_loop_lag(self, monitor, monkeypatch):
+        """Test that pool saturation and event loop lag each take the instance out of rotation"""
+        monkeypatch.setattr(health.settings, "health_max_loop_lag_ms", 200)
+        monitor.check_database()
+        monitor.pool_usage = lambda: (10, 10)
+        for lag in (20, 900, 30):
+            monitor.record_lag(lag)
+
+        assert monitor.readiness()["reasons"] == ["connection pool saturated (10/10)", "event loop lag 900 ms"]
+
+    def test_stale_check(self, monitor):
+        """Test that a check loop that stopped reporting is not trusted"""
+        monitor.check_database()
+        monitor.db_checked_at -= 3600
+
+        assert monitor.readiness()["reasons"][0].startswith("database check is")
+
+    def test_lag_ticker(self, monkeypatch):
+        """Test that the ticker records how late the loop wakes up"""
+        monitor = HealthMonitor(pool_usage_fn=lambda: (0, None))
+        monkeypatch.setattr(health, "health_monitor", monitor)
+
+        async def run():
+            ticker = asyncio.create_task(health.event_loop_lag_loop(0.01))
+            await asyncio.sleep(0.02)
+            # Block the loop well past the next tick
+            time.sleep(0.2)
+            await asyncio.sleep(0.02)
+            ticker.cancel()
+
+        asyncio.run(run())
+        assert monitor.loop_lag_ms >= 100
+
+    def test_endpoints(self, client, monitor, monkeypatch):
+        """Test that liveness is unconditional and readiness answers 503 with reasons"""
+        from app import main
+        monkeypatch.setattr(main, "health_monitor", monitor)
+
+        assert client.get("/health/live").json() == {"status": "alive"}
+        assert client.get("/health").status_code == 200
+
+        not_ready = client.get("/health/ready")
+        assert not_ready.status_code == 503
+        assert not_ready.json()["reasons"] == ["database not checked yet"]
+
+        monitor.check_database()
+        assert client.get("/health/ready").status_code == 200
@@ -0,0 +1,65 @@
+from app.idempotency import response_cache
+from app.models import Video, IdempotencyRecord
+
+
+class TestIdempotentWorkerCalls:
+    """Test suite for retry-safe claim and result endpoints"""
+
+    def setup_method(self):
+        response_cache.clear()
+
+    def _submit(self, client, job_id, video_id, transcript, key="retry-1"):
+        return client.post(
+            f"/api/worker/jobs/{job_id}/result",
+            json={"video_id": video_id, "status": "completed", "transcript": transcript},
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_duplicate_result_replays_response(self, client, create_video_job, db_session_factory):
+        """Test that a retried result returns the first response without reapplying it"""
+        video_id, job_id = create_video_job()
+
+        first = self._submit(client, job_id, video_id, "first")
+        second = self._submit(client, job_id, video_id, "second")
+
+        assert first.status_code == second.status_code == 200
+        assert first.json() == second.json()
+        db = db_session_factory()
+        assert db.get(Video, video_id).transcript == "first"
+        db.close()
+
+    def test_replay_from_database_in_another_process(self, client, create_video_job, db_session_factory):
+        """Test that a retry handled by a process without the cached entry still replays"""
+        video_id, job_id = create_video_job()
+        self._submit(client, job_id, video_id, "first")
+
+        response_cache.clear()
+        self._submit(client, job_id, video_id, "second")
+
+        db = db_session_factory()
+        assert db.get(Video, video_id).transcript == "first"
+        assert db.query(IdempotencyRecord).count() == 1
+        db.close()
+
+    def test_different_keys_are_applied(self, client, create_video_job, db_session_factory):
+        """Test that distinct keys are treated as distinct requests"""
+        video_id, job_id = create_video_job()
+        self._submit(client, job_id, video_id, "first", key="a")
+        self._submit(client, job_id, video_id, "second", key="b")
+
+        db = db_session_factory()
+        assert db.get(Video, video_id).transcript == "second"
+        db.close()
+
+    def test_retried_claim_by_owner_succeeds(self, client, create_video_job):
+        """Test that a worker retrying its own claim gets success, not 404"""
+        video_id, job_id = create_video_job(status="pending")
+
+        first = client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w1"})
+        retry = client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w1"})
+        other = client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w2"})
+
+        assert first.status_code == 200
+        assert retry.status_code == 200
+        assert retry.json() == first.json()
+        assert other.status_code == 404
@@ -0,0 +1,150 @@
+import io
+import json
+
+import pytest
+
+from app import importer
+from app.models import ChangeLogEntry, Channel, Job, Video, VideoMetadata, VideoRating
+
+
+LEGACY = {
+    "settings": {"ignored": True},
+    "videos": [
+        {"id": "v1", "url": "https://youtu.be/1", "title": "Привет", "status": "completed", "transcript": "text",
+         "rating": 4, "duration": 100, "channel": "Conf", "channel_id": "UC1", "channel_follower_count": 10,
+         "description": "long", "created_at": "2024-01-01T10:00:00"},
+        {"id": "v2", "url": "https://youtu.be/2", "status": "processing",
+         "metadata": {"channel": "Conf", "channel_id": "UC1", "duration": 50, "upload_date": "20240301"}},
+        {"id": "v3", "title": "no url"},
+    ],
+    "jobs": [
+        {"id": "j1", "video_id": "v1", "status": "completed", "worker_id": "w1",
+         "completed_at": "2024-01-01T11:00:00Z"},
+        {"id": "j2", "video_id": "missing", "status": "pending"},
+    ],
+}
+
+
+class TestLegacyImport:
+    """Test suite for the streaming legacy database.json importer"""
+
+    def _write(self, tmp_path, data):
+        path = tmp_path / "database.json"
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        return str(path)
+
+    def test_parser_handles_every_layout_across_chunks(self):
+        """Test incremental parsing with values split between reads"""
+        records = [{"id": "a", "url": "u", "duration": 123456789, "title": "ёжик"}, {"id": "b", "url": "u"}]
+        layouts = {
+            "list": records,
+            "sections": {"videos": records},
+            "keyed": {"videos": {r["id"]: {k: v for k, v in r.items() if k != "id"} for r in records}},
+            "top-level ids": {r["id"]: {k: v for k, v in r.items() if k != "id"} for r in records},
+        }
+        for name, data in layouts.items():
+            raw = json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8")
+            stream = importer._JsonStream(io.BytesIO(raw), chunk_size=5)
+            assert list(importer.iter_records(stream)) == [("videos", r) for r in records], name
+
+    def test_import_maps_records(self, tmp_path, db_session):
+        """Test videos, metadata, channels, ratings and jobs created from legacy records"""
+        result = importer.import_file(db_session, self._write(tmp_path, LEGACY), batch_size=2)
+
+        assert result == {"videos": 2, "jobs": 2, "skipped": 2, "resumed_from": 0}
+        first, second = db_session.get(Video, "v1"), db_session.get(Video, "v2")
+        assert (first.title, first.status, first.rating_count, first.rating_bayes) == ("Привет", "completed", 1, 19 / 6)
+        assert db_session.get(VideoMetadata, "v1").description == "long"
+        assert db_session.get(VideoRating, ("v1", "anonymous")).rating == 4
+        # Unfinished legacy videos are queued again
+        assert second.status == "pending"
+        assert db_session.query(Job).filter(Job.video_id == "v2", Job.status == "pending").count() == 1
+        assert db_session.get(Job, "j1").worker_id == "w1"
+
+        channel = db_session.get(Channel, "UC1")
+        assert (channel.name, channel.follower_count) == ("Conf", 10)
+        assert (channel.video_count, channel.total_duration, channel.latest_upload_date) == (2, 150, "20240301")
+        assert (channel.rating_sum, channel.rating_count) == (4, 1)
+        logged = {(entry.entity_id, entry.operation) for entry in db_session.query(ChangeLogEntry)}
+        assert {("v1", "insert"), ("v2", "insert"), ("j1", "insert")} <= logged
+
+    def test_reimport_is_idempotent(self, tmp_path, db_session):
+        """Test that importing the same file twice creates no duplicates and keeps new votes"""
+        path = self._write(tmp_path, LEGACY)
+        importer.import_file(db_session, path)
+        db_session.add(VideoRating(video_id="v1", rater_id="alice", rating=2))
+        db_session.query(Video).filter(Video.id == "v1").update({"rating_sum": 6, "rating_count": 2})
+        db_session.commit()
+
+        importer.import_file(db_session, path)
+
+        assert db_session.query(Video).count() == 2
+        assert db_session.query(Job).count() == 2
+        assert db_session.query(VideoRating).count() == 2
+        assert db_session.get(Video, "v1").rating_count == 2
+        assert db_session.get(Channel, "UC1").video_count == 2
+
+    def test_reimport_never_regresses_live_rows(self, tmp_path, db_session):
+        """Test that a re-import keeps progress made since the first import and only moves rows forward"""
+        path = self._write(tmp_path, LEGACY)
+        importer.import_file(db_session, path)
+        queued = db_session.query(Job).filter(Job.video_id == "v2").one()
+        queued.status, queued.worker_id = "processing", "w9"
+        db_session.query(Video).filter(Video.id == "v2").update({"status": "processing"})
+        db_session.query(Video).filter(Video.id == "v1").update({"insights": {"summary": "live"}})
+        db_session.commit()
+
+        importer.import_file(db_session, path)
+        db_session.expire_all()
+
+        assert (db_session.get(Job, queued.id).status, db_session.get(Job, queued.id).worker_id) == ("processing", "w9")
+        assert db_session.get(Video, "v2").status == "processing"
+        assert db_session.get(Video, "v1").insights == {"summary": "live"}
+        assert db_session.get(Video, "v1").transcript == "text"
+
+        advanced = {**LEGACY, "videos": [{"id": "v2", "url": "https://youtu.be/2", "status": "completed", "transcript": "new"}]}
+        importer.import_file(db_session, self._write(tmp_path, advanced))
+        db_session.expire_all()
+
+        assert (db_session.get(Video, "v2").status, db_session.get(Video, "v2").transcript) == ("completed", "new")
+
+    def test_pending_video_with_its_own_job_is_queued_once(self, tmp_path, db_session):
+        """Test that the file's pending job replaces the synthesized one and jobs may precede their video"""
+        data = {
+            "jobs": [
+                {"id": "j1", "video_id": "v1", "status": "pending"},
+                {"id": "i1", "video_id": "v1", "status": "pending", "job_type": "insights"},
+                {"id": "i2", "video_id": "v1", "status": "pending", "job_type": "insights"},
+            ],
+            "videos": [{"id": "v1", "url": "https://youtu.be/1", "status": "pending"}],
+        }
+        path = self._write(tmp_path, data)
+
+        result = importer.import_file(db_session, path, batch_size=1)
+        importer.import_file(db_session, path)
+
+        assert result == {"videos": 1, "jobs": 2, "skipped": 1, "resumed_from": 0}
+        jobs = db_session.query(Job.id, Job.status, Job.job_type).order_by(Job.id).all()
+        assert jobs == [("i1", "pending", "insights"), ("j1", "pending", "process")]
+
+    def test_malformed_value_fails_without_reading_the_whole_file(self):
+        """Test that an undecodable value stops the parser once the buffer cap is hit"""
+        raw = b'[{"id": "a", oops}, ' + b'{"id": "b", "url": "u"}, ' * 1000 + b"]"
+        stream = importer._JsonStream(io.BytesIO(raw), chunk_size=64, max_value_size=256)
+
+        with pytest.raises(ValueError, match="Malformed JSON"):
+            list(importer.iter_records(stream))
+        assert stream.bytes_read < 1024
+
+    def test_resume_from_checkpoint(self, tmp_path, db_session):
+        """Test that records before the checkpoint are skipped and the checkpoint is removed"""
+        path = self._write(tmp_path, LEGACY)
+        checkpoint = tmp_path / "database.json.checkpoint"
+        importer._write_checkpoint(str(checkpoint), {"path": path, "size": (tmp_path / "database.json").stat().st_size}, 1)
+
+        result = importer.import_file(db_session, path)
+
+        assert result["resumed_from"] == 1
+        assert db_session.get(Video, "v1") is None
+        assert db_session.get(Video, "v2") is not None
+        assert not checkpoint.exists()
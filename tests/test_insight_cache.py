@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+from app import insight_cache
+from app.models import Job, InsightCacheEntry, Video
+
+
+class TestInsightCache:
+    """Test suite for insight reuse by transcript hash and prompt version"""
+
+    def _complete(self, client, job_id, transcript, insights, **extra):
+        client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w1"})
+        return client.post(f"/api/worker/jobs/{job_id}/result", json={
+            "video_id": "ignored",
+            "status": "completed",
+            "transcript": transcript,
+            "insights": insights,
+            **extra,
+        })
+
+    def test_result_populates_cache_and_hash(self, client, create_video_job, db_session):
+        """Test that a completed result stores its insights under the transcript hash"""
+        video_id, job_id = create_video_job(status="pending")
+        self._complete(client, job_id, "same words", {"summary": "s"})
+
+        video = db_session.get(Video, video_id)
+        assert video.transcript_hash == insight_cache.transcript_hash("same words")
+        assert insight_cache.lookup(db_session, video.transcript_hash) == {"summary": "s"}
+
+    def test_cache_hit_completes_insights_job_without_worker(self, client, create_video_job, db_session):
+        """Test that a second video with the same transcript gets insights instantly"""
+        _, first_job = create_video_job(status="pending")
+        self._complete(client, first_job, "same words", {"summary": "s"})
+        video_id, _ = create_video_job(status="completed", job_status="completed", transcript="same words")
+
+        response = client.post(f"/api/videos/{video_id}/insights").json()
+
+        assert response["cached"] is True and response["coalesced"] is False
+        job = db_session.get(Job, response["job_id"])
+        assert job.status == "completed" and job.job_type == "insights"
+        assert db_session.get(Video, video_id).insights == {"summary": "s"}
+        assert client.get("/api/worker/jobs").json() == []
+
+    def test_prompt_version_change_misses(self, client, create_video_job, monkeypatch):
+        """Test that bumping the prompt version queues a real job"""
+        video_id, job_id = create_video_job(status="pending")
+        self._complete(client, job_id, "words", {"summary": "s"})
+        monkeypatch.setattr(insight_cache.settings, "insight_prompt_version", "v2")
+
+        response = client.post(f"/api/videos/{video_id}/insights/regenerate").json()
+
+        assert response["cached"] is False
+        assert [job["job_type"] for job in client.get("/api/worker/jobs").json()] == ["insights"]
+
+    def test_force_regenerate_bypasses_cache(self, client, create_video_job):
+        """Test that force=true always dispatches to a worker"""
+        video_id, job_id = create_video_job(status="pending")
+        self._complete(client, job_id, "words", {"summary": "s"})
+
+        response = client.post(f"/api/videos/{video_id}/insights/regenerate?force=true").json()
+
+        assert response["cached"] is False
+
+    def test_worker_lookup_and_stats(self, client, create_video_job):
+        """Test the worker lookup endpoint and hit/miss counters"""
+        insight_cache.stats.hits = insight_cache.stats.misses = 0
+        _, job_id = create_video_job(status="pending")
+        self._complete(client, job_id, "words", {"summary": "s"}, prompt_version="v7")
+        content_hash = insight_cache.transcript_hash("words")
+
+        hit = client.get(f"/api/worker/insights/cache/{content_hash}?prompt_version=v7")
+        miss = client.get(f"/api/worker/insights/cache/{content_hash}")
+        stats = client.get("/api/worker/insights/cache/stats").json()
+
+        assert hit.json()["insights"] == {"summary": "s"}
+        assert miss.status_code == 404
+        assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+        assert stats["entries"] == 1
+
+    def test_eviction_removes_least_recently_used(self, db_session):
+        """Test that eviction keeps the most recently used entries within limits"""
+        now = datetime.now(timezone.utc)
+        for i in range(5):
+            db_session.add(InsightCacheEntry(
+                transcript_hash=f"h{i}",
+                prompt_version="v1",
+                insights={"i": i},
+                size_bytes=100,
+                last_used_at=now - timedelta(minutes=10 - i),
+            ))
+        db_session.commit()
+
+        assert insight_cache.evict(db_session, max_entries=4, max_bytes=250) == 3
+        remaining = sorted(entry.transcript_hash for entry in db_session.query(InsightCacheEntry))
+        assert remaining == ["h3", "h4"]
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.api import videos
+from app.models import Job
+
+
+class TestInsightJobCoalescing:
+    """Test suite for deduplicated insight job creation"""
+
+    def test_repeated_requests_attach_to_queued_job(self, client, create_video_job):
+        """Test that repeated generate/regenerate calls return the same job"""
+        video_id, _ = create_video_job(status="completed", transcript="text", insights={"summary": "old"})
+
+        first = client.post(f"/api/videos/{video_id}/insights").json()
+        second = client.post(f"/api/videos/{video_id}/insights").json()
+        third = client.post(f"/api/videos/{video_id}/insights/regenerate").json()
+
+        assert first["coalesced"] is False
+        assert second["coalesced"] is True and third["coalesced"] is True
+        assert first["job_id"] == second["job_id"] == third["job_id"]
+
+    def test_request_attaches_to_running_job(self, client, create_video_job, db_session):
+        """Test that regenerate while a job is processing does not queue another"""
+        video_id, _ = create_video_job(status="completed", transcript="text", insights={"summary": "old"})
+        job_id = client.post(f"/api/videos/{video_id}/insights").json()["job_id"]
+        client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w1"})
+
+        response = client.post(f"/api/videos/{video_id}/insights/regenerate").json()
+
+        assert response == {
+            "message": "Insights regeneration already in progress",
+            "video_id": video_id,
+            "job_id": job_id,
+            "coalesced": True,
+            "cached": False,
+        }
+        assert db_session.query(Job).filter(Job.job_type == "insights").count() == 1
+
+    def test_race_loser_attaches_to_winner(self, client, create_video_job, db_session_factory, monkeypatch):
+        """Test that a request losing the insert race returns the winner's job"""
+        video_id, _ = create_video_job(status="completed", transcript="text")
+        db = db_session_factory()
+        winner = Job(video_id=video_id, job_type="insights", status="pending")
+        db.add(winner)
+        db.commit()
+        winner_id = winner.id
+        db.close()
+
+        # Simulate both checks running before the other process committed
+        original = videos._active_insights_job
+        calls = []
+        def stale_lookup(db, video_id):
+            calls.append(video_id)
+            return None if len(calls) <= 2 else original(db, video_id)
+        monkeypatch.setattr(videos, "_active_insights_job", stale_lookup)
+
+        response = client.post(f"/api/videos/{video_id}/insights").json()
+
+        assert len(calls) == 3
+        assert response["job_id"] == winner_id
+        assert response["coalesced"] is True
+
+    def test_database_rejects_second_queued_insights_job(self, db_session, create_video_job):
+        """Test that the partial unique index allows one queued insights job per video"""
+        video_id, _ = create_video_job(status="completed", job_status="completed")
+        db_session.add(Job(video_id=video_id, job_type="insights", status="pending"))
+        db_session.add(Job(video_id=video_id, job_type="process", status="pending"))
+        db_session.commit()
+
+        db_session.add(Job(video_id=video_id, job_type="insights", status="pending"))
+        with pytest.raises(IntegrityError):
+            db_session.commit()
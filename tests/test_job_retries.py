@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import backpressure, retry
+from app.models import Job, Video
+
+THROTTLED = "ERROR: [youtube] abc: Unable to download webpage: HTTP Error 429: Too Many Requests"
+
+
+class TestRetryPolicy:
+    """Test suite for transient error classification and backoff"""
+
+    @pytest.mark.parametrize("error, transient", [
+        (THROTTLED, True),
+        ("Read timed out. (read timeout=20)", True),
+        ("ERROR: [youtube] abc: Video unavailable", False),
+        ("ERROR: [youtube] abc: Private video. Sign in if you've been granted access", False),
+        ("Whisper crashed: out of memory", False),
+        (None, False),
+    ])
+    def test_classification(self, error, transient):
+        """Test that only known transient errors are retried by default"""
+        assert retry.is_transient(error) is transient
+
+    def test_backoff_grows_with_jitter_and_cap(self):
+        """Test exponential growth, the jitter range and the cap"""
+        assert retry.backoff_seconds(1, base=30, cap=3600, rng=lambda: 0.0) == 15
+        assert retry.backoff_seconds(1, base=30, cap=3600, rng=lambda: 1.0) == 30
+        assert retry.backoff_seconds(3, base=30, cap=3600, rng=lambda: 1.0) == 120
+        assert retry.backoff_seconds(20, base=30, cap=3600, rng=lambda: 1.0) == 3600
+
+
+class TestJobRetries:
+    """Test suite for retried and scheduled jobs"""
+
+    def _claim(self, client, job_id):
+        return client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w1"})
+
+    def _fail(self, client, job_id, error=THROTTLED, **extra):
+        return client.post(f"/api/worker/jobs/{job_id}/result", json={
+            "video_id": "ignored", "status": "failed", "error": error, **extra
+        })
+
+    def test_transient_failure_is_rescheduled(self, client, create_video_job, db_session):
+        """Test that a throttled job goes back to pending with a backoff instead of failing"""
+        video_id, job_id = create_video_job(status="pending")
+        self._claim(client, job_id)
+
+        response = self._fail(client, job_id).json()
+
+        job = db_session.get(Job, job_id)
+        assert response["attempts"] == 1
+        assert (job.status, job.worker_id, job.error_message) == ("pending", None, THROTTLED)
+        assert job.run_after.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+        assert db_session.get(Video, video_id).status == "pending"
+        # Not offered to workers and not claimable until the backoff has passed
+        assert client.get("/api/worker/jobs").json() == []
+        assert self._claim(client, job_id).status_code == 409
+        assert backpressure.pending(db_session) == 1
+
+    def test_retries_stop_after_max_attempts(self, client, create_video_job, db_session, monkeypatch):
+        """Test that the last allowed attempt fails the job for good"""
+        monkeypatch.setattr(retry.settings, "job_max_attempts", 2)
+        monkeypatch.setattr(retry.settings, "job_retry_base_seconds", 0)
+        video_id, job_id = create_video_job(status="pending")
+
+        self._claim(client, job_id)
+        self._fail(client, job_id)
+        self._claim(client, job_id)
+        self._fail(client, job_id)
+
+        job = db_session.get(Job, job_id)
+        assert (job.status, job.attempts) == ("failed", 2)
+        assert db_session.get(Video, video_id).status == "failed"
+
+    def test_worker_verdict_overrides_classification(self, client, create_video_job, db_session):
+        """Test the retryable flag in both directions"""
+        _, permanent = create_video_job(status="pending")
+        _, transient = create_video_job(status="pending")
+        for job_id in (permanent, transient):
+            self._claim(client, job_id)
+
+        self._fail(client, permanent, retryable=False)
+        self._fail(client, transient, error="worker disk full", retryable=True)
+
+        assert db_session.get(Job, permanent).status == "failed"
+        assert db_session.get(Job, transient).status == "pending"
+
+    def test_scheduled_submission(self, client):
+        """Test that a submission scheduled for later is listed only once it is due"""
+        later = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+        client.post("/api/videos/", json={"url": "https://youtu.be/later", "run_after": later})
+        now = client.post("/api/videos/", json={"url": "https://youtu.be/now"}).json()
+
+        listed = client.get("/api/worker/jobs").json()
+
+        assert [job["video_id"] for job in listed] == [now["id"]]
+
+    def _expire(self, db_session, job_id):
+        db_session.query(Job).filter(Job.id == job_id).update(
+            {"updated_at": datetime.now(timezone.utc) - timedelta(hours=2)}
+        )
+        db_session.commit()
+        return retry.requeue_expired_claims(db_session, timeout_seconds=60)
+
+    def test_late_result_after_expired_claim_is_refused(self, client, create_video_job, db_session):
+        """Test that the worker whose claim expired cannot complete the job another worker now holds"""
+        video_id, job_id = create_video_job(status="pending")
+        self._claim(client, job_id)
+        assert self._expire(db_session, job_id) == 1
+
+        late = client.post(f"/api/worker/jobs/{job_id}/result", json={"video_id": video_id, "status": "completed"})
+        assert late.status_code == 409
+
+        client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w2"})
+        stale = {"video_id": video_id, "status": "completed", "worker_id": "w1"}
+        assert client.post(f"/api/worker/jobs/{job_id}/result", json=stale).status_code == 409
+        current = {"video_id": video_id, "status": "completed", "worker_id": "w2", "transcript": "text"}
+        assert client.post(f"/api/worker/jobs/{job_id}/result", json=current).status_code == 200
+
+    def test_expired_insights_claim_restores_the_video(self, client, create_video_job, db_session):
+        """Test that an insights claim taken back leaves the video completed, not processing"""
+        video_id, _ = create_video_job(status="completed", job_status="completed", transcript="text")
+        job = Job(video_id=video_id, job_type="insights", status="pending")
+        db_session.add(job)
+        db_session.commit()
+        self._claim(client, job.id)
+        assert db_session.get(Video, video_id).status == "processing"
+
+        assert self._expire(db_session, job.id) == 1
+        db_session.expire_all()
+
+        assert db_session.get(Video, video_id).status == "completed"
+        assert db_session.get(Job, job.id).status == "pending"
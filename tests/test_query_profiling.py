@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import profiling
+from app.models import Job, Video
+from app.profiling import QueryProfiler, QueryProfilingMiddleware, fingerprint
+
+
+@pytest.fixture
+def profiled(db_session_factory, monkeypatch):
+    """Fresh profiler timing the statements of the test database"""
+    monkeypatch.setattr(profiling.settings, "db_profiling_enabled", True)
+    monkeypatch.setattr(profiling.settings, "db_n_plus_one_threshold", 5)
+    query_profiler = QueryProfiler()
+    engine = db_session_factory.kw["bind"]
+    query_profiler.install(engine)
+    yield query_profiler
+    query_profiler.uninstall(engine)
+
+
+class TestQueryProfiling:
+    """Test suite for statement fingerprints, timings and N+1 detection"""
+
+    def _videos_with_jobs(self, db, count):
+        for n in range(count):
+            video = Video(url=f"https://youtu.be/{n}", status="pending")
+            db.add(video)
+            db.flush()
+            db.add(Job(video_id=video.id, status="pending"))
+        db.commit()
+
+    def test_fingerprint_normalizes_literals_and_lists(self):
+        """Test that executions differing only in values share a fingerprint"""
+        assert fingerprint("SELECT * FROM jobs\n WHERE id IN (?, ?, ?) AND status = 'pending' LIMIT 10") == \
+            fingerprint("SELECT * FROM jobs WHERE id IN (?, ?) AND status = 'failed' LIMIT 50") == \
+            "SELECT * FROM jobs WHERE id IN (?...) AND status = ? LIMIT ?"
+        assert fingerprint("INSERT INTO t (a, b) VALUES (%(a_m0)s, %(b_m0)s), (%(a_m1)s, %(b_m1)s)") == \
+            "INSERT INTO t (a, b) VALUES (?...), ..."
+
+    def test_lazy_loads_are_reported_as_n_plus_one(self, profiled, db_session, caplog):
+        """Test that a lazy relationship load per row is flagged for the request's route"""
+        self._videos_with_jobs(db_session, 6)
+        db_session.expunge_all()
+        profiled.reset()
+
+        with caplog.at_level(logging.WARNING, logger="app.profiling"):
+            with profiled.request({"type": "http", "method": "GET", "path": "/api/jobs"}):
+                [job.video.url for job in db_session.query(Job).all()]
+
+        snapshot = profiled.snapshot(sort="count")
+        top = snapshot["statements"][0]
+        assert top["fingerprint"].startswith("SELECT videos.")
+        assert top["count"] == 6
+        assert top["routes"] == {"GET /api/jobs": 6}
+        assert top["p95_ms"] <= top["max_ms"]
+        assert snapshot["requests"] == 1
+        assert snapshot["n_plus_one"] == [
+            {"route": "GET /api/jobs", "fingerprint": top["fingerprint"], "requests": 1, "max_repeats": 6}
+        ]
+        assert "Possible N+1 in GET /api/jobs" in caplog.text
+
+    def test_slow_queries_are_logged(self, profiled, db_session, monkeypatch, caplog):
+        """Test that statements over the threshold are logged, outside requests as background"""
+        monkeypatch.setattr(profiling.settings, "db_slow_query_ms", 0.000001)
+
+        with caplog.at_level(logging.WARNING, logger="app.profiling"):
+            db_session.query(Video).count()
+
+        assert "Slow query" in caplog.text and "in background" in caplog.text
+
+    def test_middleware_attributes_statements_to_route_templates(self, profiled, db_session_factory):
+        """Test that the middleware labels statements with the matched route, not the raw path"""
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        def read_item(item_id: str):
+            db = db_session_factory()
+            try:
+                return {"found": db.get(Video, item_id) is not None}
+            finally:
+                db.close()
+
+        client = TestClient(QueryProfilingMiddleware(app, profiled))
+        client.get("/items/a")
+        client.get("/items/b")
+
+        routes = profiled.snapshot()["statements"][0]["routes"]
+        assert routes == {"GET /items/{item_id}": 2}
+
+    def test_debug_endpoint(self, client, monkeypatch):
+        """Test that the report needs profiling enabled and the worker token"""
+        assert client.get("/api/debug/queries").status_code == 404
+
+        monkeypatch.setattr(profiling.settings, "db_profiling_enabled", True)
+        monkeypatch.setattr(profiling.settings, "worker_api_key", "secret")
+        assert client.get("/api/debug/queries").status_code == 401
+
+        response = client.get("/api/debug/queries", params={"sort": "p95"}, headers={"X-Worker-Token": "secret"})
+        assert response.status_code == 200
+        assert set(response.json()) == {"since", "requests", "statements", "n_plus_one"}
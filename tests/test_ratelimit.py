@@ -0,0 +1,182 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import ratelimit
+from app.config import Settings
+from app.ratelimit import (
+    InMemoryRateLimitStore,
+    RateLimitStore,
+    RateLimitMiddleware,
+    RateLimitRule,
+    AdmissionControlMiddleware,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    """Test suite for the in-memory token bucket store"""
+
+    def test_burst_then_refill(self):
+        """Test that a bucket allows its burst and refills at the configured rate"""
+        clock = FakeClock()
+        store = InMemoryRateLimitStore(clock=clock)
+
+        assert [store.consume("a", rate=1.0, capacity=3) for _ in range(3)] == [0, 0, 0]
+        assert store.consume("a", rate=1.0, capacity=3) == 1.0
+
+        clock.now = 1.0
+        assert store.consume("a", rate=1.0, capacity=3) == 0
+
+    def test_keys_are_independent(self):
+        """Test that clients do not share buckets"""
+        store = InMemoryRateLimitStore(clock=FakeClock())
+
+        store.consume("a", rate=1.0, capacity=1)
+        assert store.consume("a", rate=1.0, capacity=1) > 0
+        assert store.consume("b", rate=1.0, capacity=1) == 0
+
+    def test_store_interface_is_abstract(self):
+        """Test that stores must implement consume"""
+        with pytest.raises(TypeError):
+            RateLimitStore()
+
+    def test_idle_keys_evicted(self):
+        """Test that the store keeps at most max_keys buckets"""
+        store = InMemoryRateLimitStore(max_keys=2, clock=FakeClock())
+        for key in ("a", "b", "c"):
+            store.consume(key, rate=1.0, capacity=1)
+
+        assert len(store._buckets) == 2
+
+
+class TestRateLimitMiddleware:
+    """Test suite for per-client rate limiting"""
+
+    def setup_method(self):
+        test_app = FastAPI()
+        test_app.add_middleware(
+            RateLimitMiddleware,
+            rules=[RateLimitRule("submit", "POST", r"/api/videos/?", per_minute=60, burst=2)],
+        )
+
+        @test_app.post("/api/videos/")
+        async def submit():
+            return {"ok": True}
+
+        @test_app.get("/api/videos/")
+        async def listing():
+            return []
+
+        self.client = TestClient(test_app)
+
+    def test_over_limit_returns_429(self):
+        """Test that requests over the burst get 429 with Retry-After"""
+        statuses = [self.client.post("/api/videos/").status_code for _ in range(3)]
+
+        assert statuses == [200, 200, 429]
+        response = self.client.post("/api/videos/")
+        assert int(response.headers["retry-after"]) >= 1
+
+    def _configure(self, monkeypatch, **values):
+        monkeypatch.setattr(ratelimit, "settings", Settings(**values))
+
+    def test_api_keys_limited_separately(self, monkeypatch):
+        """Test that distinct configured API keys have separate buckets"""
+        self._configure(monkeypatch, client_api_keys="one,two")
+        for _ in range(2):
+            self.client.post("/api/videos/", headers={"X-API-Key": "one"})
+
+        assert self.client.post("/api/videos/", headers={"X-API-Key": "one"}).status_code == 429
+        assert self.client.post("/api/videos/", headers={"X-API-Key": "two"}).status_code == 200
+
+    def test_unknown_api_keys_share_the_address_bucket(self, monkeypatch):
+        """Test that rotating made-up API keys does not get around the limit"""
+        self._configure(monkeypatch, client_api_keys="one")
+        statuses = [
+            self.client.post("/api/videos/", headers={"X-API-Key": f"made-up-{n}"}).status_code for n in range(3)
+        ]
+
+        assert statuses == [200, 200, 429]
+
+    def test_forwarded_for_ignored_without_trusted_proxy(self, monkeypatch):
+        """Test that a client-supplied X-Forwarded-For does not pick the bucket"""
+        self._configure(monkeypatch)
+        statuses = [
+            self.client.post("/api/videos/", headers={"X-Forwarded-For": f"10.0.0.{n}"}).status_code for n in range(3)
+        ]
+
+        assert statuses == [200, 200, 429]
+
+    def test_address_appended_by_trusted_proxy(self, monkeypatch):
+        """Test that only the entry added by the trusted proxy identifies the client"""
+        self._configure(monkeypatch, trusted_proxy_count=1)
+        spoofed = [
+            self.client.post("/api/videos/", headers={"X-Forwarded-For": f"10.0.0.{n}, 203.0.113.7"}).status_code
+            for n in range(3)
+        ]
+        other = self.client.post("/api/videos/", headers={"X-Forwarded-For": "10.0.0.1, 198.51.100.2"})
+
+        assert spoofed == [200, 200, 429]
+        assert other.status_code == 200
+
+    def test_railway_clients_get_separate_buckets(self, monkeypatch):
+        """Test that behind Railway's proxy each forwarded client has its own bucket without extra settings"""
+        self._configure(monkeypatch, railway_environment="production")
+
+        heavy = [
+            self.client.post("/api/videos/", headers={"X-Forwarded-For": "203.0.113.7"}).status_code for _ in range(3)
+        ]
+        other = self.client.post("/api/videos/", headers={"X-Forwarded-For": "198.51.100.2"})
+
+        assert heavy == [200, 200, 429]
+        assert other.status_code == 200
+
+    def test_unmatched_routes_not_limited(self):
+        """Test that routes without a rule are never limited"""
+        assert all(self.client.get("/api/videos/").status_code == 200 for _ in range(5))
+
+
+class TestAdmissionControl:
+    """Test suite for load shedding when the pool is saturated"""
+
+    def _client(self, usage):
+        test_app = FastAPI()
+        test_app.add_middleware(AdmissionControlMiddleware, pool_usage=lambda: usage, worker_reserve=2)
+
+        @test_app.get("/api/videos/")
+        async def listing():
+            return []
+
+        @test_app.get("/api/worker/jobs")
+        async def jobs():
+            return []
+
+        return TestClient(test_app)
+
+    def test_public_requests_shed_when_pool_saturated(self):
+        """Test that public requests get 503 once only the worker reserve is left"""
+        client = self._client((8, 10))
+        response = client.get("/api/videos/")
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+
+    def test_worker_requests_never_shed(self):
+        """Test that worker endpoints stay available under overload"""
+        assert self._client((10, 10)).get("/api/worker/jobs").status_code == 200
+
+    def test_requests_admitted_with_free_capacity(self):
+        """Test that requests pass while the pool has spare connections"""
+        assert self._client((3, 10)).get("/api/videos/").status_code == 200
+
+    def test_unbounded_pool_never_sheds(self):
+        """Test that pools without a capacity (e.g. SQLite) never shed load"""
+        assert self._client((100, None)).get("/api/videos/").status_code == 200
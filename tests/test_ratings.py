@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.models import Video, VideoRating
+
+
+class TestVideoRatings:
+    """Test suite for per-rater ratings and the top feeds"""
+
+    @pytest.fixture(autouse=True)
+    def _behind_proxy(self, monkeypatch):
+        # Raters are told apart by the address the trusted proxy forwards
+        monkeypatch.setattr(settings, "trusted_proxy_count", 1)
+
+    def _rate(self, client, video_id, rating, rater=None, **headers):
+        if rater:
+            headers["X-Forwarded-For"] = rater
+        return client.post(f"/api/videos/{video_id}/rating", json={"rating": rating}, headers=headers)
+
+    def test_votes_from_several_raters_are_aggregated(self, client, create_video_job, db_session):
+        """Test sum, count, rounded mean and Bayesian average over several raters"""
+        video_id, _ = create_video_job(status="completed")
+        self._rate(client, video_id, 5, "203.0.113.1")
+        self._rate(client, video_id, 4, "203.0.113.2")
+        response = self._rate(client, video_id, 2, "203.0.113.3").json()
+
+        assert response["rating_count"] == 3
+        assert response["rating_average"] == round(11 / 3, 3)
+        # Defaults: prior weight 5 at mean 3.0
+        assert response["rating_bayes"] == (5 * 3.0 + 11) / 8
+        video = db_session.get(Video, video_id)
+        assert (video.rating_sum, video.rating_count, video.rating) == (11, 3, 4)
+
+    def test_changed_vote_replaces_previous_one(self, client, create_video_job, db_session):
+        """Test that a rater voting again changes the sum but not the count"""
+        video_id, _ = create_video_job(status="completed")
+        self._rate(client, video_id, 1, "203.0.113.1")
+        response = self._rate(client, video_id, 5, "203.0.113.1").json()
+
+        assert (response["rating_count"], response["rating_average"]) == (1, 5)
+        assert db_session.query(VideoRating).count() == 1
+
+    def test_rater_is_identified_by_the_server(self, client, create_video_job, db_session):
+        """Test that client-chosen rater ids cannot add votes and unidentified callers cannot vote"""
+        video_id, _ = create_video_job(status="completed")
+
+        for stuffed in ("bob", "carol", "dave"):
+            response = client.post(
+                f"/api/videos/{video_id}/rating",
+                json={"rating": 5, "rater_id": stuffed},
+                headers={"X-Rater-Id": stuffed, "X-Forwarded-For": "203.0.113.1"},
+            )
+        assert response.json()["rating_count"] == 1
+        assert self._rate(client, video_id, 6, "203.0.113.1").status_code == 400
+
+        with patch("app.ratings.client_key", return_value="ip:unknown"):
+            assert self._rate(client, video_id, 3).status_code == 400
+        assert db_session.query(VideoRating).count() == 1
+
+    def test_top_by_rating_prefers_more_votes(self, client, create_video_job):
+        """Test that one 5-star vote ranks below many high votes"""
+        single, _ = create_video_job(status="completed")
+        popular, _ = create_video_job(status="completed")
+        self._rate(client, single, 5, "203.0.113.1")
+        for rater in range(6):
+            self._rate(client, popular, 5 if rater else 4, f"198.51.100.{rater}")
+
+        top = client.get("/api/videos/top?by=rating").json()
+
+        assert [v["id"] for v in top["videos"]] == [popular, single]
+        assert top["videos"][0]["rating_count"] == 6
+        assert top["next_cursor"] is None
+
+    def test_keyset_pagination(self, client, create_video_job):
+        """Test that paging by views and recency visits every video exactly once"""
+        ids = [create_video_job(status="completed", view_count=count % 3)[0] for count in range(7)]
+
+        for by in ("views", "recent"):
+            seen, cursor = [], None
+            while True:
+                url = f"/api/videos/top?by={by}&limit=3" + (f"&cursor={cursor}" if cursor else "")
+                page = client.get(url).json()
+                seen.extend(v["id"] for v in page["videos"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+            assert sorted(seen) == sorted(ids)
+            assert len(seen) == len(set(seen))
+
+    def test_invalid_cursor(self, client):
+        """Test that a malformed cursor is rejected"""
+        assert client.get("/api/videos/top?cursor=not-a-cursor").status_code == 400
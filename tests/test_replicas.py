@@ -0,0 +1,115 @@
+import time
+from unittest.mock import patch
+
+from fastapi import Request
+from sqlalchemy import text
+
+from app.database import ReplicaRouter, create_db_engine, get_read_db, READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_HEADER
+
+
+def _request(cookies=None, extra_headers=None):
+    headers = [(name.lower().encode(), value.encode()) for name, value in (extra_headers or {}).items()]
+    if cookies:
+        cookie = "; ".join(f"{k}={v}" for k, v in cookies.items())
+        headers.append((b"cookie", cookie.encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class TestReplicaRouting:
+    """Test suite for read replica routing with two SQLite databases"""
+
+    def setup_method(self, method):
+        self.engines = []
+
+    def teardown_method(self, method):
+        for db_engine in self.engines:
+            db_engine.dispose()
+
+    def _engine(self, path, label):
+        db_engine = create_db_engine(f"sqlite:///{path}")
+        with db_engine.begin() as conn:
+            conn.execute(text("CREATE TABLE IF NOT EXISTS node (name TEXT)"))
+            conn.execute(text("INSERT INTO node VALUES (:name)"), {"name": label})
+        self.engines.append(db_engine)
+        return db_engine
+
+    def test_round_robin_across_replicas(self, tmp_path):
+        """Test that reads rotate across replicas"""
+        primary = self._engine(tmp_path / "primary.db", "primary")
+        replicas = [self._engine(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(2)]
+        router = ReplicaRouter(primary, replicas)
+
+        chosen = [router.choose() for _ in range(4)]
+
+        assert chosen == [replicas[0], replicas[1], replicas[0], replicas[1]]
+
+    def test_no_replicas_uses_primary(self, tmp_path):
+        """Test that the primary serves reads when no replicas are configured"""
+        primary = self._engine(tmp_path / "primary.db", "primary")
+        assert ReplicaRouter(primary, []).choose() is primary
+
+    def test_unhealthy_replica_skipped_until_recovered(self, tmp_path):
+        """Test that a failed replica is skipped and rejoins after a health check"""
+        primary = self._engine(tmp_path / "primary.db", "primary")
+        replicas = [self._engine(tmp_path / f"replica{i}.db", f"replica{i}") for i in range(2)]
+        router = ReplicaRouter(primary, replicas, retry_seconds=60)
+
+        router.mark_down(replicas[0])
+        assert {router.choose() for _ in range(4)} == {replicas[1]}
+
+        router.mark_down(replicas[1])
+        assert router.choose() is primary
+
+        router.check_health()
+        assert {router.choose() for _ in range(4)} == set(replicas)
+
+    def test_connection_failure_marks_replica_down(self, tmp_path):
+        """Test that a replica that cannot be reached is taken out of rotation"""
+        primary = self._engine(tmp_path / "primary.db", "primary")
+        broken = create_db_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+        self.engines.append(broken)
+        router = ReplicaRouter(primary, [broken])
+
+        router.check_health()
+
+        assert not router.is_healthy(broken)
+        assert router.choose() is primary
+
+    def test_read_your_writes_routes_to_primary(self, tmp_path):
+        """Test that a client that just wrote reads from the primary"""
+        primary = self._engine(tmp_path / "primary.db", "primary")
+        replica = self._engine(tmp_path / "replica.db", "replica")
+        router = ReplicaRouter(primary, [replica])
+
+        def read_node(request):
+            gen = get_read_db(request)
+            db = next(gen)
+            try:
+                return db.execute(text("SELECT name FROM node")).scalar()
+            finally:
+                gen.close()
+
+        with patch("app.database.replica_router", router):
+            assert read_node(_request()) == "replica"
+            assert read_node(_request({READ_YOUR_WRITES_COOKIE: str(time.time())})) == "primary"
+            assert read_node(_request({READ_YOUR_WRITES_COOKIE: str(time.time() - 3600)})) == "replica"
+
+    def test_echoed_write_header_routes_to_primary(self, tmp_path):
+        """Test that a cross-origin client echoing X-Last-Write reads its own writes from the primary"""
+        primary = self._engine(tmp_path / "primary.db", "primary")
+        replica = self._engine(tmp_path / "replica.db", "replica")
+        router = ReplicaRouter(primary, [replica])
+
+        def read_node(marker):
+            gen = get_read_db(_request(extra_headers={READ_YOUR_WRITES_HEADER: marker}))
+            db = next(gen)
+            try:
+                return db.execute(text("SELECT name FROM node")).scalar()
+            finally:
+                gen.close()
+
+        with patch("app.database.replica_router", router):
+            assert read_node(str(time.time())) == "primary"
+            assert read_node(str(time.time() - 3600)) == "replica"
+            assert read_node(str(time.time() + 3600)) == "replica"
+            assert read_node("garbage") == "replica"
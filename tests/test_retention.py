@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from app.models import Video, Job, JobArchive, TranscriptSegment, TranscriptArchive
+from app.retention import archive_jobs, offload_transcripts
+
+
+def _old(days):
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+class TestRetention:
+    """Test suite for job archival and transcript offloading"""
+
+    def _video_with_jobs(self, db):
+        video = Video(url="https://youtu.be/abc", status="completed", transcript="hello world",
+                      created_at=_old(100), updated_at=_old(100))
+        db.add(video)
+        db.flush()
+        db.add_all([
+            Job(video_id=video.id, status="completed", completed_at=_old(60)),
+            Job(video_id=video.id, status="failed", completed_at=_old(45)),
+            Job(video_id=video.id, status="completed", completed_at=_old(1)),
+            Job(video_id=video.id, status="pending"),
+        ])
+        db.commit()
+        return video
+
+    def test_archive_moves_only_old_finished_jobs(self, db_session):
+        """Test that old completed/failed jobs move to jobs_archive in batches"""
+        self._video_with_jobs(db_session)
+
+        archived = archive_jobs(db_session, older_than_days=30, batch_size=1)
+
+        assert archived == 2
+        assert db_session.query(Job).count() == 2
+        assert db_session.query(JobArchive).count() == 2
+        assert {j.status for j in db_session.query(Job)} == {"completed", "pending"}
+
+    def test_archive_exports_to_compressed_files(self, db_session, tmp_path):
+        """Test that archived jobs can be exported as .jsonl.gz instead of the archive table"""
+        self._video_with_jobs(db_session)
+
+        archived = archive_jobs(db_session, older_than_days=30, export_dir=str(tmp_path))
+
+        assert archived == 2
+        assert db_session.query(JobArchive).count() == 0
+        files = os.listdir(tmp_path)
+        assert len(files) == 1
+        with gzip.open(tmp_path / files[0], "rt") as f:
+            rows = [json.loads(line) for line in f]
+        assert {row["status"] for row in rows} == {"completed", "failed"}
+
+    def test_offload_transcripts_to_archive_table(self, client, db_session):
+        """Test that cold transcripts are moved to the archive table and still readable"""
+        video = self._video_with_jobs(db_session)
+
+        offloaded = offload_transcripts(db_session, older_than_days=30)
+
+        db_session.refresh(video)
+        assert offloaded == 1
+        assert video.transcript is None
+        assert video.transcript_offloaded
+        assert db_session.get(TranscriptArchive, video.id).transcript != b"hello world"
+        assert video.load_transcript() == "hello world"
+        assert client.get(f"/api/videos/{video.id}").json()["transcript"] == "hello world"
+
+    def test_listing_does_not_load_transcripts(self, client, db_session):
+        """Test that the video list leaves transcripts out instead of reading one per row"""
+        video = self._video_with_jobs(db_session)
+        offload_transcripts(db_session, older_than_days=30)
+
+        with patch("app.transcript_store.load_transcript") as load:
+            listed = client.get("/api/videos/").json()
+
+        assert [row["id"] for row in listed] == [video.id]
+        assert listed[0]["transcript"] is None
+        load.assert_not_called()
+
+    def test_offloaded_segments_are_served_and_cleaned_up(self, client, db_session):
+        """Test that segments move to the archive with the transcript and the archive row goes when replaced"""
+        video = self._video_with_jobs(db_session)
+        db_session.add_all([
+            TranscriptSegment(video_id=video.id, position=0, start_time=0.0, end_time=1.5, text="hello"),
+            TranscriptSegment(video_id=video.id, position=1, start_time=1.5, end_time=3.0, text="world"),
+        ])
+        db_session.commit()
+
+        offload_transcripts(db_session, older_than_days=30)
+
+        assert db_session.query(TranscriptSegment).count() == 0
+        segments = client.get(f"/api/videos/{video.id}/transcript/segments", params={"start": 2}).json()
+        assert [segment["text"] for segment in segments["segments"]] == ["world"]
+
+        job_id = db_session.query(Job).filter(Job.status == "pending").one().id
+        client.post(f"/api/worker/jobs/{job_id}/result", json={
+            "video_id": video.id, "status": "completed", "transcript": "hello again"
+        })
+
+        db_session.refresh(video)
+        assert not video.transcript_offloaded
+        assert db_session.get(TranscriptArchive, video.id) is None
+        # Without new segments in the result, the offloaded ones are back in the table
+        assert db_session.query(TranscriptSegment).count() == 2
@@ -0,0 +1,46 @@
+import os
+from unittest.mock import patch
+
+from app.config import Settings
+from app import serve
+
+
+class TestServingProfile:
+    """Test suite for multi-process serving settings"""
+
+    def test_workers_default_to_cpu_count(self):
+        """Test that the default follows the core count, capped and regardless of DEBUG"""
+        with patch.dict(os.environ, {"DEBUG": "True"}, clear=True), patch("os.cpu_count", return_value=2):
+            assert Settings().workers == 2
+        with patch.dict(os.environ, {}, clear=True), patch("os.cpu_count", return_value=32):
+            assert Settings().workers == 4
+
+    def test_pool_split_from_connection_budget(self):
+        """Test that the total connection budget is divided between processes"""
+        env = {"WEB_CONCURRENCY": "4", "DB_CONNECTION_BUDGET": "40", "DB_POOL_SIZE": "6"}
+        with patch.dict(os.environ, env, clear=True):
+            assert Settings().pool_limits == (6, 4)
+
+    def test_pool_without_budget_uses_settings(self):
+        with patch.dict(os.environ, {"DB_POOL_SIZE": "5", "DB_MAX_OVERFLOW": "2"}, clear=True):
+            assert Settings().pool_limits == (5, 2)
+
+    def test_serve_production_runs_worker_processes(self):
+        """Test that production serving starts one worker per configured process without reload"""
+        with patch.multiple(serve.settings, debug=True, reload=False, web_concurrency=3), \
+                patch.dict(os.environ, {"PORT": "9123"}), \
+                patch("app.serve.uvicorn.run") as run:
+            serve.main()
+
+        kwargs = run.call_args.kwargs
+        assert kwargs["workers"] == 3
+        assert kwargs["reload"] is False
+        assert kwargs["port"] == 9123
+
+    def test_serve_reload_runs_single_process(self):
+        with patch.multiple(serve.settings, reload=True, web_concurrency=None), \
+                patch("app.serve.uvicorn.run") as run:
+            serve.main()
+
+        assert run.call_args.kwargs["workers"] == 1
+        assert run.call_args.kwargs["reload"] is True
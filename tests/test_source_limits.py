@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import retry, sources
+from app.config import Settings
+from app.models import Job, SourceSlot, Video
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Set per-source concurrency limits for a test"""
+    def configure(value, default=0):
+        monkeypatch.setattr(
+            sources, "settings", Settings(source_concurrency_limits=value, source_concurrency_default=default)
+        )
+    return configure
+
+
+class TestSourceLimits:
+    """Test suite for per-source concurrency limits"""
+
+    def _submit(self, client, url):
+        return client.post("/api/videos/", json={"url": url}).json()["id"]
+
+    def _job(self, db_session, video_id):
+        return db_session.query(Job).filter(Job.video_id == video_id).one()
+
+    def _claim(self, client, job_id, worker_id="w1"):
+        return client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": worker_id})
+
+    def _in_flight(self, db_session, source):
+        db_session.expire_all()
+        return db_session.query(SourceSlot.in_flight).filter(SourceSlot.source == source).scalar() or 0
+
+    @pytest.mark.parametrize("url, extractor, source", [
+        ("https://www.youtube.com/watch?v=abc", None, "youtube"),
+        ("https://youtu.be/abc", None, "youtube"),
+        ("https://m.youtube.com/shorts/abc", None, "youtube"),
+        ("https://x.com/user/status/1", None, "twitter"),
+        ("https://cdn.example.org/a.mp4", None, "example.org"),
+        ("https://example.org/a.mp4", "generic", "example.org"),
+        ("https://www.youtube.com/@chan", "youtube:tab", "youtube"),
+        ("not a url", None, None),
+    ])
+    def test_source_for(self, url, extractor, source):
+        """Test that extractors win and domains map onto extractor names"""
+        assert sources.source_for(url, extractor) == source
+
+    def test_limit_parsing(self):
+        """Test that limits are case-insensitive and malformed entries are ignored"""
+        settings = Settings(source_concurrency_limits="YouTube=4, vimeo=2,bad,x=y")
+        assert settings.source_limits == {"youtube": 4, "vimeo": 2}
+
+    def test_saturated_source_is_refused_and_skipped(self, client, db_session, limits):
+        """Test that a source at its limit cannot be claimed or listed while others can"""
+        limits("youtube=1")
+        first = self._job(db_session, self._submit(client, "https://youtu.be/a"))
+        second = self._job(db_session, self._submit(client, "https://www.youtube.com/watch?v=b"))
+        other = self._job(db_session, self._submit(client, "https://vimeo.com/1"))
+        assert first.source == "youtube"
+
+        assert self._claim(client, first.id).status_code == 200
+        refused = self._claim(client, second.id, "w2")
+        listed = [job["id"] for job in client.get("/api/worker/jobs").json()]
+
+        assert refused.status_code == 409
+        assert "youtube" in refused.json()["detail"]
+        assert listed == [other.id]
+        assert self._claim(client, other.id, "w2").status_code == 200
+        assert self._in_flight(db_session, "youtube") == 1
+        db_session.refresh(second)
+        assert (second.status, second.attempts) == ("pending", 0)
+
+    def test_listing_caps_jobs_per_source(self, client, db_session, limits):
+        """Test that a listing offers no more jobs of a source than it has free slots"""
+        limits("", default=2)
+        for n in range(4):
+            self._submit(client, f"https://youtu.be/{n}")
+        self._submit(client, "https://vimeo.com/1")
+
+        listed = client.get("/api/worker/jobs", params={"limit": 10}).json()
+
+        assert sorted(job["source"] for job in listed) == ["vimeo", "youtube", "youtube"]
+
+    def test_result_frees_the_slot(self, client, db_session, limits):
+        """Test that a finished job gives its slot to the next job of the source"""
+        limits("youtube=1")
+        first = self._job(db_session, self._submit(client, "https://youtu.be/a"))
+        second = self._job(db_session, self._submit(client, "https://youtu.be/b"))
+        self._claim(client, first.id)
+
+        client.post(f"/api/worker/jobs/{first.id}/result", json={"video_id": first.video_id, "status": "completed"})
+
+        assert self._in_flight(db_session, "youtube") == 0
+        assert self._claim(client, second.id, "w2").status_code == 200
+
+    def test_reconcile_slots(self, client, db_session, limits):
+        """Test that retention resets drifted slot counters to the jobs in processing"""
+        limits("youtube=1")
+        job = self._job(db_session, self._submit(client, "https://youtu.be/a"))
+        self._claim(client, job.id)
+        db_session.query(SourceSlot).update({"in_flight": 5})
+        db_session.add(SourceSlot(source="vimeo", in_flight=2))
+        db_session.commit()
+
+        assert sources.reconcile_slots(db_session) == 2
+        assert self._in_flight(db_session, "youtube") == 1
+        assert db_session.get(SourceSlot, "vimeo") is None
+
+    def _go_silent(self, db_session, job):
+        """Backdate the job's last report as if its worker had died"""
+        db_session.query(Job).filter(Job.id == job.id).update(
+            {"updated_at": datetime.now(timezone.utc) - timedelta(hours=2)}
+        )
+        db_session.commit()
+
+    def test_expired_claim_frees_the_slot(self, client, db_session, limits, monkeypatch):
+        """Test that a job whose worker went silent is requeued and its slot reused"""
+        limits("youtube=1")
+        monkeypatch.setattr(retry.settings, "job_max_attempts", 2)
+        first = self._job(db_session, self._submit(client, "https://youtu.be/a"))
+        second = self._job(db_session, self._submit(client, "https://youtu.be/b"))
+        self._claim(client, first.id)
+
+        assert retry.requeue_expired_claims(db_session, timeout_seconds=60) == 0
+        self._go_silent(db_session, first)
+        assert retry.requeue_expired_claims(db_session, timeout_seconds=60) == 1
+
+        db_session.refresh(first)
+        assert (first.status, first.worker_id) == ("pending", None)
+        assert db_session.get(Video, first.video_id).status == "pending"
+        assert self._in_flight(db_session, "youtube") == 0
+        assert self._claim(client, second.id, "w2").status_code == 200
+
+        # A job that keeps losing its worker fails once its attempts are used up
+        client.post(f"/api/worker/jobs/{second.id}/result", json={"video_id": second.video_id, "status": "completed"})
+        assert self._claim(client, first.id, "w3").status_code == 200
+        self._go_silent(db_session, first)
+        assert retry.requeue_expired_claims(db_session, timeout_seconds=60) == 1
+        db_session.refresh(first)
+        assert (first.status, first.attempts) == ("failed", 2)
+        assert self._in_flight(db_session, "youtube") == 0
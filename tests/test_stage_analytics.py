@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone
+
+from app.analytics import duration_bucket, percentile, stage_durations
+from app.models import Job
+
+
+class TestStageHistory:
+    """Test suite for per-stage timing capture"""
+
+    def test_stage_reports_build_timeline(self, client, create_video_job, db_session):
+        """Test that stage updates and the result produce closed stage intervals"""
+        video_id, job_id = create_video_job(status="pending")
+        client.post(f"/api/worker/jobs/{job_id}/claim", json={"worker_id": "w1"})
+        for stage in ("downloading", "downloading", "transcribing", "generating_insights"):
+            client.post(f"/api/worker/jobs/{job_id}/stage", json={"video_id": video_id, "processing_stage": stage})
+        client.post(f"/api/worker/jobs/{job_id}/result", json={"video_id": video_id, "status": "completed"})
+
+        history = db_session.get(Job, job_id).stage_history
+        assert [entry[0] for entry in history] == ["downloading", "transcribing", "generating_insights"]
+        assert all(entry[2] is not None and entry[2] >= entry[1] for entry in history)
+        assert history[0][2] == history[1][1]
+
+    def test_stage_durations(self):
+        """Test queue, total and per-stage durations of one job"""
+        created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        started = created + timedelta(seconds=30)
+        completed = started + timedelta(seconds=100)
+        start = started.timestamp()
+        history = [["downloading", start, start + 20], ["transcribing", start + 20, start + 90],
+                   ["downloading", start + 90, start + 95], ["generating_insights", start + 95, None]]
+
+        durations = stage_durations(created, started, completed, history)
+
+        assert durations == {"queued": 30, "total": 100, "downloading": 25, "transcribing": 70}
+
+    def test_helpers(self):
+        """Test duration buckets and nearest-rank percentiles"""
+        assert duration_bucket(None) == "unknown"
+        assert duration_bucket(60) == "<5m"
+        assert duration_bucket(7200) == "60m+"
+        assert percentile(list(range(1, 101)), 0.95) == 95
+        assert percentile([], 0.5) is None
+
+
+class TestStageAnalytics:
+    """Test suite for the stage analytics endpoint"""
+
+    def _add_job(self, db, video_id, worker_id, transcribe_seconds):
+        now = datetime.now(timezone.utc)
+        started = now - timedelta(seconds=transcribe_seconds + 10)
+        db.add(Job(
+            video_id=video_id,
+            status="completed",
+            worker_id=worker_id,
+            created_at=started - timedelta(seconds=5),
+            started_at=started,
+            completed_at=now,
+            stage_history=[
+                ["downloading", started.timestamp(), started.timestamp() + 10],
+                ["transcribing", started.timestamp() + 10, now.timestamp()],
+            ],
+        ))
+
+    def test_groups_by_duration_and_worker(self, client, create_video_job, db_session):
+        """Test aggregation of stage times per duration bucket and per worker"""
+        short_id, _ = create_video_job(status="completed", job_status="failed", duration=120, extractor="youtube")
+        long_id, _ = create_video_job(status="completed", job_status="failed", duration=5000, extractor="vimeo")
+        self._add_job(db_session, short_id, "w1", 30)
+        self._add_job(db_session, short_id, "w1", 50)
+        self._add_job(db_session, long_id, "w2", 900)
+        db_session.commit()
+
+        by_duration = client.get("/api/analytics/stages?group_by=duration").json()
+        by_worker = client.get("/api/analytics/stages?group_by=worker").json()
+
+        assert by_duration["jobs"] == 3
+        groups = {g["group"]: g for g in by_duration["groups"]}
+        assert set(groups) == {"<5m", "60m+"}
+        assert groups["<5m"]["jobs"] == 2
+        assert groups["<5m"]["stages"]["transcribing"]["count"] == 2
+        assert groups["<5m"]["bottleneck"] == "transcribing"
+        assert groups["60m+"]["stages"]["queued"]["p50"] == 5
+        assert {g["group"] for g in by_worker["groups"]} == {"w1", "w2"}
+
+    def test_invalid_grouping_rejected(self, client):
+        """Test that unknown group_by values are rejected"""
+        assert client.get("/api/analytics/stages?group_by=planet").status_code == 422
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sqlite3
+from unittest.mock import patch
+
+from app.config import Settings
+from app.release import migrate
+
+
+class TestStartupConfiguration:
+    """Test suite for the startup path settings"""
+
+    def test_create_tables_off_by_default(self):
+        """Test that create_all never runs just because DEBUG is on"""
+        with patch.dict(os.environ, {"DEBUG": "True"}, clear=True):
+            assert Settings().create_tables_on_startup is False
+
+    def test_create_tables_explicit_opt_in(self):
+        with patch.dict(os.environ, {"DEBUG": "False", "AUTO_CREATE_TABLES": "True"}, clear=True):
+            assert Settings().create_tables_on_startup is True
+
+    def test_cors_origins_parsed_once(self):
+        """Test that cors_origins is cached instead of re-parsed on every access"""
+        settings = Settings()
+        with patch("app.config.urlparse") as mock_urlparse:
+            settings.cors_origins
+            first_calls = mock_urlparse.call_count
+            settings.cors_origins
+            assert mock_urlparse.call_count == first_calls
+
+    def test_lifespan_skips_create_all_in_production(self):
+        """Test that the lifespan leaves schema management to migrations when disabled"""
+        from app import main
+
+        async def boot():
+            async with main.lifespan(main.app):
+                pass
+
+        with patch.object(main.settings, "auto_create_tables", False), \
+                patch.object(main.Base.metadata, "create_all") as create_all:
+            asyncio.run(boot())
+
+        create_all.assert_not_called()
+
+
+class TestReleaseStep:
+    """Test suite for the one-shot migration release step"""
+
+    def test_migrates_once_then_skips(self, tmp_path):
+        database_url = f"sqlite:///{tmp_path / 'release.db'}"
+
+        assert migrate(database_url) is True
+        assert migrate(database_url) is False
+
+        with sqlite3.connect(tmp_path / "release.db") as conn:
+            assert conn.execute("SELECT count(*) FROM alembic_version").fetchone() == (1,)
@@ -0,0 +1,100 @@
+CHAPTERS = [
+    {"title": "Intro", "start_time": 0, "end_time": 10},
+    {"title": "Main", "start_time": 10, "end_time": 25},
+]
+
+
+class TestTranscriptSegments:
+    """Test suite for segmented transcript storage and range retrieval"""
+
+    def _submit_segments(self, client, create_video_job):
+        video_id, job_id = create_video_job(chapters=CHAPTERS)
+        segments = [{"start": i * 5.0, "end": (i + 1) * 5.0, "text": f"part {i}"} for i in range(6)]
+        response = client.post(f"/api/worker/jobs/{job_id}/result", json={
+            "video_id": video_id,
+            "status": "completed",
+            "segments": segments,
+        })
+        assert response.status_code == 200
+        return video_id
+
+    def test_transcript_built_from_segments(self, client, create_video_job):
+        """Test that the full transcript is assembled when only segments are submitted"""
+        video_id = self._submit_segments(client, create_video_job)
+
+        transcript = client.get(f"/api/videos/{video_id}").json()["transcript"]
+        assert transcript == "part 0 part 1 part 2 part 3 part 4 part 5"
+
+    def test_segments_by_index(self, client, create_video_job):
+        """Test retrieving a window of segments by index"""
+        video_id = self._submit_segments(client, create_video_job)
+
+        response = client.get(f"/api/videos/{video_id}/transcript/segments", params={"offset": 2, "limit": 2})
+
+        assert response.status_code == 200
+        assert [s["index"] for s in response.json()["segments"]] == [2, 3]
+
+    def test_segments_by_time_range(self, client, create_video_job):
+        """Test that a time range returns every overlapping segment"""
+        video_id = self._submit_segments(client, create_video_job)
+
+        response = client.get(f"/api/videos/{video_id}/transcript/segments", params={"start": 7, "end": 16})
+
+        assert [s["text"] for s in response.json()["segments"]] == ["part 1", "part 2", "part 3"]
+
+    def test_segments_for_chapter(self, client, create_video_job):
+        """Test that chapter retrieval is aligned with Video.chapters"""
+        video_id = self._submit_segments(client, create_video_job)
+
+        response = client.get(f"/api/videos/{video_id}/transcript/chapters/1")
+
+        body = response.json()
+        assert body["chapter"]["title"] == "Main"
+        assert [s["index"] for s in body["segments"]] == [2, 3, 4]
+
+    def test_missing_chapter_returns_404(self, client, create_video_job):
+        video_id = self._submit_segments(client, create_video_job)
+
+        assert client.get(f"/api/videos/{video_id}/transcript/chapters/5").status_code == 404
+
+    def test_resubmission_replaces_segments(self, client, create_video_job):
+        """Test that a new result replaces previously stored segments"""
+        video_id, job_id = create_video_job()
+        for count in (6, 2):
+            client.post(f"/api/worker/jobs/{job_id}/result", json={
+                "video_id": video_id,
+                "status": "completed",
+                "segments": [{"start": i, "end": i + 1, "text": "x"} for i in range(count)],
+            })
+
+        response = client.get(f"/api/videos/{video_id}/transcript/segments")
+        assert len(response.json()["segments"]) == 2
+
+    def test_unordered_segments_are_sorted_on_submit(self, client, create_video_job):
+        """Test that segments sent out of order are stored in time order and found by range"""
+        video_id, job_id = create_video_job()
+        segments = [{"start": i * 5.0, "end": (i + 1) * 5.0, "text": f"part {i}"} for i in (3, 0, 5, 1, 4, 2)]
+        response = client.post(f"/api/worker/jobs/{job_id}/result", json={
+            "video_id": video_id,
+            "status": "completed",
+            "segments": segments,
+        })
+        assert response.status_code == 200
+
+        ranged = client.get(f"/api/videos/{video_id}/transcript/segments", params={"start": 7, "end": 16}).json()
+        assert [s["text"] for s in ranged["segments"]] == ["part 1", "part 2", "part 3"]
+        assert client.get(f"/api/videos/{video_id}").json()["transcript"].startswith("part 0 part 1")
+
+    def test_invalid_segments_rejected(self, client, create_video_job):
+        """Test that reversed or nested segments are refused instead of breaking range lookups"""
+        video_id, job_id = create_video_job()
+        for segments in (
+            [{"start": 5.0, "end": 2.0, "text": "reversed"}],
+            [{"start": 0.0, "end": 10.0, "text": "outer"}, {"start": 2.0, "end": 3.0, "text": "nested"}],
+        ):
+            response = client.post(f"/api/worker/jobs/{job_id}/result", json={
+                "video_id": video_id,
+                "status": "completed",
+                "segments": segments,
+            })
+            assert response.status_code == 422
@@ -0,0 +1,87 @@
+from app.models import Channel, Video, VideoMetadata
+
+
+METADATA = {
+    "title": "Talk",
+    "duration": 600,
+    "channel": "Conf",
+    "channel_id": "UC1",
+    "channel_follower_count": 1200,
+    "view_count": 50,
+    "description": "long description",
+    "tags": ["a", "b"],
+    "chapters": [{"title": "Intro", "start_time": 0, "end_time": 60}],
+    "not_a_field": "ignored",
+}
+
+
+class TestVideoMetadataSplit:
+    """Test suite for the hot videos row, video_metadata and channels split"""
+
+    def _complete(self, client, job_id, metadata, **headers):
+        return client.post(f"/api/worker/jobs/{job_id}/result", headers=headers, json={
+            "video_id": "ignored",
+            "status": "completed",
+            "transcript": "text",
+            "metadata": metadata,
+        })
+
+    def test_result_metadata_is_routed_to_tables(self, client, create_video_job, db_session):
+        """Test that hot fields stay on videos and the rest goes to side tables"""
+        video_id, job_id = create_video_job(status="processing")
+        self._complete(client, job_id, METADATA)
+
+        video = db_session.get(Video, video_id)
+        assert (video.title, video.duration, video.channel_id, video.view_count) == ("Talk", 600, "UC1", 50)
+        details = db_session.get(VideoMetadata, video_id)
+        assert details.description == "long description" and details.tags == ["a", "b"]
+        channel = db_session.get(Channel, "UC1")
+        assert (channel.name, channel.follower_count) == ("Conf", 1200)
+
+    def test_channels_are_deduplicated(self, client, create_video_job, db_session):
+        """Test that videos of one channel share a row and missing counts do not erase it"""
+        _, first_job = create_video_job(status="processing")
+        _, second_job = create_video_job(status="processing")
+        self._complete(client, first_job, METADATA)
+        self._complete(client, second_job, {"channel": "Conf", "channel_id": "UC1"})
+
+        channels = db_session.query(Channel).all()
+        assert len(channels) == 1
+        assert channels[0].follower_count == 1200
+
+    def test_responses_stay_compatible(self, client, create_video_job):
+        """Test that video responses still expose every metadata field"""
+        video_id, job_id = create_video_job(status="processing")
+        self._complete(client, job_id, METADATA)
+
+        video = client.get(f"/api/videos/{video_id}").json()
+        listed = client.get("/api/videos/").json()[0]
+        narrow = client.get("/api/videos/?include_metadata=false").json()[0]
+
+        for response in (video, listed):
+            assert response["description"] == "long description"
+            assert response["channel_follower_count"] == 1200
+            assert response["chapters"][0]["title"] == "Intro"
+        assert narrow["title"] == "Talk" and narrow["channel"] == "Conf"
+        assert narrow["description"] is None
+
+    def test_proxies_read_and_create_metadata(self, db_session):
+        """Test attribute access to metadata fields on Video"""
+        video = Video(url="https://youtu.be/x", status="pending", description="d")
+        video.tags = ["t"]
+        bare = Video(url="https://youtu.be/y", status="pending")
+        db_session.add_all([video, bare])
+        db_session.commit()
+
+        assert db_session.get(VideoMetadata, video.id).tags == ["t"]
+        assert bare.description is None
+        assert bare.channel_follower_count is None
+
+    def test_metadata_does_not_clobber_idempotency_key(self, client, create_video_job):
+        """Test that a retried result with metadata is replayed from the stored response"""
+        _, job_id = create_video_job(status="processing")
+        first = self._complete(client, job_id, METADATA, **{"Idempotency-Key": "k1"})
+        retry = self._complete(client, job_id, {"title": "Changed"}, **{"Idempotency-Key": "k1"})
+
+        assert retry.json() == first.json()
+        assert client.get("/api/videos/").json()[0]["title"] == "Talk"